@@ -0,0 +1,65 @@
+import asyncio
+from typing import Generic, Optional, Set, TypeVar
+
+T = TypeVar("T")
+
+
+class Subscription(Generic[T]):
+    """A subscriber's bounded inbox.
+
+    :meth:`get` returns ``None`` once the subscription has been closed,
+    either explicitly or because the subscriber fell ``maxsize`` items
+    behind (``overflowed`` is then set).
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.queue: "asyncio.Queue[Optional[T]]" = asyncio.Queue(maxsize)
+        self.closed = False
+        self.overflowed = False
+
+    async def get(self) -> Optional[T]:
+        if self.closed and self.queue.empty():
+            return None
+        return await self.queue.get()
+
+    def get_nowait(self) -> Optional[T]:
+        return self.queue.get_nowait()
+
+    def _close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        # Drop whatever is pending so the sentinel always fits.
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class Broadcaster(Generic[T]):
+    """Fan one producer out to many consumers without letting a slow
+    consumer hold the others back: a full inbox closes that subscription
+    instead of blocking :meth:`publish`."""
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self.subscribers: Set[Subscription[T]] = set()
+
+    def subscribe(self) -> Subscription[T]:
+        sub: Subscription[T] = Subscription(self.maxsize)
+        self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription[T]) -> None:
+        self.subscribers.discard(sub)
+        sub._close()
+
+    def publish(self, item: T) -> None:
+        for sub in list(self.subscribers):
+            try:
+                sub.queue.put_nowait(item)
+            except asyncio.QueueFull:
+                sub.overflowed = True
+                self.unsubscribe(sub)
+
+    def __len__(self) -> int:
+        return len(self.subscribers)
@@ -0,0 +1,161 @@
+import zlib
+from typing import Any, Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # optional: gzip only without it
+    import brotli
+
+    HAS_BROTLI = True
+except Exception:  # pragma: no cover
+    brotli = None
+    HAS_BROTLI = False
+
+# Event streams must not be buffered; Parquet pages are compressed already.
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "application/vnd.apache.parquet")
+# Chunks at least this large are compressed in a worker thread.
+THREAD_THRESHOLD = 128 * 1024
+
+
+def accepted_encodings(header: str) -> set[str]:
+    encodings = set()
+    for item in header.split(","):
+        name, _, params = item.partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+
+class _GzipEncoder:
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def __call__(self, body: bytes, more_body: bool) -> bytes:
+        data = self._compressor.compress(body)
+        return data + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH
+        )
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def __call__(self, body: bytes, more_body: bool) -> bytes:
+        data = self._compressor.process(body)
+        return data + (
+            self._compressor.flush() if more_body else self._compressor.finish()
+        )
+
+
+class CompressionMiddleware:
+    """Compress HTTP responses with Brotli (when the client accepts ``br``
+    and the ``brotli`` package is installed) or gzip.
+
+    Responses smaller than ``minimum_size``, already encoded or with a
+    content type in :data:`EXCLUDED_CONTENT_TYPES` pass through untouched.
+    Streaming bodies are compressed chunk by chunk and flushed after each.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        brotli_quality: int = 4,
+        gzip_level: int = 6,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.brotli_quality = brotli_quality
+        self.gzip_level = gzip_level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accepted = accepted_encodings(Headers(scope=scope).get("Accept-Encoding", ""))
+        if HAS_BROTLI and "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            await self.app(scope, receive, send)
+            return
+        responder = _Responder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _Responder:
+    """Per-response state: holds the start message until the first body
+    chunk shows whether the response is worth compressing."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start: Optional[Message] = None
+        self.encoder: Any = None
+
+    def _new_encoder(self) -> Any:
+        if self.encoding == "br":
+            return _BrotliEncoder(self.middleware.brotli_quality)
+        return _GzipEncoder(self.middleware.gzip_level)
+
+    async def _compress(self, body: bytes, more_body: bool) -> bytes:
+        if len(body) >= THREAD_THRESHOLD:
+            return await anyio.to_thread.run_sync(self.encoder, body, more_body)
+        return self.encoder(body, more_body)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._flush_start()
+            await self.downstream(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            content_type = headers.get("content-type", "")
+            if (
+                "content-encoding" in headers
+                or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+                or (not more_body and len(body) < self.middleware.minimum_size)
+            ):
+                await self._flush_start()
+                await self.downstream(message)
+                return
+            self.encoder = self._new_encoder()
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            body = await self._compress(body, more_body)
+            if more_body:
+                if "content-length" in headers:
+                    del headers["content-length"]
+            else:
+                headers["Content-Length"] = str(len(body))
+            await self._flush_start()
+            await self.downstream(
+                {"type": "http.response.body", "body": body, "more_body": more_body}
+            )
+            return
+        if self.encoder is None:
+            await self.downstream(message)
+            return
+        await self.downstream(
+            {
+                "type": "http.response.body",
+                "body": await self._compress(body, more_body),
+                "more_body": more_body,
+            }
+        )
+
+    async def _flush_start(self) -> None:
+        if self.start is not None:
+            start, self.start = self.start, None
+            await self.downstream(start)
@@ -9,8 +9,38 @@ ORACLE_USER = os.getenv("ORACLE_USER", "")
 ORACLE_PASSWORD = os.getenv("ORACLE_PASSWORD", "")
 ORACLE_POOL_MIN = int(os.getenv("ORACLE_POOL_MIN", "1"))
 ORACLE_POOL_MAX = int(os.getenv("ORACLE_POOL_MAX", "5"))
+ORACLE_ARRAYSIZE = int(os.getenv("ORACLE_ARRAYSIZE", "1000"))
+ORACLE_PREFETCHROWS = int(os.getenv("ORACLE_PREFETCHROWS", "2"))
+DB_TIMEZONE = os.getenv("DB_TIMEZONE", "")
+COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", "30"))
+ESTIMATE_CACHE_TTL = float(os.getenv("ESTIMATE_CACHE_TTL", "300"))
+ROLLUP_ENABLED = os.getenv("ROLLUP_ENABLED", "1") == "1"
+ROLLUP_RETENTION_HOURS = int(os.getenv("ROLLUP_RETENTION_HOURS", "24"))
+ROLLUP_SETTLE_SECONDS = int(os.getenv("ROLLUP_SETTLE_SECONDS", "120"))
+ROLLUP_RECHECK_MINUTES = int(os.getenv("ROLLUP_RECHECK_MINUTES", "30"))
+ROLLUP_POLL_SECONDS = float(os.getenv("ROLLUP_POLL_SECONDS", "30"))
+LIVE_POLL_SECONDS = float(os.getenv("LIVE_POLL_SECONDS", "1"))
+LIVE_MAX_ROWS = int(os.getenv("LIVE_MAX_ROWS", "5000"))
+LIVE_QUEUE = int(os.getenv("LIVE_QUEUE", "64"))
+LIVE_KEEPALIVE_SECONDS = float(os.getenv("LIVE_KEEPALIVE_SECONDS", "15"))
+LIVE_PENDING_STATUSES = frozenset(
+    os.getenv("LIVE_PENDING_STATUSES", "K,T,PENDING").split(",")
+)
+LIVE_MAX_PENDING = int(os.getenv("LIVE_MAX_PENDING", "1000"))
+# Rows committed this long after their pri_action_date are still streamed.
+LIVE_SETTLE_SECONDS = float(os.getenv("LIVE_SETTLE_SECONDS", "5"))
+STATS_MAX_BUCKETS = int(os.getenv("STATS_MAX_BUCKETS", "5000"))
+LOOKUP_MAX_IDS = int(os.getenv("LOOKUP_MAX_IDS", "1000"))
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
 JWT_SECRET = os.getenv("JWT_SECRET", "change_me")
 JWT_EXPIRES_MIN = int(os.getenv("JWT_EXPIRES_MIN", "60"))
 LOG_FILE_PATH = os.getenv("LOG_FILE_PATH", "/var/log/app/app.log")
+LOG_TAIL_INTERVAL = float(os.getenv("LOG_TAIL_INTERVAL", "0.5"))
+LOG_TAIL_QUEUE = int(os.getenv("LOG_TAIL_QUEUE", "256"))
+LOG_REPLAY_BYTES = int(os.getenv("LOG_REPLAY_BYTES", "65536"))
+LOG_FRAME_MAX_LINES = int(os.getenv("LOG_FRAME_MAX_LINES", "500"))
+LOG_FRAME_MAX_BYTES = int(os.getenv("LOG_FRAME_MAX_BYTES", "65536"))
+LOG_FRAME_MAX_DELAY = float(os.getenv("LOG_FRAME_MAX_DELAY", "0.25"))
 ALLOW_ORIGINS = os.getenv("ALLOW_ORIGINS", "*")
 VITE_API_BASE = os.getenv("VITE_API_BASE", "/api")
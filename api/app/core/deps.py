@@ -1,4 +1,4 @@
-from fastapi import Header, HTTPException, status
+from fastapi import Header, HTTPException, Query, WebSocketException, status
 
 from .security import decode_token
 
@@ -10,3 +10,18 @@ def get_current_user(authorization: str = Header("")) -> str:
         )
     token = authorization.split(" ", 1)[1]
     return decode_token(token)
+
+
+def get_websocket_user(token: str = Query("")) -> str:
+    """Like :func:`get_current_user` for websockets, which browsers open
+    without custom headers: the bearer token comes as ``?token=``."""
+    if not token:
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION, reason="Missing token"
+        )
+    try:
+        return decode_token(token)
+    except HTTPException as exc:
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail
+        ) from None
@@ -0,0 +1,38 @@
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag over ``parts`` (request parameters plus a data validator).
+
+    Weak because it is derived from a watermark of the data, not from the
+    bytes of the representation.
+    """
+    payload = json.dumps(parts, default=str, separators=(",", ":"))
+    return 'W/"%s"' % hashlib.sha1(payload.encode()).hexdigest()
+
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag`` (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
+
+
+def attach(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
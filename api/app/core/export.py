@@ -0,0 +1,157 @@
+import asyncio
+import csv
+import io
+import json
+from decimal import Decimal
+from typing import Any, AsyncIterator
+
+from ..db import columnar
+from ..db.columnar import ColumnSet
+from . import config
+from .fastjson import json_default
+
+try:  # optional: only needed for Parquet exports
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    HAS_PARQUET = True
+except Exception:  # pragma: no cover
+    HAS_PARQUET = False
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+async def csv_chunks(batches: AsyncIterator[ColumnSet]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header_written = False
+    async for batch in batches:
+        if not header_written:
+            writer.writerow(batch.names)
+            header_written = True
+        writer.writerows(batch.rows())
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+async def ndjson_chunks(batches: AsyncIterator[ColumnSet]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        names = batch.names
+        lines = [
+            json.dumps(dict(zip(names, row)), default=json_default)
+            for row in batch.rows()
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back in chunks."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_column(values: Any, arrow_type: Any) -> Any:
+    """``values`` ready for ``arrow_type``: the driver hands out floats for
+    fractional NUMBERs, which Arrow only takes as :class:`Decimal`."""
+    if not pa.types.is_decimal(arrow_type):
+        return values
+    return [
+        (
+            round(Decimal(repr(value)), arrow_type.scale)
+            if isinstance(value, float)
+            else value
+        )
+        for value in values
+    ]
+
+
+def _arrow_schema(batch: ColumnSet) -> Any:
+    """Schema for the whole export, from the declared column types.
+
+    Batches fetched as Arrow already carry it. Otherwise values of the
+    first batch are only looked at for columns whose type
+    is unknown (batches built without ``cursor.description``); all-NULL
+    columns then fall back to text.
+    """
+    if batch.arrow is not None:
+        return batch.arrow.schema
+    types = batch.types or [None] * len(batch.names)
+    fields = []
+    for name, column, description in zip(batch.names, batch.columns, types):
+        arrow_type = columnar.arrow_type(description) if description else None
+        if arrow_type is None:
+            arrow_type = pa.array(column).type
+            if pa.types.is_null(arrow_type):
+                arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+async def parquet_chunks(batches: AsyncIterator[ColumnSet]) -> AsyncIterator[bytes]:
+    """Encode each batch as one Parquet row group and yield it as written.
+
+    Every batch is converted with the schema chosen for the first one, so
+    a column whose values change shape between batches (NULLs first,
+    integers then fractions) still lands in a single Parquet type. Arrow
+    batches from the driver are written as they are, without a round trip
+    through Python values.
+    """
+    if not HAS_PARQUET:
+        raise RuntimeError("pyarrow is required for Parquet exports")
+    sink = _ChunkSink()
+    writer = None
+    async for batch in batches:
+        if writer is None:
+            schema = _arrow_schema(batch)
+            writer = pq.ParquetWriter(sink, schema)
+        if batch.arrow is not None:
+            table = batch.arrow.cast(writer.schema)
+        else:
+            table = pa.Table.from_pydict(
+                {
+                    field.name: _arrow_column(column, field.type)
+                    for field, column in zip(writer.schema, batch.columns)
+                },
+                schema=writer.schema,
+            )
+        writer.write_table(table)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+_export_slots = asyncio.Semaphore(config.EXPORT_MAX_CONCURRENT)
+
+
+async def limited(batches: AsyncIterator[ColumnSet]) -> AsyncIterator[ColumnSet]:
+    """Pass ``batches`` through, at most ``EXPORT_MAX_CONCURRENT`` at a time.
+
+    A streaming export keeps a pooled connection for as long as the client
+    reads, so further exports wait here instead of draining the pool that
+    the interactive endpoints share.
+    """
+    async with _export_slots:
+        async for batch in batches:
+            yield batch
+
+
+ENCODERS = {"csv": csv_chunks, "ndjson": ndjson_chunks, "parquet": parquet_chunks}
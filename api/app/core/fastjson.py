@@ -0,0 +1,36 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Sequence
+
+from ..db.columnar import ColumnSet
+
+try:  # optional: stdlib json otherwise
+    import orjson
+
+    HAS_ORJSON = True
+except Exception:  # pragma: no cover
+    orjson = None
+    HAS_ORJSON = False
+
+
+def json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def dumps(obj: Any) -> bytes:
+    if HAS_ORJSON:
+        return orjson.dumps(obj, default=json_default)
+    return json.dumps(obj, default=json_default, separators=(",", ":")).encode()
+
+
+def project(rows: ColumnSet, fields: Sequence[str]) -> List[Dict[str, Any]]:
+    """One dict per row holding exactly ``fields`` (``None`` for columns the
+    query did not return), i.e. what a response model would keep."""
+    missing = (None,) * len(rows)
+    columns = [rows.column(f) if f in rows.names else missing for f in fields]
+    return [dict(zip(fields, values)) for values in zip(*columns)]
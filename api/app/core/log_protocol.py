@@ -0,0 +1,154 @@
+"""Wire format of the ``/logs/stream`` websocket.
+
+The server sends JSON frames; with ``compress`` they are zlib-compressed
+and sent as binary messages (``DecompressionStream("deflate")`` in the
+browser):
+
+- ``{"type": "lines", "file": str, "offset": int, "lines": [...]}`` –
+  matching lines; ``offset`` is the byte offset right after the last line
+  read in the file identified by ``file`` (device and inode). Both are sent
+  back as ``?offset=&file=`` when reconnecting, so a resume after rotation
+  starts the new file from the beginning.
+- ``{"type": "subscribed", "include": [...], "exclude": [...], "levels": [...]}``
+- ``{"type": "error", "detail": str}``
+
+The client may send ``{"type": "subscribe", "include": text,
+"exclude": text, "levels": ["ERROR", ...]}`` at any time to change its
+filters; ``include`` and ``exclude`` also take a list of texts (any of
+them matches). They are plain substrings, not regexes: the socket is open
+to every signed-in user and matching runs on the event loop, so a client
+pattern must not be able to backtrack for seconds on a long line.
+"""
+
+import json
+import re
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+MAX_PATTERN_LENGTH = 200
+MAX_PATTERNS = 20
+
+LEVEL_RE = re.compile(r"\b(TRACE|DEBUG|INFO|WARN(?:ING)?|ERROR|CRITICAL|FATAL)\b")
+LEVELS = {"TRACE", "DEBUG", "INFO", "WARN", "ERROR", "CRITICAL", "FATAL"}
+
+
+def line_level(line: str) -> Optional[str]:
+    """First level keyword found in ``line`` (``WARNING`` maps to ``WARN``)."""
+    m = LEVEL_RE.search(line)
+    if m is None:
+        return None
+    return "WARN" if m.group(1) == "WARNING" else m.group(1)
+
+
+def _patterns(value: Union[str, Iterable[str], None]) -> Tuple[str, ...]:
+    if not value:
+        return ()
+    if isinstance(value, str):
+        value = [value]
+    elif not isinstance(value, (list, tuple)):
+        raise ValueError("patterns must be strings")
+    if len(value) > MAX_PATTERNS:
+        raise ValueError(f"more than {MAX_PATTERNS} patterns")
+    for pattern in value:
+        if not isinstance(pattern, str):
+            raise ValueError("patterns must be strings")
+        if len(pattern) > MAX_PATTERN_LENGTH:
+            raise ValueError(f"pattern longer than {MAX_PATTERN_LENGTH} characters")
+    return tuple(pattern for pattern in value if pattern)
+
+
+class LogFilter:
+    """Server-side line filter: ``include``/``exclude`` substrings searched
+    anywhere in the line plus an optional set of levels."""
+
+    def __init__(
+        self,
+        include: Union[str, Iterable[str], None] = None,
+        exclude: Union[str, Iterable[str], None] = None,
+        levels: Union[str, Iterable[str], None] = None,
+    ) -> None:
+        if isinstance(levels, str):
+            levels = levels.split(",")
+        elif levels is not None and (
+            not isinstance(levels, (list, tuple, set, frozenset))
+            or not all(isinstance(lv, str) for lv in levels)
+        ):
+            raise ValueError("levels must be a string or a list of strings")
+        wanted = {lv.strip().upper() for lv in levels or () if lv.strip()}
+        if unknown := wanted - LEVELS:
+            raise ValueError(f"unknown levels: {', '.join(sorted(unknown))}")
+        self.include = _patterns(include)
+        self.exclude = _patterns(exclude)
+        self.levels = frozenset(wanted)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "include": list(self.include),
+            "exclude": list(self.exclude),
+            "levels": sorted(self.levels),
+        }
+
+    def apply(self, lines: Iterable[str]) -> List[str]:
+        include, exclude, levels = self.include, self.exclude, self.levels
+        return [
+            line
+            for line in lines
+            if (not include or any(text in line for text in include))
+            and not any(text in line for text in exclude)
+            and (not levels or line_level(line) in levels)
+        ]
+
+
+class FrameBuffer:
+    """Coalesce lines into ``lines`` frames.
+
+    A frame is due when it holds ``max_lines`` lines or ``max_bytes``
+    characters, or ``max_delay`` seconds after its first line arrived.
+    """
+
+    def __init__(self, max_lines: int, max_bytes: int, max_delay: float) -> None:
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.lines: List[str] = []
+        self.size = 0
+        self.offset = 0
+        self.file = ""
+        self.since: Optional[float] = None
+
+    def add(self, lines: List[str], offset: int, file: str = "") -> None:
+        self.offset, self.file = offset, file
+        if not lines:
+            return
+        if self.since is None:
+            self.since = time.monotonic()
+        self.lines.extend(lines)
+        self.size += sum(len(line) for line in lines)
+
+    @property
+    def full(self) -> bool:
+        return len(self.lines) >= self.max_lines or self.size >= self.max_bytes
+
+    def timeout(self) -> Optional[float]:
+        """Seconds until the pending frame is due (``None`` when empty)."""
+        if self.since is None:
+            return None
+        return max(0.0, self.since + self.max_delay - time.monotonic())
+
+    def take(self) -> Optional[Dict[str, Any]]:
+        if not self.lines:
+            return None
+        frame = {
+            "type": "lines",
+            "file": self.file,
+            "offset": self.offset,
+            "lines": self.lines,
+        }
+        self.lines, self.size, self.since = [], 0, None
+        return frame
+
+
+def encode_frame(frame: Dict[str, Any], compress: bool) -> Union[str, bytes]:
+    data = json.dumps(frame, ensure_ascii=False)
+    return zlib.compress(data.encode()) if compress else data
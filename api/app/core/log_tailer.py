@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from . import config
+from .broadcast import Broadcaster, Subscription
+
+logger = logging.getLogger(__name__)
+
+
+class LogBatch(NamedTuple):
+    """Complete lines read from the file between two byte offsets.
+
+    ``file`` identifies the file the offsets refer to (see :func:`file_id`).
+    """
+
+    start: int
+    end: int
+    lines: List[str]
+    file: str = ""
+
+
+def file_id(stat: os.stat_result) -> str:
+    """Identity of a file across renames: ``"<device>:<inode>"``."""
+    return f"{stat.st_dev}:{stat.st_ino}"
+
+
+class LogTailer:
+    """Single reader of a log file shared by every websocket viewer.
+
+    A background task polls the file every ``interval`` seconds, reads only
+    the bytes appended since the last poll and broadcasts them as one
+    :class:`LogBatch`. Rotation is detected by an inode change (the rest of
+    the old file is drained first) and truncation by the size shrinking.
+    The task runs only while there are subscribers.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        interval: float = config.LOG_TAIL_INTERVAL,
+        maxsize: int = config.LOG_TAIL_QUEUE,
+    ):
+        self.path = path
+        self.interval = interval
+        self.hub: Broadcaster[LogBatch] = Broadcaster(maxsize)
+        self.offset = 0
+        self._file: Optional[BinaryIO] = None
+        self._inode: Optional[int] = None
+        self.file = ""
+        self._partial = b""
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> Tuple[Subscription[LogBatch], int]:
+        """Register a viewer.
+
+        Returns its subscription and the byte offset live batches start
+        from; everything before that offset (in :attr:`file`) is the
+        viewer's backlog.
+        """
+        if self._file is None:
+            self._open(seek_end=True)
+        sub = self.hub.subscribe()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return sub, self.offset
+
+    def unsubscribe(self, sub: Subscription[LogBatch]) -> None:
+        self.hub.unsubscribe(sub)
+        if not self.hub and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self._close()
+
+    def _open(self, seek_end: bool = False) -> None:
+        self._close()
+        try:
+            self._file = self.path.open("rb")
+        except FileNotFoundError:
+            return
+        stat = os.fstat(self._file.fileno())
+        self._inode, self.file = stat.st_ino, file_id(stat)
+        self.offset = 0
+        if seek_end:
+            # Start at the last line boundary; a line still being written
+            # is kept as the pending partial and finished by the next poll.
+            size = self._file.seek(0, os.SEEK_END)
+            tail_start = self._file.seek(max(0, size - 65536))
+            tail = self._file.read()
+            cut = tail.rfind(b"\n") + 1
+            if cut or tail_start == 0:
+                self.offset = tail_start + cut
+                self._partial = tail[cut:]
+            else:  # pragma: no cover - single line longer than 64 KiB
+                self.offset = size
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._inode = None
+        self.file = ""
+        self._partial = b""
+
+    def _read(self) -> None:
+        assert self._file is not None
+        data = self._partial + self._file.read()
+        if not data:
+            return
+        complete, sep, rest = data.rpartition(b"\n")
+        self._partial = rest
+        if not sep:
+            return
+        start = self.offset
+        self.offset += len(complete) + 1
+        lines = complete.decode("utf-8", errors="replace").split("\n")
+        self.hub.publish(LogBatch(start, self.offset, lines, self.file))
+
+    def poll(self) -> None:
+        """Read and broadcast whatever was appended since the last poll."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return  # mid-rotation: keep the old handle until a new file shows up
+        if self._file is None:
+            self._open()
+        elif stat.st_ino != self._inode:
+            self._read()  # drain the rotated file before switching
+            self._open()
+        elif stat.st_size < self.offset + len(self._partial):
+            self._open()  # truncated in place
+        if self._file is not None:
+            self._read()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.poll()
+            except Exception:  # pragma: no cover - keep tailing on I/O errors
+                logger.exception("log tail failed for %s", self.path)
+            await asyncio.sleep(self.interval)
+
+
+_tailers: Dict[Path, LogTailer] = {}
+
+
+def get_tailer(path: Path) -> LogTailer:
+    """Return the process-wide tailer for ``path``."""
+    tailer = _tailers.get(path)
+    if tailer is None:
+        tailer = _tailers[path] = LogTailer(path)
+    return tailer
+
+
+def read_backlog(
+    path: Path, start: int, end: int, chunk_size: int = 1 << 20
+) -> Iterator[LogBatch]:
+    """Yield the complete lines of ``path`` in ``[start, end)``, about
+    ``chunk_size`` bytes per batch.
+
+    A ``start`` that falls inside a line skips to the next line boundary.
+    Blocking: advance it from a worker thread.
+    """
+    with path.open("rb") as f:
+        file = file_id(os.fstat(f.fileno()))
+        if start > 0:
+            f.seek(start - 1)
+            start += len(f.readline()) - 1
+        position, partial = start, b""
+        while position < end:
+            data = f.read(min(chunk_size, end - position - len(partial)))
+            if not data:
+                break
+            data = partial + data
+            complete, sep, partial = data.rpartition(b"\n")
+            if sep:
+                lines = complete.decode("utf-8", errors="replace").split("\n")
+                yield LogBatch(position, position + len(complete) + 1, lines, file)
+                position += len(complete) + 1
@@ -0,0 +1,77 @@
+from typing import Any
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+REGISTRY = CollectorRegistry()
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    registry=REGISTRY,
+)
+HTTP_RESPONSES = Counter(
+    "http_responses_total",
+    "HTTP responses by route template and status code",
+    ["method", "route", "status"],
+    registry=REGISTRY,
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Oracle statement latency (execute + fetch) by query name",
+    ["query"],
+    registry=REGISTRY,
+)
+DB_QUERY_ROWS = Histogram(
+    "db_query_rows",
+    "Rows fetched per statement by query name",
+    ["query"],
+    buckets=(0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000),
+    registry=REGISTRY,
+)
+DB_POOL_ACQUIRE_WAIT = Histogram(
+    "db_pool_acquire_wait_seconds",
+    "Time spent waiting for a pooled Oracle connection",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    registry=REGISTRY,
+)
+DB_POOL_OPEN = Gauge(
+    "db_pool_connections_open", "Connections open in the async pool", registry=REGISTRY
+)
+DB_POOL_BUSY = Gauge(
+    "db_pool_connections_busy",
+    "Connections checked out of the async pool",
+    registry=REGISTRY,
+)
+DB_POOL_MAX = Gauge(
+    "db_pool_connections_max", "Async pool size limit", registry=REGISTRY
+)
+WEBSOCKET_CLIENTS = Gauge(
+    "websocket_clients",
+    "Connected websocket clients by endpoint",
+    ["endpoint"],
+    registry=REGISTRY,
+)
+
+
+def observe_pool(pool: Any) -> None:
+    """Copy the pool counters into the gauges (called at scrape time)."""
+    if pool is None:
+        return
+    DB_POOL_OPEN.set(pool.opened)
+    DB_POOL_BUSY.set(pool.busy)
+    DB_POOL_MAX.set(pool.max)
+
+
+def render() -> bytes:
+    return generate_latest(REGISTRY)
+
+
+__all__ = ["CONTENT_TYPE_LATEST", "render", "observe_pool"]
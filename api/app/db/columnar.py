@@ -0,0 +1,171 @@
+from collections import namedtuple
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:  # optional: results fall back to driver tuples without it
+    import pyarrow as pa
+
+    HAS_ARROW = True
+except Exception:  # pragma: no cover
+    pa = None
+    HAS_ARROW = False
+
+
+# Fractional digits kept for NUMBER columns declared without precision.
+UNCONSTRAINED_NUMBER_SCALE = 10
+
+# Arrow type per Oracle type name (``cursor.description`` type codes).
+# NUMBER is refined by precision/scale in :func:`arrow_type`.
+_ARROW_TYPES = {
+    "DB_TYPE_BINARY_INTEGER": "int64",
+    "DB_TYPE_BINARY_FLOAT": "float64",
+    "DB_TYPE_BINARY_DOUBLE": "float64",
+    "DB_TYPE_DATE": "timestamp",
+    "DB_TYPE_TIMESTAMP": "timestamp",
+    "DB_TYPE_TIMESTAMP_TZ": "timestamp",
+    "DB_TYPE_TIMESTAMP_LTZ": "timestamp",
+    "DB_TYPE_CHAR": "string",
+    "DB_TYPE_NCHAR": "string",
+    "DB_TYPE_VARCHAR": "string",
+    "DB_TYPE_NVARCHAR": "string",
+    "DB_TYPE_LONG": "string",
+    "DB_TYPE_CLOB": "string",
+    "DB_TYPE_NCLOB": "string",
+    "DB_TYPE_ROWID": "string",
+    "DB_TYPE_RAW": "binary",
+    "DB_TYPE_LONG_RAW": "binary",
+    "DB_TYPE_BLOB": "binary",
+    "DB_TYPE_BOOLEAN": "bool",
+}
+
+
+def arrow_type(description: Any) -> Any:
+    """Arrow type for a ``cursor.description`` entry, ``None`` if unknown.
+
+    ``NUMBER(p)`` becomes ``int64`` when it fits in 64 bits and
+    ``decimal128(p, 0)`` otherwise; ``NUMBER(p, s)`` becomes
+    ``decimal128(p, s)``. A NUMBER declared without precision may hold
+    identifiers as well as fractions, so it is kept exact as
+    ``decimal128(38, 10)`` rather than rounded through ``float64``; only
+    ``FLOAT(b)`` (precision with scale -127) is a binary float.
+    """
+    type_name = getattr(description[1], "name", str(description[1]))
+    if type_name == "DB_TYPE_NUMBER":
+        precision, scale = description[4], description[5]
+        if not precision:
+            return pa.decimal128(38, UNCONSTRAINED_NUMBER_SCALE)
+        if scale == -127:
+            return pa.float64()
+        if not scale:
+            return pa.int64() if precision <= 18 else pa.decimal128(precision, 0)
+        return pa.decimal128(precision, scale)
+    kind = _ARROW_TYPES.get(type_name)
+    if kind == "timestamp":
+        return pa.timestamp("us")
+    return getattr(pa, kind)() if kind else None
+
+
+def arrow_schema(description: Sequence[Any]) -> Any:
+    """Arrow schema for a whole ``cursor.description``, with lower-case
+    names, or ``None`` when a column has a type without a mapping."""
+    fields = []
+    for column in description:
+        column_type = arrow_type(column)
+        if column_type is None:
+            return None
+        fields.append(pa.field(column[0].lower(), column_type))
+    return pa.schema(fields)
+
+
+class ColumnSet:
+    """Query result held as one sequence per selected column.
+
+    Sets built by :meth:`from_arrow` wrap the Arrow table that the driver
+    fills column by column (``fetch_df_all`` / ``fetch_df_batches``); a
+    column only becomes Python values when :attr:`columns` is first read,
+    and the Parquet export writes :attr:`arrow` without converting at all.
+    :meth:`from_rows` is the fallback for row tuples (no pyarrow, tests).
+    ``types`` optionally keeps the ``cursor.description`` entry of each
+    column, for consumers that need the declared types of row-built sets.
+    """
+
+    __slots__ = ("names", "_columns", "types", "arrow")
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        columns: Optional[Sequence[Sequence[Any]]],
+        types: Optional[Sequence[Any]] = None,
+        arrow: Any = None,
+    ):
+        self.names = list(names)
+        self._columns = list(columns) if columns is not None else None
+        self.types = list(types) if types is not None else None
+        self.arrow = arrow
+
+    @classmethod
+    def from_arrow(cls, data: Any) -> "ColumnSet":
+        """Wrap a driver DataFrame (or anything exporting an Arrow stream)."""
+        table = pa.table(data)
+        names = [name.lower() for name in table.column_names]
+        return cls(names, None, arrow=table.rename_columns(names))
+
+    @property
+    def columns(self) -> List[Sequence[Any]]:
+        if self._columns is None:
+            self._columns = [column.to_pylist() for column in self.arrow.columns]
+        return self._columns
+
+    @classmethod
+    def from_rows(
+        cls,
+        names: Sequence[str],
+        rows: Sequence[Tuple[Any, ...]],
+        types: Optional[Sequence[Any]] = None,
+    ) -> "ColumnSet":
+        if not rows:
+            return cls(names, [() for _ in names], types)
+        return cls(names, list(zip(*rows)), types)
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]]) -> "ColumnSet":
+        names: List[str] = list(records[0]) if records else []
+        return cls(names, [tuple(r.get(n) for r in records) for n in names])
+
+    def __len__(self) -> int:
+        if self._columns is None:
+            return self.arrow.num_rows
+        return len(self._columns[0]) if self._columns else 0
+
+    def column(self, name: str) -> Sequence[Any]:
+        """Values of one column; Arrow-backed sets convert just that one."""
+        index = self.names.index(name)
+        if self._columns is None:
+            return self.arrow.column(index).to_pylist()
+        return self._columns[index]
+
+    def rows(self) -> Iterator[Tuple[Any, ...]]:
+        return zip(*self.columns)
+
+    def records(self) -> Iterator[Any]:
+        record = namedtuple("Record", self.names, rename=True)  # type: ignore[misc]
+        return map(record._make, self.rows())
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Materialize a single row as a dict (e.g. for cursor boundaries)."""
+        return {name: col[index] for name, col in zip(self.names, self.columns)}
+
+    def slice(self, start: int, stop: int) -> "ColumnSet":
+        return ColumnSet(
+            self.names, [col[start:stop] for col in self.columns], self.types
+        )
+
+    def take(self, indices: Sequence[int]) -> "ColumnSet":
+        """Rows at ``indices``, in that order."""
+        return ColumnSet(
+            self.names,
+            [tuple(col[i] for i in indices) for col in self.columns],
+            self.types,
+        )
+
+    def reversed(self) -> "ColumnSet":
+        return ColumnSet(self.names, [col[::-1] for col in self.columns], self.types)
@@ -0,0 +1,43 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def fingerprint(query: str, params: Dict[str, Any]) -> str:
+    """Stable key for a statement and its bind values."""
+    material = query + "\x00" + repr(sorted(params.items(), key=lambda kv: kv[0]))
+    return hashlib.sha1(material.encode()).hexdigest()
+
+
+class CountCache:
+    """Small TTL cache of row counts keyed by filter fingerprint.
+
+    Entries expire ``ttl`` seconds after being stored; once ``max_entries``
+    is reached the least recently used entry is evicted.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 1024) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: int) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
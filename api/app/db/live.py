@@ -0,0 +1,220 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from ..core import config
+from ..core.broadcast import Broadcaster, Subscription
+from .columnar import ColumnSet
+from .oracle import db_now, fetch_columns
+from .queries import _in_lists
+
+logger = logging.getLogger(__name__)
+
+LIVE_QUERY = (
+    "SELECT * FROM (SELECT * FROM provisioning_interface "
+    "WHERE pri_action_date > :after_date "
+    "OR (pri_action_date = :after_date AND pri_id > :after_id) "
+    "ORDER BY pri_action_date, pri_id) WHERE ROWNUM <= :max_rows"
+)
+
+PENDING_QUERY = "SELECT * FROM provisioning_interface WHERE "
+
+FILTER_COLUMNS = {
+    "ne_id": "pri_ne_id",
+    "ne_group": "pri_ne_group",
+    "ne_service": "pri_ne_service",
+}
+
+
+class LiveBatch(NamedTuple):
+    """One broadcast of the feed.
+
+    ``kind`` is ``"rows"`` for rows past the watermark, or ``"update"`` for
+    tracked pending rows whose status changed; update batches carry an
+    extra ``previous_status`` column.
+    """
+
+    kind: str
+    rows: ColumnSet
+
+
+class LiveFeed:
+    """Single incremental poller behind every live subscriber.
+
+    Each poll re-reads the rows seen with a pending status
+    (``LIVE_PENDING_STATUSES``, at most ``LIVE_MAX_PENDING`` of the newest)
+    and broadcasts those that changed, then reads the rows past the
+    ``(pri_action_date, pri_id)`` watermark and broadcasts them, so the
+    query load does not depend on the number of clients. The task runs
+    only while there are subscribers and starts from the database clock.
+
+    ``pri_action_date`` is set before the row commits, so a row can become
+    visible after newer ones were already read. Each poll therefore reads
+    from ``LIVE_SETTLE_SECONDS`` behind the watermark and drops the ids
+    it already broadcast from that window.
+    """
+
+    def __init__(
+        self,
+        interval: float = config.LIVE_POLL_SECONDS,
+        max_rows: int = config.LIVE_MAX_ROWS,
+        maxsize: int = config.LIVE_QUEUE,
+        max_pending: int = config.LIVE_MAX_PENDING,
+    ) -> None:
+        self.interval = interval
+        self.max_rows = max_rows
+        self.max_pending = max_pending
+        self.hub: Broadcaster[LiveBatch] = Broadcaster(maxsize)
+        self.watermark: Optional[Tuple[datetime, int]] = None
+        self.pending: Dict[int, str] = {}
+        self.seen: Dict[int, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> Subscription[LiveBatch]:
+        sub = self.hub.subscribe()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return sub
+
+    def unsubscribe(self, sub: Subscription[LiveBatch]) -> None:
+        self.hub.unsubscribe(sub)
+        if not self.hub and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self.watermark = None
+            self.pending.clear()
+            self.seen.clear()
+
+    async def poll(self) -> int:
+        """Broadcast the pending rows that changed and the rows added since
+        the last poll; return the number of added rows."""
+        if self.watermark is None:
+            self.watermark = (await db_now(name="live.now"), 0)
+        await self._recheck_pending()
+        settle = timedelta(seconds=config.LIVE_SETTLE_SECONDS)
+        after_date, after_id = self.watermark[0] - settle, 0
+        total = 0
+        while True:
+            rows = await fetch_columns(
+                LIVE_QUERY,
+                {
+                    "after_date": after_date,
+                    "after_id": after_id,
+                    "max_rows": self.max_rows,
+                },
+                name="live.poll",
+            )
+            if not len(rows):
+                break
+            dates, ids = rows.column("pri_action_date"), rows.column("pri_id")
+            after_date, after_id = dates[-1], ids[-1]
+            if (after_date, after_id) > self.watermark:
+                self.watermark = (after_date, after_id)
+            fresh = [i for i, pri_id in enumerate(ids) if pri_id not in self.seen]
+            if fresh:
+                if len(fresh) < len(rows):
+                    rows = rows.take(fresh)
+                self.seen.update((ids[i], dates[i]) for i in fresh)
+                self.hub.publish(LiveBatch("rows", rows))
+                self._track(rows)
+                total += len(fresh)
+            if len(ids) < self.max_rows:
+                break
+        horizon = self.watermark[0] - settle
+        for pri_id in [p for p, date in self.seen.items() if date < horizon]:
+            del self.seen[pri_id]
+        return total
+
+    def _track(self, rows: ColumnSet) -> None:
+        for pri_id, status in zip(rows.column("pri_id"), rows.column("pri_status")):
+            if status in config.LIVE_PENDING_STATUSES:
+                self.pending[pri_id] = status
+        while len(self.pending) > self.max_pending:
+            del self.pending[next(iter(self.pending))]
+
+    async def _recheck_pending(self) -> None:
+        if not self.pending:
+            return
+        clause, params = _in_lists("pri_id", "id", list(self.pending))
+        rows = await fetch_columns(PENDING_QUERY + clause, params, name="live.pending")
+        seen = set()
+        changed: List[int] = []
+        previous: List[str] = []
+        for i, (pri_id, status) in enumerate(
+            zip(rows.column("pri_id"), rows.column("pri_status"))
+        ):
+            seen.add(pri_id)
+            old = self.pending.get(pri_id)
+            if old is None or status == old:
+                continue
+            changed.append(i)
+            previous.append(old)
+            if status in config.LIVE_PENDING_STATUSES:
+                self.pending[pri_id] = status
+            else:
+                del self.pending[pri_id]
+        for pri_id in [p for p in self.pending if p not in seen]:
+            del self.pending[pri_id]  # deleted meanwhile
+        if changed:
+            updated = rows.take(changed)
+            self.hub.publish(
+                LiveBatch(
+                    "update",
+                    ColumnSet(
+                        [*updated.names, "previous_status"],
+                        [*updated.columns, tuple(previous)],
+                    ),
+                )
+            )
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception:  # pragma: no cover - keep polling on DB errors
+                logger.exception("live poll failed")
+            await asyncio.sleep(self.interval)
+
+
+feed = LiveFeed()
+
+
+def select(rows: ColumnSet, filters: Dict[str, Any]) -> ColumnSet:
+    """Rows matching every non-empty ``ne_id``/``ne_group``/``ne_service``."""
+    wanted = [
+        (rows.column(FILTER_COLUMNS[key]), value)
+        for key, value in filters.items()
+        if value is not None
+    ]
+    if not wanted:
+        return rows
+    keep = [
+        i for i in range(len(rows)) if all(col[i] == value for col, value in wanted)
+    ]
+    return rows if len(keep) == len(rows) else rows.take(keep)
+
+
+def deltas(rows: ColumnSet) -> List[Dict[str, Any]]:
+    """Counts by status and by error code for each second of ``rows``."""
+    seconds: Dict[datetime, Tuple[Counter, Counter]] = {}
+    for when, status, error_code in zip(
+        rows.column("pri_action_date"),
+        rows.column("pri_status"),
+        rows.column("pri_error_code"),
+    ):
+        by_status, by_error = seconds.setdefault(
+            when.replace(microsecond=0), (Counter(), Counter())
+        )
+        by_status[status] += 1
+        if error_code is not None:
+            by_error[error_code] += 1
+    return [
+        {
+            "second": second.isoformat(),
+            "status": dict(by_status),
+            "error_code": dict(by_error),
+        }
+        for second, (by_status, by_error) in seconds.items()
+    ]
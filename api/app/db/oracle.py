@@ -1,68 +1,367 @@
-from typing import Any, Dict, List, Optional
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
 
 try:
     import oracledb as cx_Oracle  # thin mode
 except Exception:  # pragma: no cover
     import cx_Oracle  # type: ignore
 
-from ..core import config
-
-try:  # pragma: no cover - no client in tests
-    pool: cx_Oracle.SessionPool | None = cx_Oracle.SessionPool(
-        user=config.ORACLE_USER,
-        password=config.ORACLE_PASSWORD,
-        dsn=config.ORACLE_DSN,
-        min=config.ORACLE_POOL_MIN,
-        max=config.ORACLE_POOL_MAX,
-        increment=1,
-        threaded=True,
-        getmode=cx_Oracle.SPOOL_ATTRVAL_WAIT,
+from ..core import config, metrics
+from .columnar import HAS_ARROW, ColumnSet, arrow_schema
+
+# The blocking pool only serves scripts and benchmarks, so it is created on
+# first use instead of opening sessions whenever the app is imported.
+pool: Any = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> Any:
+    global pool
+    with _pool_lock:
+        if pool is None and config.ORACLE_DSN:
+            try:  # pragma: no cover - no client in tests
+                pool = cx_Oracle.SessionPool(
+                    user=config.ORACLE_USER,
+                    password=config.ORACLE_PASSWORD,
+                    dsn=config.ORACLE_DSN,
+                    min=config.ORACLE_POOL_MIN,
+                    max=config.ORACLE_POOL_MAX,
+                    increment=1,
+                    threaded=True,
+                    getmode=cx_Oracle.SPOOL_ATTRVAL_WAIT,
+                )
+            except Exception:  # pragma: no cover
+                pool = None
+    return pool
+
+
+# The async pool is created lazily on first use: it must be bound to the
+# running event loop, which does not exist yet at import time.
+async_pool: Any = None
+
+
+def get_async_pool() -> Any:
+    global async_pool
+    if async_pool is None and config.ORACLE_DSN:
+        try:  # pragma: no cover - no client in tests
+            async_pool = cx_Oracle.create_pool_async(
+                user=config.ORACLE_USER,
+                password=config.ORACLE_PASSWORD,
+                dsn=config.ORACLE_DSN,
+                min=config.ORACLE_POOL_MIN,
+                max=config.ORACLE_POOL_MAX,
+                increment=1,
+                getmode=cx_Oracle.POOL_GETMODE_WAIT,
+            )
+        except Exception:  # pragma: no cover - cx_Oracle has no async API
+            async_pool = None
+    return async_pool
+
+
+async def close_async_pool() -> None:
+    global async_pool
+    if async_pool is not None:  # pragma: no cover
+        await async_pool.close(force=True)
+        async_pool = None
+
+
+def db_time(value: datetime) -> datetime:
+    """``value`` as a naive datetime in the database's time zone.
+
+    DATE columns carry no zone, so aware bounds (e.g. ``...Z`` in a query
+    string) are converted to ``DB_TIMEZONE`` (the API host's zone when
+    unset) before they are compared or bound.
+    """
+    if value.tzinfo is None:
+        return value
+    zone = ZoneInfo(config.DB_TIMEZONE) if config.DB_TIMEZONE else None
+    return value.astimezone(zone).replace(tzinfo=None)
+
+
+def _offset_paginated(
+    query: str, params: Dict[str, Any], limit: Optional[int], offset: Optional[int]
+) -> Tuple[str, Dict[str, Any]]:
+    paginated = f"{query} OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY"
+    return paginated, {**params, "offset": offset or 0, "limit": limit or 0}
+
+
+def _row_number_paginated(
+    query: str, params: Dict[str, Any], limit: Optional[int], offset: Optional[int]
+) -> Tuple[str, Dict[str, Any]]:
+    inner = f"SELECT q.*, ROW_NUMBER() OVER (ORDER BY 1) rn FROM ({query}) q"
+    paginated = (
+        "SELECT * FROM (" + inner + ") WHERE rn > :offset AND rn <= :offset_plus"
     )
-except Exception:  # pragma: no cover
-    pool = None
+    return paginated, {
+        **params,
+        "offset": offset or 0,
+        "offset_plus": (offset or 0) + (limit or 0),
+    }
+
+
+def _tune(cursor: Any, arraysize: Optional[int] = None) -> None:
+    """Size fetch round trips: ``arraysize`` rows per fetch, with the first
+    batch prefetched together with the execute response."""
+    cursor.arraysize = arraysize or config.ORACLE_ARRAYSIZE
+    cursor.prefetchrows = (
+        cursor.arraysize + 1 if arraysize else config.ORACLE_PREFETCHROWS
+    )
+
 
+@asynccontextmanager
+async def _acquire(db_pool: Any) -> AsyncIterator[Any]:
+    started = time.perf_counter()
+    async with db_pool.acquire() as connection:  # pragma: no cover
+        metrics.DB_POOL_ACQUIRE_WAIT.observe(time.perf_counter() - started)
+        yield connection
 
-def _execute(query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
-    if pool is None:
+
+def _observe(name: str, started: float, rows: int) -> None:
+    metrics.DB_QUERY_DURATION.labels(name).observe(time.perf_counter() - started)
+    metrics.DB_QUERY_ROWS.labels(name).observe(rows)
+
+
+def _execute(
+    query: str, params: Dict[str, Any], name: str = "unnamed"
+) -> List[Dict[str, Any]]:
+    db_pool = get_pool()
+    if db_pool is None:
         return []
-    with pool.acquire() as connection:
+    started = time.perf_counter()
+    with db_pool.acquire() as connection:
+        metrics.DB_POOL_ACQUIRE_WAIT.observe(time.perf_counter() - started)
+        started = time.perf_counter()
         with connection.cursor() as cursor:
+            _tune(cursor)
             cursor.execute(query, params)
             columns = [c[0].lower() for c in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    _observe(name, started, len(rows))
+    return rows
+
+
+async def _execute_async(
+    query: str, params: Dict[str, Any], name: str = "unnamed"
+) -> List[Dict[str, Any]]:
+    db_pool = get_async_pool()
+    if db_pool is None:
+        return []
+    async with _acquire(db_pool) as connection:  # pragma: no cover
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            _tune(cursor)
+            await cursor.execute(query, params)
+            columns = [c[0].lower() for c in cursor.description]
+            rows = [dict(zip(columns, row)) for row in await cursor.fetchall()]
+    _observe(name, started, len(rows))
+    return rows
+
 
+# Arrow schema per statement text; bounded by the number of query shapes.
+_schemas: Dict[str, Any] = {}
 
-def fetch_all(
+
+async def _requested_schema(connection: Any, query: str) -> Any:
+    """Arrow schema the driver should fill for ``query``, from its parsed
+    description, so NUMBER columns keep their declared exact types (see
+    :func:`~app.db.columnar.arrow_type`) instead of the driver's float
+    default for NUMBERs without precision."""
+    if query not in _schemas:  # pragma: no cover
+        with connection.cursor() as cursor:
+            await cursor.parse(query)
+            _schemas[query] = arrow_schema(cursor.description)
+    return _schemas[query]
+
+
+async def _execute_columns(
+    query: str,
+    params: Dict[str, Any],
+    arraysize: Optional[int] = None,
+    name: str = "unnamed",
+) -> ColumnSet:
+    db_pool = get_async_pool()
+    if db_pool is None:
+        return ColumnSet([], [])
+    async with _acquire(db_pool) as connection:  # pragma: no cover
+        started = time.perf_counter()
+        if HAS_ARROW:
+            frame = await connection.fetch_df_all(
+                query,
+                params,
+                arraysize or config.ORACLE_ARRAYSIZE,
+                fetch_decimals=True,
+                requested_schema=await _requested_schema(connection, query),
+            )
+            result = ColumnSet.from_arrow(frame)
+        else:
+            with connection.cursor() as cursor:
+                _tune(cursor, arraysize)
+                await cursor.execute(query, params)
+                names = [c[0].lower() for c in cursor.description]
+                result = ColumnSet.from_rows(names, await cursor.fetchall())
+    _observe(name, started, len(result))
+    return result
+
+
+def fetch_all_sync(
     query: str,
     params: Optional[Dict[str, Any]] = None,
     limit: Optional[int] = None,
     offset: Optional[int] = None,
+    name: str = "unnamed",
 ) -> List[Dict[str, Any]]:
+    """Blocking variant of :func:`fetch_all`, kept for scripts and benchmarks."""
     params = params or {}
     if limit is not None or offset is not None:
         try:
-            paginated = f"{query} OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY"
-            params = {**params, "offset": offset or 0, "limit": limit or 0}
-            return _execute(paginated, params)
+            return _execute(*_offset_paginated(query, params, limit, offset), name)
         except Exception:  # pragma: no cover
-            inner = f"SELECT q.*, ROW_NUMBER() OVER (ORDER BY 1) rn FROM ({query}) q"
-            paginated = (
-                "SELECT * FROM ("
-                + inner
-                + ") WHERE rn > :offset AND rn <= :offset_plus"
+            return _execute(*_row_number_paginated(query, params, limit, offset), name)
+    return _execute(query, params, name)
+
+
+def fetch_one_sync(
+    query: str, params: Optional[Dict[str, Any]] = None, name: str = "unnamed"
+) -> Optional[Dict[str, Any]]:
+    rows = fetch_all_sync(query, params or {}, name=name)
+    return rows[0] if rows else None
+
+
+async def fetch_all(
+    query: str,
+    params: Optional[Dict[str, Any]] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    name: str = "unnamed",
+) -> List[Dict[str, Any]]:
+    """Run ``query`` and return one dict per row.
+
+    ``name`` labels the statement in the ``db_query_*`` metrics.
+    """
+    params = params or {}
+    if limit is not None or offset is not None:
+        try:
+            return await _execute_async(
+                *_offset_paginated(query, params, limit, offset), name
             )
-            params = {
-                **params,
-                "offset": offset or 0,
-                "offset_plus": (offset or 0) + (limit or 0),
-            }
-            return _execute(paginated, params)
-    return _execute(query, params)
+        except Exception:  # pragma: no cover
+            return await _execute_async(
+                *_row_number_paginated(query, params, limit, offset), name
+            )
+    return await _execute_async(query, params, name)
 
 
-def fetch_one(
-    query: str, params: Optional[Dict[str, Any]] = None
+async def fetch_one(
+    query: str, params: Optional[Dict[str, Any]] = None, name: str = "unnamed"
 ) -> Optional[Dict[str, Any]]:
     params = params or {}
-    rows = fetch_all(query, params)
+    rows = await fetch_all(query, params, name=name)
     return rows[0] if rows else None
+
+
+async def fetch_columns(
+    query: str,
+    params: Optional[Dict[str, Any]] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    name: str = "unnamed",
+) -> ColumnSet:
+    """Like :func:`fetch_all` but the driver fills one Arrow array per
+    column (``fetch_df_all``) instead of handing out row tuples.
+
+    When ``limit`` is given the fetch is sized so the whole page arrives
+    in the execute round trip.
+    """
+    params = params or {}
+    if limit is not None or offset is not None:
+        arraysize = limit + 1 if limit else None
+        try:
+            return await _execute_columns(
+                *_offset_paginated(query, params, limit, offset), arraysize, name
+            )
+        except Exception:  # pragma: no cover
+            return await _execute_columns(
+                *_row_number_paginated(query, params, limit, offset), arraysize, name
+            )
+    return await _execute_columns(query, params, name=name)
+
+
+async def stream_columns(
+    query: str,
+    params: Optional[Dict[str, Any]] = None,
+    batch_size: int = 5000,
+    name: str = "unnamed",
+) -> AsyncIterator[ColumnSet]:
+    """Yield the result of ``query`` in ``batch_size`` chunks.
+
+    The connection and its server-side cursor stay open while the consumer
+    iterates, so memory is bounded by one batch whatever the row count.
+    Batches are Arrow tables from ``fetch_df_batches`` when pyarrow is
+    installed.
+    """
+    db_pool = get_async_pool()
+    if db_pool is None:
+        return
+    async with _acquire(db_pool) as connection:  # pragma: no cover
+        started, total = time.perf_counter(), 0
+        if HAS_ARROW:
+            async for frame in connection.fetch_df_batches(
+                query,
+                params or {},
+                size=batch_size,
+                fetch_decimals=True,
+                requested_schema=await _requested_schema(connection, query),
+            ):
+                batch = ColumnSet.from_arrow(frame)
+                total += len(batch)
+                yield batch
+        else:
+            with connection.cursor() as cursor:
+                _tune(cursor, batch_size)
+                await cursor.execute(query, params or {})
+                names = [c[0].lower() for c in cursor.description]
+                types = list(cursor.description)
+                while rows := await cursor.fetchmany(batch_size):
+                    total += len(rows)
+                    yield ColumnSet.from_rows(names, rows, types)
+        _observe(name, started, total)
+
+
+async def db_now(name: str = "db_now") -> datetime:
+    """Database clock (``SYSDATE``), falling back to the local clock."""
+    rows = await fetch_columns("SELECT SYSDATE AS now FROM dual", name=name)
+    return rows.column("now")[0] if len(rows) else datetime.now()
+
+
+async def explain_cardinality(query: str) -> Optional[int]:
+    """Return the optimizer's row estimate for ``query`` without running it.
+
+    ``EXPLAIN PLAN`` does not bind values, so the estimate is based on the
+    table/index statistics and default selectivities for the predicates.
+    """
+    db_pool = get_async_pool()
+    if db_pool is None:
+        return None
+    statement_id = uuid.uuid4().hex[:30]
+    async with _acquire(db_pool) as connection:  # pragma: no cover
+        with connection.cursor() as cursor:
+            await cursor.execute(
+                f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {query}"
+            )
+            await cursor.execute(
+                "SELECT cardinality FROM plan_table "
+                "WHERE statement_id = :sid AND id = 0",
+                {"sid": statement_id},
+            )
+            row = await cursor.fetchone()
+            await cursor.execute(
+                "DELETE FROM plan_table WHERE statement_id = :sid",
+                {"sid": statement_id},
+            )
+            await connection.commit()
+            return int(row[0]) if row and row[0] is not None else None
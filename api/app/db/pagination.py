@@ -0,0 +1,65 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, NamedTuple
+
+
+class Cursor(NamedTuple):
+    """Position of a keyset page boundary: ``(sort value, pri_id)``."""
+
+    sort_by: str
+    sort_dir: str
+    value: Any
+    pri_id: int
+    direction: str  # "next" or "prev"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(
+    row: Dict[str, Any], sort_by: str, sort_dir: str, direction: str
+) -> str:
+    payload = {
+        "s": sort_by,
+        "o": sort_dir,
+        "v": _encode_value(row.get(sort_by)),
+        "i": row["pri_id"],
+        "d": direction,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort_by: str, sort_dir: str) -> Cursor:
+    """Decode ``token`` and check it belongs to the requested ordering.
+
+    Raises ``ValueError`` for malformed tokens or tokens issued for a
+    different ``sort_by``/``sort_dir``.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        cursor = Cursor(
+            sort_by=payload["s"],
+            sort_dir=payload["o"],
+            value=_decode_value(payload["v"]),
+            pri_id=int(payload["i"]),
+            direction=payload["d"],
+        )
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("malformed cursor") from exc
+    if (cursor.sort_by, cursor.sort_dir) != (sort_by, sort_dir):
+        raise ValueError("cursor was issued for a different ordering")
+    if cursor.direction not in ("next", "prev"):
+        raise ValueError("malformed cursor")
+    return cursor
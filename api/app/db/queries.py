@@ -1,16 +1,22 @@
+import asyncio
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from .oracle import fetch_all, fetch_one
+from ..core import config
+from . import rollup
+from .columnar import ColumnSet
+from .counting import CountCache, fingerprint
+from .oracle import (
+    db_time,
+    explain_cardinality,
+    fetch_columns,
+    fetch_one,
+    stream_columns,
+)
+from .pagination import Cursor, decode_cursor, encode_cursor
 
 
-def list_interfaces(
-    filters: Dict[str, Any],
-    sort_by: str,
-    sort_dir: str,
-    limit: int,
-    offset: int,
-) -> Dict[str, Any]:
+def _filters_where(filters: Dict[str, Any]) -> Tuple[List[str], Dict[str, Any]]:
     where = ["1=1"]
     params: Dict[str, Any] = {}
     if msisdn := filters.get("msisdn"):
@@ -31,33 +37,413 @@ def list_interfaces(
     if date_to := filters.get("to"):
         where.append("pri_action_date <= :date_to")
         params["date_to"] = date_to
+    return where, params
+
+
+exact_counts = CountCache(config.COUNT_CACHE_TTL)
+estimated_counts = CountCache(config.ESTIMATE_CACHE_TTL)
+listing_versions = CountCache(config.COUNT_CACHE_TTL)
+
+
+async def _count(base: str, params: Dict[str, Any], mode: str) -> Optional[int]:
+    """Resolve the listing total according to ``mode``.
+
+    ``exact`` runs ``COUNT(*)`` and caches it per filter fingerprint,
+    ``estimate`` asks the optimizer for its cardinality estimate and
+    ``none`` skips counting altogether.
+    """
+    if mode == "none":
+        return None
+    if mode == "estimate":
+        key = fingerprint("SELECT *" + base, {})
+        estimate = estimated_counts.get(key)
+        if estimate is None:
+            estimate = await explain_cardinality("SELECT *" + base)
+            if estimate is not None:
+                estimated_counts.set(key, estimate)
+        return estimate
+    query = "SELECT COUNT(*) as cnt" + base
+    key = fingerprint(query, params)
+    total = exact_counts.get(key)
+    if total is None:
+        total = (
+            (await fetch_one(query, params, name="list_interfaces.count")) or {"cnt": 0}
+        )["cnt"]
+        exact_counts.set(key, total)
+    return total
+
+
+def _seek(sort_by: str, descending: bool, cursor: Cursor) -> Tuple[str, Dict[str, Any]]:
+    """Predicate for the rows after ``cursor`` in the direction of travel.
+
+    ``sort_by`` may be nullable. Listings order NULLs as the largest value
+    (Oracle's default, spelled out in :func:`_order_by`), so they come last
+    when ascending and first when descending; a cursor sitting on a NULL
+    seeks on ``pri_id`` within the NULLs.
+    """
+    binds: Dict[str, Any] = {"cursor_id": cursor.pri_id}
+    op = "<" if descending else ">"
+    if cursor.value is None:
+        tail = f"{sort_by} IS NULL AND pri_id {op} :cursor_id"
+        if descending:  # the non-NULL values all follow the NULLs
+            return f"({sort_by} IS NOT NULL OR ({tail}))", binds
+        return f"({tail})", binds
+    binds["cursor_value"] = cursor.value
+    seek = (
+        f"{sort_by} {op} :cursor_value "
+        f"OR ({sort_by} = :cursor_value AND pri_id {op} :cursor_id)"
+    )
+    if not descending:
+        seek += f" OR {sort_by} IS NULL"
+    return f"({seek})", binds
+
+
+def _order_by(sort_by: str, descending: bool) -> str:
+    if descending:
+        return f" ORDER BY {sort_by} DESC NULLS FIRST, pri_id DESC"
+    return f" ORDER BY {sort_by} ASC NULLS LAST, pri_id ASC"
+
+
+async def _keyset_page(
+    where: List[str],
+    params: Dict[str, Any],
+    sort_by: str,
+    sort_dir: str,
+    limit: int,
+    cursor: Cursor,
+) -> Tuple[ColumnSet, bool]:
+    """Fetch the page after (or before) ``cursor`` by seeking on the index.
+
+    Returns the rows in the requested ``sort_dir`` order and whether more
+    rows exist beyond them in the direction of travel.
+    """
+    backwards = cursor.direction == "prev"
+    descending = (sort_dir == "desc") != backwards
+    seek, binds = _seek(sort_by, descending, cursor)
+    query = (
+        "SELECT * FROM (SELECT * FROM provisioning_interface WHERE "
+        + " AND ".join([*where, seek])
+        + _order_by(sort_by, descending)
+        + ") WHERE ROWNUM <= :limit_plus"
+    )
+    rows = await fetch_columns(
+        query,
+        {**params, **binds, "limit_plus": limit + 1},
+        name="list_interfaces.keyset",
+    )
+    has_more = len(rows) > limit
+    rows = rows.slice(0, limit)
+    if backwards:
+        rows = rows.reversed()
+    return rows, has_more
+
+
+async def list_interfaces(
+    filters: Dict[str, Any],
+    sort_by: str,
+    sort_dir: str,
+    limit: int,
+    offset: int,
+    cursor: Optional[str] = None,
+    count: str = "exact",
+) -> Dict[str, Any]:
+    where, params = _filters_where(filters)
+    base = " FROM provisioning_interface WHERE " + " AND ".join(where)
+
+    position = decode_cursor(cursor, sort_by, sort_dir) if cursor else None
+    if position is None:
+        page = fetch_columns(
+            f"SELECT *{base}" + _order_by(sort_by, sort_dir == "desc"),
+            params,
+            limit=limit,
+            offset=offset,
+            name="list_interfaces.page",
+        )
+    else:
+        page = _keyset_page(where, params, sort_by, sort_dir, limit, position)
+
+    # The count and the page use separate pool connections, so run them
+    # concurrently instead of paying both round trips back to back.
+    total, fetched = await asyncio.gather(_count(base, params, count), page)
+
+    if position is None:
+        rows = fetched
+        has_next = len(rows) == limit
+        has_prev = offset > 0
+    else:
+        rows, has_more = fetched
+        backwards = position.direction == "prev"
+        has_next = has_more if not backwards else True
+        has_prev = has_more if backwards else True
 
+    next_cursor = prev_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor(rows.row(-1), sort_by, sort_dir, "next")
+    if rows and has_prev:
+        prev_cursor = encode_cursor(rows.row(0), sort_by, sort_dir, "prev")
+    return {
+        "total_count": total,
+        "rows": rows,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
+
+
+async def interfaces_version(filters: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Validator for a listing: newest ``ORA_ROWSCN`` and row count of the
+    rows matching ``filters``.
+
+    ``ORA_ROWSCN`` moves on updates as well as inserts (a status change
+    leaves dates and counts as they were) and the count catches deletes.
+    Validators are cached per filter fingerprint for ``COUNT_CACHE_TTL``,
+    the staleness the exact count cache already accepts; a miss costs one
+    query, whose count also refreshes the exact count cache.
+    """
+    where, params = _filters_where(filters)
     base = " FROM provisioning_interface WHERE " + " AND ".join(where)
-    total = fetch_one("SELECT COUNT(*) as cnt" + base, params) or {"cnt": 0}
-    rows = fetch_all(
-        f"SELECT *{base} ORDER BY {sort_by} {sort_dir}",
-        params,
-        limit=limit,
-        offset=offset,
+    key = fingerprint("SELECT MAX(ORA_ROWSCN)" + base, params)
+    version = listing_versions.get(key)
+    if version is None:
+        row = await fetch_one(
+            "SELECT MAX(ORA_ROWSCN) as scn, COUNT(*) as cnt" + base,
+            params,
+            name="list_interfaces.version",
+        )
+        row = row or {"cnt": 0}
+        version = (row.get("scn"), row["cnt"])
+        listing_versions.set(key, version)
+        exact_counts.set(
+            fingerprint("SELECT COUNT(*) as cnt" + base, params), row["cnt"]
+        )
+    return version
+
+
+def export_interfaces(
+    filters: Dict[str, Any], sort_by: str, sort_dir: str, batch_size: int
+) -> AsyncIterator[ColumnSet]:
+    where, params = _filters_where(filters)
+    query = (
+        "SELECT * FROM provisioning_interface WHERE "
+        + " AND ".join(where)
+        + f" ORDER BY {sort_by} {sort_dir}, pri_id {sort_dir}"
     )
-    return {"total_count": total["cnt"], "rows": rows}
+    return stream_columns(query, params, batch_size, name="export_interfaces")
+
+
+IN_LIST_LIMIT = 1000  # Oracle rejects longer IN lists (ORA-01795)
+
+
+def _in_lists(
+    column: str, prefix: str, values: List[Any]
+) -> Tuple[str, Dict[str, Any]]:
+    """``(column IN (...) OR column IN (...))`` with one bind per value.
 
+    The values are padded to the next power of two (at least 8) by
+    repeating the last one, so a handful of statement texts cover every
+    list length, and split into IN lists of at most ``IN_LIST_LIMIT``.
+    """
+    values = list(dict.fromkeys(values))
+    size = max(8, 1 << (len(values) - 1).bit_length())
+    padded = values + [values[-1]] * (size - len(values))
+    params = {f"{prefix}_{i}": value for i, value in enumerate(padded)}
+    names = [":" + name for name in params]
+    lists = [
+        f"{column} IN ({', '.join(names[i : i + IN_LIST_LIMIT])})"
+        for i in range(0, size, IN_LIST_LIMIT)
+    ]
+    return "(" + " OR ".join(lists) + ")", params
 
-def get_interface(pri_id: int) -> Optional[Dict[str, Any]]:
-    return fetch_one(
-        "SELECT * FROM provisioning_interface WHERE pri_id = :pri_id",
+
+def lookup_interfaces(
+    pri_ids: List[int], msisdns: List[str], batch_size: int
+) -> AsyncIterator[ColumnSet]:
+    """Every row whose ``pri_id`` or MSISDN is listed, in a single query."""
+    where: List[str] = []
+    params: Dict[str, Any] = {}
+    if pri_ids:
+        clause, binds = _in_lists("pri_id", "id", pri_ids)
+        where.append(clause)
+        params.update(binds)
+    if msisdns:
+        clause, binds = _in_lists("pri_cellular_number", "msisdn", msisdns)
+        where.append(clause)
+        params.update(binds)
+    query = (
+        "SELECT * FROM provisioning_interface WHERE "
+        + " OR ".join(where)
+        + " ORDER BY pri_id"
+    )
+    return stream_columns(query, params, batch_size, name="lookup_interfaces")
+
+
+async def get_interface(pri_id: int) -> Tuple[Optional[Dict[str, Any]], Any]:
+    """The row and its ``ORA_ROWSCN`` (changes whenever the row is updated),
+    read in one statement; ``(None, None)`` when there is no such row."""
+    row = await fetch_one(
+        "SELECT ORA_ROWSCN as ora_scn, t.* FROM provisioning_interface t "
+        "WHERE t.pri_id = :pri_id",
         {"pri_id": pri_id},
+        name="get_interface",
     )
+    if row is None:
+        return None, None
+    return row, row.pop("ora_scn")
 
 
-def stats(
-    group_by: str, date_from: datetime, date_to: datetime
-) -> List[Dict[str, Any]]:
+async def _stats_from_db(
+    group_by: str, date_from: datetime, date_to: datetime, inclusive: bool = True
+) -> ColumnSet:
+    upper = "<=" if inclusive else "<"
     query = (
         f"SELECT pri_{group_by} as group_key, COUNT(*) as total "
         "FROM provisioning_interface "
-        "WHERE pri_action_date BETWEEN :date_from AND :date_to "
+        f"WHERE pri_action_date >= :date_from AND pri_action_date {upper} :date_to "
         f"GROUP BY pri_{group_by}"
     )
     params = {"date_from": date_from, "date_to": date_to}
-    return fetch_all(query, params)
+    return await fetch_columns(query, params, name="stats")
+
+
+async def stats(group_by: str, date_from: datetime, date_to: datetime) -> ColumnSet:
+    """Counts per ``pri_{group_by}`` in ``[date_from, date_to]``.
+
+    Whole minutes covered by the in-memory rollup are answered from it;
+    only the uncovered edges of the range are counted in Oracle.
+    """
+    date_from, date_to = db_time(date_from), db_time(date_to)
+    plan = rollup.cube.plan(date_from, date_to)
+    if plan is None:
+        return await _stats_from_db(group_by, date_from, date_to)
+    totals = rollup.cube.totals(group_by, plan.lo, plan.hi)
+    gaps = await asyncio.gather(
+        *(
+            _stats_from_db(group_by, lo, hi, inclusive)
+            for lo, hi, inclusive in plan.gaps
+        )
+    )
+    for gap in gaps:
+        for group_key, total in gap.rows():
+            totals[group_key] += int(total)
+    return ColumnSet(["group_key", "total"], [tuple(totals), tuple(totals.values())])
+
+
+async def stats_version(
+    group_by: str, date_from: datetime, date_to: datetime
+) -> Tuple[Any, ...]:
+    """Validator for :func:`stats`.
+
+    The covered span contributes its bounds and the cube revision that
+    last changed one of its minutes; the ranges left to Oracle contribute
+    their newest ``ORA_ROWSCN`` (which moves when a row is updated) and
+    row count.
+    """
+    date_from, date_to = db_time(date_from), db_time(date_to)
+    plan = rollup.cube.plan(date_from, date_to)
+    ranges = [(date_from, date_to, True)] if plan is None else plan.gaps
+    versions = await asyncio.gather(
+        *(
+            fetch_one(
+                "SELECT MAX(ORA_ROWSCN) as scn, COUNT(*) as cnt "
+                "FROM provisioning_interface WHERE pri_action_date >= :date_from "
+                f"AND pri_action_date {'<=' if inclusive else '<'} :date_to",
+                {"date_from": lo, "date_to": hi},
+                name="stats.version",
+            )
+            for lo, hi, inclusive in ranges
+        )
+    )
+    covered = (
+        (plan.lo, plan.hi, rollup.cube.changed(plan.lo, plan.hi)) if plan else None
+    )
+    return (group_by, covered, *(tuple((v or {}).values()) for v in versions))
+
+
+BUCKET_FORMATS = {"minute": "MI", "hour": "HH24", "day": "DD"}
+DIMENSION_COLUMNS = {
+    "status": "pri_status",
+    "error_code": "pri_error_code",
+    "ne_service": "pri_ne_service",
+}
+
+
+def _series_query(bucket: str, group_by: List[str], top_n: Optional[int]) -> str:
+    trunc = f"TRUNC(pri_action_date, '{BUCKET_FORMATS[bucket]}')"
+    dims = [DIMENSION_COLUMNS[g] for g in group_by]
+    base = (
+        f"SELECT {trunc} AS bucket"
+        + "".join(f", {col} AS {g}" for g, col in zip(group_by, dims))
+        + ", COUNT(*) AS total FROM provisioning_interface "
+        "WHERE pri_action_date >= :date_from AND pri_action_date <= :date_to "
+        f"GROUP BY {', '.join([trunc, *dims])}"
+    )
+    if not group_by:
+        return base + " ORDER BY bucket"
+    keys = ", ".join(group_by)
+    ctes = [f"base AS ({base})"]
+    if top_n is None:
+        ctes.append(
+            f"labelled AS (SELECT bucket, 0 AS is_other, {keys}, total FROM base)"
+        )
+    else:
+        # Rank the groups over the whole range; the rest become one
+        # "other" group per bucket. DECODE matches NULL keys too.
+        ctes.append(
+            f"ranked AS (SELECT {keys}, "
+            "ROW_NUMBER() OVER (ORDER BY SUM(total) DESC) AS rnk "
+            f"FROM base GROUP BY {keys})"
+        )
+        ctes.append(
+            "labelled AS (SELECT b.bucket, "
+            "CASE WHEN r.rnk <= :top_n THEN 0 ELSE 1 END AS is_other"
+            + "".join(
+                f", CASE WHEN r.rnk <= :top_n THEN b.{g} END AS {g}" for g in group_by
+            )
+            + ", b.total FROM base b JOIN ranked r ON "
+            + " AND ".join(f"DECODE(b.{g}, r.{g}, 1, 0) = 1" for g in group_by)
+            + ")"
+        )
+    # ROLLUP adds one subtotal row per bucket (is_total = 1).
+    return (
+        "WITH " + ", ".join(ctes) + f" SELECT bucket, is_other, {keys}, "
+        "SUM(total) AS total, GROUPING(is_other) AS is_total FROM labelled "
+        f"GROUP BY bucket, ROLLUP((is_other, {keys})) "
+        "ORDER BY bucket, is_total DESC, total DESC"
+    )
+
+
+async def stats_series(
+    bucket: str,
+    group_by: List[str],
+    date_from: datetime,
+    date_to: datetime,
+    top_n: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Counts per time ``bucket`` and ``group_by`` combination, aggregated
+    in Oracle; with ``top_n`` only the largest groups over the range are
+    kept and the rest are summed into an ``other`` group."""
+    params: Dict[str, Any] = {
+        "date_from": db_time(date_from),
+        "date_to": db_time(date_to),
+    }
+    if group_by and top_n is not None:
+        params["top_n"] = top_n
+    rows = await fetch_columns(
+        _series_query(bucket, group_by, top_n), params, name="stats_series"
+    )
+    points: List[Dict[str, Any]] = []
+    for record in (dict(zip(rows.names, values)) for values in rows.rows()):
+        if not points or points[-1]["bucket"] != record["bucket"]:
+            points.append({"bucket": record["bucket"], "total": 0, "groups": []})
+        point = points[-1]
+        if not group_by or record["is_total"]:
+            point["total"] = int(record["total"])
+            continue
+        other = bool(record["is_other"])
+        point["groups"].append(
+            {
+                "key": {g: None if other else record[g] for g in group_by},
+                "other": other,
+                "total": int(record["total"]),
+            }
+        )
+    return points
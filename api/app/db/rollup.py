@@ -0,0 +1,188 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from ..core import config
+from .columnar import ColumnSet
+from .oracle import db_now, db_time, fetch_columns
+
+logger = logging.getLogger(__name__)
+
+MINUTE = timedelta(minutes=1)
+DIMENSIONS = ("status", "error_code", "ne_service")
+
+ROLLUP_QUERY = (
+    "SELECT TRUNC(pri_action_date, 'MI') AS minute, pri_status AS status, "
+    "pri_error_code AS error_code, pri_ne_service AS ne_service, "
+    "COUNT(*) AS total "
+    "FROM provisioning_interface "
+    "WHERE pri_action_date >= :lo AND pri_action_date < :hi "
+    "GROUP BY TRUNC(pri_action_date, 'MI'), pri_status, pri_error_code, "
+    "pri_ne_service"
+)
+
+Key = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def floor_minute(value: datetime) -> datetime:
+    return value.replace(second=0, microsecond=0)
+
+
+def ceil_minute(value: datetime) -> datetime:
+    floored = floor_minute(value)
+    return floored if floored == value else floored + MINUTE
+
+
+class StatsPlan(NamedTuple):
+    """How to answer a ``stats`` range: whole minutes ``[lo, hi)`` from the
+    cube plus the ``gaps`` that must still be counted in Oracle, given as
+    ``(date_from, date_to, inclusive_end)``."""
+
+    lo: datetime
+    hi: datetime
+    gaps: List[Tuple[datetime, datetime, bool]]
+
+
+class RollupCube:
+    """Per-minute counts by status × error_code × ne_service.
+
+    Covers the half-open interval ``[start, watermark)``. Minutes are only
+    added once they are older than the settle delay, and the last
+    ``ROLLUP_RECHECK_MINUTES`` are re-aggregated on every refresh so rows
+    that leave a pending status afterwards are still picked up; older
+    minutes are re-aggregated for as long as they count pending rows (see
+    :meth:`pending`). Each minute records the ``revision`` at which its
+    counts last changed.
+    """
+
+    def __init__(self) -> None:
+        self.buckets: Dict[datetime, Counter] = {}
+        self.revisions: Dict[datetime, int] = {}
+        self.revision = 0
+        self.start: Optional[datetime] = None
+        self.watermark: Optional[datetime] = None
+
+    def advance(self, rows: ColumnSet, lo: datetime, hi: datetime) -> None:
+        """Replace the minutes ``[lo, hi)`` with the aggregated slice ``rows``."""
+        fresh: Dict[datetime, Counter] = {}
+        for minute, status, error_code, ne_service, total in rows.rows():
+            key: Key = (status, error_code, ne_service)
+            fresh.setdefault(minute, Counter())[key] += int(total)
+        self.revision += 1
+        for minute in set(fresh) | {m for m in self.buckets if lo <= m < hi}:
+            counts = fresh.get(minute)
+            if counts == self.buckets.get(minute):
+                continue
+            if counts:
+                self.buckets[minute] = counts
+            else:
+                del self.buckets[minute]
+            self.revisions[minute] = self.revision
+        if self.start is None or lo < self.start:
+            self.start = lo
+        if self.watermark is None or hi > self.watermark:
+            self.watermark = hi
+
+    def evict(self, before: datetime) -> None:
+        for minute in [m for m in self.buckets if m < before]:
+            del self.buckets[minute]
+        for minute in [m for m in self.revisions if m < before]:
+            del self.revisions[minute]
+        if self.start is not None and self.start < before:
+            self.start = before
+
+    def plan(self, date_from: datetime, date_to: datetime) -> Optional[StatsPlan]:
+        """Split ``[date_from, date_to]`` into cube minutes and Oracle gaps.
+
+        Returns ``None`` when the cube covers no whole minute of the range.
+        Aware bounds are converted to database time first.
+        """
+        if self.start is None or self.watermark is None:
+            return None
+        date_from, date_to = db_time(date_from), db_time(date_to)
+        lo = max(ceil_minute(date_from), self.start)
+        hi = min(floor_minute(date_to), self.watermark)
+        if lo >= hi:
+            return None
+        gaps: List[Tuple[datetime, datetime, bool]] = []
+        if date_from < lo:
+            gaps.append((date_from, lo, False))
+        if hi <= date_to:
+            gaps.append((hi, date_to, True))
+        return StatsPlan(lo, hi, gaps)
+
+    def totals(self, group_by: str, lo: datetime, hi: datetime) -> Counter:
+        index = DIMENSIONS.index(group_by)
+        result: Counter = Counter()
+        minute = lo
+        while minute < hi:
+            for key, total in self.buckets.get(minute, {}).items():
+                result[key[index]] += total
+            minute += MINUTE
+        return result
+
+    def pending(self, before: datetime) -> List[Tuple[datetime, datetime]]:
+        """Runs ``[lo, hi)`` of minutes before ``before`` whose counts still
+        include a status in ``LIVE_PENDING_STATUSES``."""
+        runs: List[Tuple[datetime, datetime]] = []
+        for minute in sorted(self.buckets):
+            if minute >= before:
+                break
+            if not any(
+                key[0] in config.LIVE_PENDING_STATUSES for key in self.buckets[minute]
+            ):
+                continue
+            if runs and runs[-1][1] == minute:
+                runs[-1] = (runs[-1][0], minute + MINUTE)
+            else:
+                runs.append((minute, minute + MINUTE))
+        return runs
+
+    def changed(self, lo: datetime, hi: datetime) -> int:
+        """Latest revision that changed a minute in ``[lo, hi)`` (0 if none)."""
+        return max((r for m, r in self.revisions.items() if lo <= m < hi), default=0)
+
+    def clear(self) -> None:
+        self.buckets.clear()
+        self.revisions.clear()
+        self.start = self.watermark = None
+
+
+cube = RollupCube()
+
+
+async def refresh(now: datetime) -> None:
+    """Advance the cube up to ``now - ROLLUP_SETTLE_SECONDS``, re-aggregate
+    the trailing ``ROLLUP_RECHECK_MINUTES`` it already holds, and every
+    older minute that still counts pending rows."""
+    hi = floor_minute(now - timedelta(seconds=config.ROLLUP_SETTLE_SECONDS))
+    oldest = floor_minute(now - timedelta(hours=config.ROLLUP_RETENTION_HOURS))
+    if cube.watermark is not None and cube.watermark < oldest:
+        cube.clear()  # poller fell behind the retention window: rebuild
+    lo = cube.watermark if cube.watermark else oldest
+    if cube.start is not None:
+        recheck = hi - timedelta(minutes=config.ROLLUP_RECHECK_MINUTES)
+        lo = min(lo, max(recheck, cube.start))
+    if lo < hi:
+        rows = await fetch_columns(
+            ROLLUP_QUERY, {"lo": lo, "hi": hi}, name="rollup.refresh"
+        )
+        cube.advance(rows, lo, hi)
+    for run_lo, run_hi in cube.pending(min(lo, hi)):
+        rows = await fetch_columns(
+            ROLLUP_QUERY, {"lo": run_lo, "hi": run_hi}, name="rollup.pending"
+        )
+        cube.advance(rows, run_lo, run_hi)
+    cube.evict(oldest)
+
+
+async def run_poller() -> None:
+    """Keep the cube current until cancelled."""
+    while True:
+        try:
+            await refresh(await db_now(name="rollup.now"))
+        except Exception:  # pragma: no cover - keep polling on DB errors
+            logger.exception("rollup refresh failed")
+        await asyncio.sleep(config.ROLLUP_POLL_SECONDS)
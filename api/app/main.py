@@ -1,10 +1,28 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from .core import config
-from .routers import auth, provisioning, stream
+from .core import config, metrics
+from .core.compression import CompressionMiddleware
+from .db import oracle, rollup
+from .routers import auth, live, provisioning, stream
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    poller = None
+    if config.ROLLUP_ENABLED and oracle.get_async_pool() is not None:
+        poller = asyncio.create_task(rollup.run_poller())
+    yield
+    if poller is not None:
+        poller.cancel()
+    await oracle.close_async_pool()
 
-app = FastAPI(title="Provisioning API")
+
+app = FastAPI(title="Provisioning API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -12,9 +30,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
-
-metrics_counter = {"requests": 0}
+app.add_middleware(CompressionMiddleware, minimum_size=config.COMPRESS_MIN_BYTES)
 
 
 @app.get("/healthz")
@@ -23,16 +41,29 @@ def healthz():
 
 
 @app.get("/metrics")
-def metrics():
-    return metrics_counter
+def metrics_endpoint() -> Response:
+    metrics.observe_pool(oracle.async_pool)
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
 
 
 @app.middleware("http")
-async def add_metrics(request, call_next):
-    metrics_counter["requests"] += 1
-    return await call_next(request)
+async def add_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Label by route template (not raw path) to keep cardinality bounded.
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        metrics.HTTP_REQUEST_DURATION.labels(request.method, route).observe(
+            time.perf_counter() - started
+        )
+        metrics.HTTP_RESPONSES.labels(request.method, route, str(status_code)).inc()
 
 
 app.include_router(auth.router)
 app.include_router(provisioning.router)
+app.include_router(live.router)
 app.include_router(stream.router)
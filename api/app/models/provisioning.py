@@ -1,10 +1,27 @@
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from ..core import config
+
+# Columns listings and exports may be ordered by.
+SortColumn = Literal[
+    "pri_id",
+    "pri_cellular_number",
+    "pri_status",
+    "pri_action_date",
+    "pri_error_code",
+    "pri_message_error",
+    "pri_ne_service",
+    "pri_ne_id",
+    "pri_ne_group",
+]
 
 
 class InterfaceRow(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     pri_id: int
     pri_cellular_number: str
     pri_status: str
@@ -15,10 +32,44 @@ class InterfaceRow(BaseModel):
 
 
 class InterfacesResponse(BaseModel):
-    total_count: int
+    total_count: int | None = None
+    count_mode: Literal["none", "estimate", "exact"] = "exact"
     rows: List[InterfaceRow]
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
 
 
 class StatsItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     group_key: str | None = None
     total: int
+
+
+class SeriesGroup(BaseModel):
+    key: Dict[str, str | None]
+    other: bool = False
+    total: int
+
+
+class SeriesPoint(BaseModel):
+    bucket: datetime
+    total: int
+    groups: List[SeriesGroup] = []
+
+
+class StatsSeriesResponse(BaseModel):
+    bucket: Literal["minute", "hour", "day"]
+    group_by: List[str]
+    series: List[SeriesPoint]
+
+
+class LookupRequest(BaseModel):
+    pri_ids: List[int] = Field(default_factory=list, max_length=config.LOOKUP_MAX_IDS)
+    msisdns: List[str] = Field(default_factory=list, max_length=config.LOOKUP_MAX_IDS)
+
+    @model_validator(mode="after")
+    def _not_empty(self) -> "LookupRequest":
+        if not self.pri_ids and not self.msisdns:
+            raise ValueError("pri_ids or msisdns is required")
+        return self
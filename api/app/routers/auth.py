@@ -1,8 +1,7 @@
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
 
-from ..core.security import (create_access_token, get_password_hash,
-                             verify_password)
+from ..core.security import create_access_token, get_password_hash, verify_password
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -0,0 +1,79 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from ..core import config
+from ..core.deps import get_current_user
+from ..db import live
+from ..models.provisioning import InterfaceRow
+
+router = APIRouter(prefix="/live", tags=["live"])
+
+UPDATE_FIELDS = ("pri_id", "pri_status", "previous_status", "pri_error_code")
+
+
+def _event(name: str, data: Any) -> str:
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _events(filters: Dict[str, Any], include_rows: bool) -> AsyncIterator[str]:
+    sub = live.feed.subscribe()
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                batch = await asyncio.wait_for(sub.get(), config.LIVE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if batch is None:
+                # The client fell LIVE_QUEUE batches behind: tell it and end
+                # the stream rather than buffering without bound.
+                yield _event("overflow", {"detail": "client too slow"})
+                return
+            matched = live.select(batch.rows, filters)
+            if not len(matched):
+                continue
+            if batch.kind == "update":
+                yield _event(
+                    "update",
+                    [
+                        {name: row[name] for name in UPDATE_FIELDS}
+                        for row in map(matched.row, range(len(matched)))
+                    ],
+                )
+                continue
+            if include_rows:
+                yield _event(
+                    "rows",
+                    [
+                        InterfaceRow.model_validate(r).model_dump(mode="json")
+                        for r in matched.records()
+                    ],
+                )
+            yield _event("delta", live.deltas(matched))
+    finally:
+        live.feed.unsubscribe(sub)
+
+
+@router.get("/interfaces")
+async def live_interfaces(
+    ne_id: str | None = None,
+    ne_group: str | None = None,
+    ne_service: str | None = None,
+    rows: bool = True,
+    user: str = Depends(get_current_user),
+) -> StreamingResponse:
+    """Server-sent events: ``rows`` with the new provisioning rows,
+    ``delta`` with their counts by status and error code per second and
+    ``update`` with ``pri_id``, ``pri_status``, ``previous_status`` and
+    ``pri_error_code`` of rows that left a pending status."""
+    filters = {"ne_id": ne_id, "ne_group": ne_group, "ne_service": ne_service}
+    return StreamingResponse(
+        _events(filters, rows),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,30 +1,37 @@
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi import status as http_status
+from fastapi.responses import StreamingResponse
 
+from ..core import config, etag, export, fastjson
 from ..core.deps import get_current_user
 from ..db import queries
-from ..models.provisioning import InterfaceRow, InterfacesResponse, StatsItem
+from ..db.oracle import db_time
+from ..models.provisioning import (
+    InterfaceRow,
+    InterfacesResponse,
+    LookupRequest,
+    SortColumn,
+    StatsItem,
+    StatsSeriesResponse,
+)
 
 router = APIRouter(prefix="/provisioning", tags=["provisioning"])
 
+INTERFACE_FIELDS = tuple(InterfaceRow.model_fields)
 
-@router.get("/interfaces", response_model=InterfacesResponse)
-def list_interfaces(
-    page: int = 1,
-    page_size: int = 50,
-    sort_by: str = "pri_action_date",
-    sort_dir: str = "desc",
+
+def interface_filters(
     msisdn: str | None = None,
     status: str | None = None,
     error_code: str | None = None,
     ne_service: str | None = None,
     date_from: Optional[datetime] = Query(None, alias="from"),
     date_to: Optional[datetime] = Query(None, alias="to"),
-    user: str = Depends(get_current_user),
-) -> InterfacesResponse:
-    filters = {
+) -> Dict[str, Any]:
+    return {
         "msisdn": msisdn,
         "status": status,
         "error_code": error_code,
@@ -32,24 +39,187 @@ def list_interfaces(
         "from": date_from,
         "to": date_to,
     }
+
+
+@router.get("/interfaces", response_model=InterfacesResponse)
+async def list_interfaces(
+    request: Request,
+    response: Response,
+    page: int = 1,
+    page_size: int = 50,
+    sort_by: SortColumn = "pri_action_date",
+    sort_dir: str = Query("desc", pattern="^(asc|desc)$"),
+    cursor: str | None = None,
+    count: str = Query("exact", pattern="^(none|estimate|exact)$"),
+    filters: Dict[str, Any] = Depends(interface_filters),
+    user: str = Depends(get_current_user),
+    fast: bool = False,
+    if_none_match: str | None = Header(None),
+):
+    """List interfaces.
+
+    ``fast=true`` skips per-row Pydantic validation and encodes the page
+    straight from the fetched columns; the JSON schema is the same.
+
+    Responses carry a weak ETag built from
+    :func:`~app.db.queries.interfaces_version`, which is cached like the
+    exact counts; a cache miss runs one validator query, and that query's
+    count serves the listing's ``total_count``.
+    """
+    version = await queries.interfaces_version(filters)
+    tag = etag.make_etag(sorted(request.query_params.multi_items()), version)
+    if etag.matches(if_none_match, tag):
+        return etag.not_modified(tag)
+    etag.attach(response, tag)
     offset = (page - 1) * page_size
-    result = queries.list_interfaces(filters, sort_by, sort_dir, page_size, offset)
-    rows = [InterfaceRow(**row) for row in result["rows"]]
-    return InterfacesResponse(total_count=result["total_count"], rows=rows)
+    try:
+        result = await queries.list_interfaces(
+            filters, sort_by, sort_dir, page_size, offset, cursor=cursor, count=count
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    if fast:
+        body = fastjson.dumps(
+            {
+                "total_count": result["total_count"],
+                "count_mode": count,
+                "rows": fastjson.project(result["rows"], INTERFACE_FIELDS),
+                "next_cursor": result["next_cursor"],
+                "prev_cursor": result["prev_cursor"],
+            }
+        )
+        fast_response = Response(body, media_type="application/json")
+        etag.attach(fast_response, tag)
+        return fast_response
+    rows = [InterfaceRow.model_validate(r) for r in result["rows"].records()]
+    return InterfacesResponse(
+        total_count=result["total_count"],
+        count_mode=count,
+        rows=rows,
+        next_cursor=result["next_cursor"],
+        prev_cursor=result["prev_cursor"],
+    )
 
 
-@router.get("/interfaces/{pri_id}", response_model=InterfaceRow | None)
-def get_interface(pri_id: int, user: str = Depends(get_current_user)):
-    row = queries.get_interface(pri_id)
-    return InterfaceRow(**row) if row else None
+@router.get("/interfaces/export")
+async def export_interfaces(
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet)$"),
+    sort_by: SortColumn = "pri_action_date",
+    sort_dir: str = Query("desc", pattern="^(asc|desc)$"),
+    batch_size: int = Query(5000, ge=100, le=50000),
+    filters: Dict[str, Any] = Depends(interface_filters),
+    user: str = Depends(get_current_user),
+) -> StreamingResponse:
+    if format == "parquet" and not export.HAS_PARQUET:
+        raise HTTPException(
+            status_code=http_status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export requires pyarrow",
+        )
+    batches = queries.export_interfaces(filters, sort_by, sort_dir, batch_size)
+    return StreamingResponse(
+        export.ENCODERS[format](export.limited(batches)),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="interfaces.{format}"'},
+    )
+
+
+@router.post("/interfaces/lookup")
+async def lookup_interfaces(
+    body: LookupRequest,
+    format: str = Query("ndjson", pattern="^(csv|ndjson|parquet)$"),
+    batch_size: int = Query(1000, ge=100, le=50000),
+    user: str = Depends(get_current_user),
+) -> StreamingResponse:
+    """Resolve up to ``LOOKUP_MAX_IDS`` pri_ids and MSISDNs in one query,
+    streaming the matching rows as they are fetched."""
+    if format == "parquet" and not export.HAS_PARQUET:
+        raise HTTPException(
+            status_code=http_status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export requires pyarrow",
+        )
+    batches = queries.lookup_interfaces(body.pri_ids, body.msisdns, batch_size)
+    return StreamingResponse(
+        export.ENCODERS[format](export.limited(batches)),
+        media_type=export.MEDIA_TYPES[format],
+    )
 
 
 @router.get("/interfaces/stats", response_model=list[StatsItem])
-def get_stats(
+async def get_stats(
+    response: Response,
     group_by: str = Query("status", pattern="^(status|error_code|ne_service)$"),
     date_from: datetime = Query(..., alias="from"),
     date_to: datetime = Query(..., alias="to"),
     user: str = Depends(get_current_user),
-) -> list[StatsItem]:
-    rows = queries.stats(group_by, date_from, date_to)
-    return [StatsItem(**row) for row in rows]
+    if_none_match: str | None = Header(None),
+):
+    version = await queries.stats_version(group_by, date_from, date_to)
+    tag = etag.make_etag(date_from, date_to, version)
+    if etag.matches(if_none_match, tag):
+        return etag.not_modified(tag)
+    etag.attach(response, tag)
+    rows = await queries.stats(group_by, date_from, date_to)
+    return [StatsItem.model_validate(r) for r in rows.records()]
+
+
+BUCKET_SIZES = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+
+@router.get("/interfaces/stats/series", response_model=StatsSeriesResponse)
+async def get_stats_series(
+    response: Response,
+    bucket: str = Query("hour", pattern="^(minute|hour|day)$"),
+    group_by: List[str] = Query([]),
+    top_n: int | None = Query(None, ge=1, le=100),
+    date_from: datetime = Query(..., alias="from"),
+    date_to: datetime = Query(..., alias="to"),
+    user: str = Depends(get_current_user),
+    if_none_match: str | None = Header(None),
+):
+    """Time series of counts per ``bucket``, split by any of
+    ``status``/``error_code``/``ne_service`` (repeat ``group_by``).
+
+    Bounds with a time zone are converted to database time first, so a
+    mix of aware and naive values is accepted."""
+    date_from, date_to = db_time(date_from), db_time(date_to)
+    if unknown := set(group_by) - set(queries.DIMENSION_COLUMNS):
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown group_by: {', '.join(sorted(unknown))}",
+        )
+    if (date_to - date_from) / BUCKET_SIZES[bucket] >= config.STATS_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=f"Range spans more than {config.STATS_MAX_BUCKETS} {bucket} buckets",
+        )
+    group_by = list(dict.fromkeys(group_by))
+    version = await queries.stats_version("series", date_from, date_to)
+    tag = etag.make_etag(bucket, group_by, top_n, date_from, date_to, version)
+    if etag.matches(if_none_match, tag):
+        return etag.not_modified(tag)
+    etag.attach(response, tag)
+    series = await queries.stats_series(bucket, group_by, date_from, date_to, top_n)
+    return StatsSeriesResponse(bucket=bucket, group_by=group_by, series=series)
+
+
+@router.get("/interfaces/{pri_id}", response_model=InterfaceRow | None)
+async def get_interface(
+    pri_id: int,
+    response: Response,
+    user: str = Depends(get_current_user),
+    if_none_match: str | None = Header(None),
+):
+    row, scn = await queries.get_interface(pri_id)
+    if row is None:
+        return None
+    tag = etag.make_etag(pri_id, scn)
+    if etag.matches(if_none_match, tag):
+        return etag.not_modified(tag)
+    etag.attach(response, tag)
+    return InterfaceRow(**row)
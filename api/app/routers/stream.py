@@ -1,28 +1,127 @@
 import asyncio
+import json
 from pathlib import Path
+from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, WebSocket
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
 
-from ..core import config
+from ..core import config, metrics
+from ..core.deps import get_websocket_user
+from ..core.log_protocol import FrameBuffer, LogFilter, encode_frame
+from ..core.log_tailer import get_tailer, read_backlog
 
 router = APIRouter(prefix="/logs", tags=["logs"])
 
 
 @router.websocket("/stream")
-async def stream_logs(ws: WebSocket):
+async def stream_logs(
+    ws: WebSocket,
+    offset: Optional[int] = None,
+    file: Optional[str] = None,
+    include: Optional[str] = None,
+    exclude: Optional[str] = None,
+    levels: Optional[str] = None,
+    compress: bool = False,
+    user: str = Depends(get_websocket_user),
+):
+    """Follow the log file; see :mod:`app.core.log_protocol` for the frames.
+
+    Without ``offset`` only the last ``LOG_REPLAY_BYTES`` of the file are
+    replayed; with the ``offset`` and ``file`` of the last frame received
+    the stream resumes right after it, or from the start of the current
+    file if it was rotated or truncated since. The JWT is passed as
+    ``?token=``; binary client messages close the socket with 1003.
+    """
     await ws.accept()
     path = Path(config.LOG_FILE_PATH)
     if not path.exists():
         await ws.close(code=1000)
         return
-    last_size = 0
-    while True:
-        try:
-            with path.open("r") as f:
-                f.seek(last_size)
-                for line in f:
-                    await ws.send_text(line.rstrip())
-                last_size = f.tell()
-        except FileNotFoundError:  # rotated
-            last_size = 0
-        await asyncio.sleep(0.5)
+    try:
+        line_filter = LogFilter(include, exclude, levels)
+    except ValueError as exc:
+        await ws.close(code=1008, reason=str(exc))
+        return
+    clients = metrics.WEBSOCKET_CLIENTS.labels("/logs/stream")
+    clients.inc()
+    tailer = get_tailer(path)
+    sub, live_from = tailer.subscribe()
+    if offset is None:
+        start = max(0, live_from - config.LOG_REPLAY_BYTES)
+    elif file is not None and file != tailer.file:
+        start = 0
+    else:
+        start = offset if 0 <= offset <= live_from else 0
+    send_lock = asyncio.Lock()
+
+    async def send(frame: Optional[Dict[str, Any]]) -> None:
+        if frame is None:
+            return
+        data = encode_frame(frame, compress)
+        async with send_lock:
+            if isinstance(data, bytes):
+                await ws.send_bytes(data)
+            else:
+                await ws.send_text(data)
+
+    async def pump() -> None:
+        buffer = FrameBuffer(
+            config.LOG_FRAME_MAX_LINES,
+            config.LOG_FRAME_MAX_BYTES,
+            config.LOG_FRAME_MAX_DELAY,
+        )
+        backlog = read_backlog(path, start, live_from)
+        while (batch := await asyncio.to_thread(next, backlog, None)) is not None:
+            buffer.add(line_filter.apply(batch.lines), batch.end, batch.file)
+            if buffer.full:
+                await send(buffer.take())
+        await send(buffer.take())
+        while True:
+            try:
+                batch = await asyncio.wait_for(sub.get(), buffer.timeout())
+            except asyncio.TimeoutError:
+                await send(buffer.take())
+                continue
+            if batch is None:
+                break
+            buffer.add(line_filter.apply(batch.lines), batch.end, batch.file)
+            if buffer.full or buffer.timeout() == 0:
+                await send(buffer.take())
+        await send(buffer.take())
+        if sub.overflowed:
+            await ws.close(code=1013, reason="client too slow")
+
+    async def receive_filters() -> None:
+        nonlocal line_filter
+        while True:
+            try:
+                text = await ws.receive_text()
+            except KeyError:  # a binary frame has no "text"
+                await ws.close(code=1003, reason="expected text messages")
+                return
+            try:
+                message = json.loads(text)
+                if not isinstance(message, dict) or message.get("type") != "subscribe":
+                    raise ValueError("expected a subscribe message")
+                line_filter = LogFilter(
+                    message.get("include"),
+                    message.get("exclude"),
+                    message.get("levels"),
+                )
+            except ValueError as exc:
+                await send({"type": "error", "detail": str(exc)})
+            else:
+                await send({"type": "subscribed", **line_filter.describe()})
+
+    tasks = [asyncio.create_task(pump()), asyncio.create_task(receive_filters())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        tailer.unsubscribe(sub)
+        clients.dec()
@@ -0,0 +1,69 @@
+"""Throughput benchmark: sync pool in the threadpool vs. async pool.
+
+The sync path is driven the way Starlette runs plain ``def`` routes (through
+``anyio.to_thread.run_sync`` and its default 40-thread limiter); the async
+path awaits :func:`app.db.oracle.fetch_all` directly on the event loop.
+
+Requires the ``ORACLE_*`` variables from ``.env``. Run from ``api/``::
+
+    python scripts/bench_db_paths.py --clients 300 --requests 3000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import anyio
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.db import oracle  # noqa: E402
+
+DEFAULT_QUERY = (
+    "SELECT COUNT(*) AS cnt FROM provisioning_interface WHERE ROWNUM <= 1000"
+)
+
+
+async def _run(clients: int, total: int, call) -> float:
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    async def worker() -> None:
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return total / (time.perf_counter() - start)
+
+
+async def main(args: argparse.Namespace) -> None:
+    if oracle.get_pool() is None or oracle.get_async_pool() is None:
+        sys.exit("Oracle pool unavailable: check ORACLE_DSN/USER/PASSWORD")
+
+    async def sync_call() -> None:
+        await anyio.to_thread.run_sync(oracle.fetch_all_sync, args.query)
+
+    async def async_call() -> None:
+        await oracle.fetch_all(args.query)
+
+    for name, call in (("sync", sync_call), ("async", async_call)):
+        await _run(args.clients, min(args.requests, 50), call)  # warm-up
+        rps = await _run(args.clients, args.requests, call)
+        print(f"{name:>5}: {rps:8.1f} req/s ({args.clients} clients)")
+    await oracle.close_async_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--query", default=DEFAULT_QUERY)
+    asyncio.run(main(parser.parse_args()))
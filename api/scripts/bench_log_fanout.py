@@ -0,0 +1,109 @@
+"""Fan-out benchmark: per-client file polling vs. the shared log tailer.
+
+A writer appends lines to a temporary log while ``--clients`` simulated
+viewers consume them. ``legacy`` reproduces the old ``/logs/stream`` loop
+(every client opens, seeks and reads the file itself); ``shared`` uses one
+:class:`app.core.log_tailer.LogTailer` broadcasting to all of them. Reports
+lines/s delivered summed over every client. Run from ``api/``::
+
+    python scripts/bench_log_fanout.py --clients 100 --seconds 5
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.core.log_tailer import LogTailer  # noqa: E402
+
+LINE = "2024-01-01 10:00:00 INFO provisioning request processed pri_id=123456\n"
+
+
+async def _writer(path: Path, stop: asyncio.Event, lines_per_tick: int) -> int:
+    written = 0
+    with path.open("a") as f:
+        while not stop.is_set():
+            f.write(LINE * lines_per_tick)
+            f.flush()
+            written += lines_per_tick
+            await asyncio.sleep(0.01)
+    return written
+
+
+async def _legacy_client(path: Path, stop: asyncio.Event, interval: float) -> int:
+    received, last_size = 0, 0
+    while not stop.is_set():
+        with path.open("r") as f:
+            f.seek(last_size)
+            for line in f:
+                line.rstrip()
+                received += 1
+            last_size = f.tell()
+        await asyncio.sleep(interval)
+    return received
+
+
+async def _shared_client(tailer: LogTailer, stop: asyncio.Event) -> int:
+    received = 0
+    sub, _ = tailer.subscribe()
+    try:
+        while not stop.is_set():
+            try:
+                batch = await asyncio.wait_for(sub.get(), 0.1)
+            except asyncio.TimeoutError:
+                continue
+            if batch is None:
+                break
+            for line in batch.lines:
+                line.rstrip()
+            received += len(batch.lines)
+    finally:
+        tailer.unsubscribe(sub)
+    return received
+
+
+async def _run(mode: str, args: argparse.Namespace, path: Path) -> None:
+    path.write_text("")
+    stop = asyncio.Event()
+    if mode == "legacy":
+        clients = [
+            _legacy_client(path, stop, args.interval) for _ in range(args.clients)
+        ]
+    else:
+        tailer = LogTailer(path, interval=args.interval, maxsize=args.queue)
+        clients = [_shared_client(tailer, stop) for _ in range(args.clients)]
+    tasks = [asyncio.create_task(c) for c in clients]
+    writer = asyncio.create_task(_writer(path, stop, args.lines_per_tick))
+    start = time.perf_counter()
+    await asyncio.sleep(args.seconds)
+    stop.set()
+    written = await writer
+    received = await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    dropped = sum(1 for r in received if r < written * 0.5)
+    print(
+        f"{mode:>6}: {sum(received) / elapsed:12.0f} lines/s delivered "
+        f"({args.clients} clients, {written / elapsed:8.0f} lines/s written, "
+        f"{dropped} lagging)"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "app.log"
+        for mode in ("legacy", "shared"):
+            await _run(mode, args, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--lines-per-tick", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--queue", type=int, default=256)
+    asyncio.run(main(parser.parse_args()))
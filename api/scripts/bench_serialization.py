@@ -0,0 +1,82 @@
+"""Serialization benchmark: validated response model vs. ``fast=true``.
+
+Drives ``GET /provisioning/interfaces`` in-process with the data layer
+replaced by a synthetic page, so only routing, validation and encoding are
+measured. Reports rows/s for each page size. Run from ``api/``::
+
+    python scripts/bench_serialization.py --sizes 50 1000 10000
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.core import deps  # noqa: E402
+from app.db import queries  # noqa: E402
+from app.db.columnar import ColumnSet  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def _page(size: int) -> ColumnSet:
+    start = datetime(2024, 1, 1)
+    return ColumnSet.from_records(
+        [
+            {
+                "pri_id": i,
+                "pri_cellular_number": f"54911{i:08d}",
+                "pri_status": "E" if i % 7 == 0 else "O",
+                "pri_action_date": start + timedelta(seconds=i),
+                "pri_error_code": "ERR-42" if i % 7 == 0 else None,
+                "pri_message_error": "Timeout on NE" if i % 7 == 0 else None,
+                "pri_ne_service": "VOZ",
+            }
+            for i in range(size)
+        ]
+    )
+
+
+def main(args: argparse.Namespace) -> None:
+    deps.decode_token = lambda token: "bench"
+    page = {"rows": ColumnSet([], [])}
+
+    async def fake_list(*a, **kw):
+        return {
+            "total_count": len(page["rows"]),
+            "rows": page["rows"],
+            "next_cursor": None,
+            "prev_cursor": None,
+        }
+
+    async def fake_version(*a, **kw):
+        return (None,)
+
+    queries.list_interfaces = fake_list
+    queries.interfaces_version = fake_version
+    client = TestClient(app)
+    # identity: keep response compression out of the measurement
+    headers = {"Authorization": "Bearer bench", "Accept-Encoding": "identity"}
+
+    for size in args.sizes:
+        page["rows"] = _page(size)
+        requests = max(3, args.rows // size)
+        for mode, query in (("model", ""), ("fast", "?fast=true")):
+            client.get("/provisioning/interfaces" + query, headers=headers)  # warm-up
+            start = time.perf_counter()
+            for _ in range(requests):
+                resp = client.get("/provisioning/interfaces" + query, headers=headers)
+                resp.raise_for_status()
+            rate = size * requests / (time.perf_counter() - start)
+            print(f"{size:>6} rows/page {mode:>5}: {rate:12.0f} rows/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 1000, 10000])
+    parser.add_argument("--rows", type=int, default=100000, help="rows per case")
+    main(parser.parse_args())
@@ -1,5 +1,6 @@
 from fastapi.testclient import TestClient
 
+from app.core.compression import CompressionMiddleware
 from app.main import app
 
 
@@ -8,3 +9,44 @@ def test_healthz():
     resp = client.get("/healthz")
     assert resp.status_code == 200
     assert resp.json() == {"status": "ok"}
+
+
+def test_metrics_prometheus_format():
+    client = TestClient(app)
+    client.get("/healthz")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert (
+        'http_responses_total{method="GET",route="/healthz",status="200"}' in resp.text
+    )
+    assert "http_request_duration_seconds_bucket" in resp.text
+
+
+def test_large_bodies_are_compressed():
+    client = TestClient(app)
+    resp = client.get("/metrics", headers={"Accept-Encoding": "br, gzip"})
+    assert resp.headers["content-encoding"] == "br"
+    assert "http_request_duration_seconds_bucket" in resp.text
+    small = client.get("/healthz", headers={"Accept-Encoding": "br, gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_streamed_bodies_are_compressed_per_chunk():
+    async def stream(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/csv")],
+            }
+        )
+        for chunk in (b"a,b\n" * 500, b"c,d\n" * 500):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    client = TestClient(CompressionMiddleware(stream, minimum_size=1024))
+    resp = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert resp.text == "a,b\n" * 500 + "c,d\n" * 500
@@ -0,0 +1,159 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.db import live
+from app.db.columnar import ColumnSet
+from app.main import app
+from app.routers.live import _events
+
+T0 = datetime(2024, 1, 1, 10, 0, 0)
+
+
+def _rows(*rows):
+    return ColumnSet.from_rows(
+        [
+            "pri_id",
+            "pri_cellular_number",
+            "pri_status",
+            "pri_action_date",
+            "pri_error_code",
+            "pri_ne_id",
+            "pri_ne_group",
+            "pri_ne_service",
+        ],
+        [
+            (pri_id, "123", status, T0.replace(second=s), code, ne, "G", "SVC")
+            for pri_id, status, s, code, ne in rows
+        ],
+    )
+
+
+def _fake_db(monkeypatch, batches):
+    calls = []
+
+    async def fake_fetch_columns(query, params=None, name=None):
+        calls.append(params)
+        return batches.pop(0) if batches else _rows()
+
+    async def fake_db_now(name=None):
+        return T0
+
+    monkeypatch.setattr("app.db.live.fetch_columns", fake_fetch_columns)
+    monkeypatch.setattr("app.db.live.db_now", fake_db_now)
+    return calls
+
+
+def test_poll_advances_watermark_and_broadcasts(monkeypatch):
+    calls = _fake_db(
+        monkeypatch, [_rows((1, "O", 1, None, "NE1"), (2, "E", 1, "42", "NE2"))]
+    )
+
+    async def run():
+        feed = live.LiveFeed(max_rows=2)
+        sub = feed.hub.subscribe()
+        assert await feed.poll() == 2  # a full page: polls again at once
+        assert await feed.poll() == 0
+        return feed, sub.get_nowait().rows
+
+    feed, batch = asyncio.run(run())
+    assert feed.watermark == (T0.replace(second=1), 2)
+    # The next poll starts LIVE_SETTLE_SECONDS behind the watermark.
+    assert [(c["after_date"], c["after_id"]) for c in calls] == [
+        (T0.replace(second=0) - timedelta(seconds=5), 0),
+        (T0.replace(second=1), 2),
+        (T0.replace(second=1) - timedelta(seconds=5), 0),
+    ]
+    assert live.select(batch, {"ne_id": "NE2", "ne_group": None}).column("pri_id") == (
+        2,
+    )
+    assert live.deltas(batch) == [
+        {
+            "second": "2024-01-01T10:00:01",
+            "status": {"O": 1, "E": 1},
+            "error_code": {"42": 1},
+        }
+    ]
+
+
+def test_poll_streams_late_commits_once(monkeypatch):
+    _fake_db(
+        monkeypatch,
+        [
+            _rows((1, "O", 1, None, "NE1"), (2, "O", 3, None, "NE1")),
+            # Row 3 committed after row 2 was read, with an older date.
+            _rows(
+                (1, "O", 1, None, "NE1"),
+                (3, "O", 2, None, "NE1"),
+                (2, "O", 3, None, "NE1"),
+            ),
+        ],
+    )
+
+    async def run():
+        feed = live.LiveFeed()
+        sub = feed.hub.subscribe()
+        assert await feed.poll() == 2
+        assert await feed.poll() == 1
+        return feed, [sub.get_nowait().rows for _ in range(2)]
+
+    feed, (first, late) = asyncio.run(run())
+    assert list(first.column("pri_id")) == [1, 2]
+    assert list(late.column("pri_id")) == [3]
+    assert feed.watermark == (T0.replace(second=3), 2)
+
+
+def test_poll_sends_updates_for_rows_that_leave_pending(monkeypatch):
+    calls = _fake_db(
+        monkeypatch,
+        [
+            _rows((1, "K", 1, None, "NE1"), (2, "O", 1, None, "NE1")),
+            _rows((1, "E", 1, "42", "NE1")),  # re-read of the pending row
+        ],
+    )
+
+    async def run():
+        feed = live.LiveFeed()
+        sub = feed.hub.subscribe()
+        await feed.poll()
+        await feed.poll()
+        return feed, [sub.get_nowait() for _ in range(2)]
+
+    feed, (inserted, updated) = asyncio.run(run())
+    assert inserted.kind == "rows" and updated.kind == "update"
+    assert set(calls[1].values()) == {1}  # only the pending row is re-read
+    assert updated.rows.row(0)["pri_status"] == "E"
+    assert updated.rows.row(0)["previous_status"] == "K"
+    assert feed.pending == {}
+
+
+def test_live_events_stream_filtered_rows_and_deltas(monkeypatch):
+    _fake_db(monkeypatch, [_rows((1, "O", 1, None, "NE1"), (2, "E", 2, "42", "NE2"))])
+    monkeypatch.setattr(live.feed, "interval", 0.01)
+
+    async def run():
+        events = []
+        stream = _events({"ne_id": "NE2"}, include_rows=True)
+        async for chunk in stream:
+            if chunk.startswith("event: "):
+                head, data = chunk.strip().split("\n")
+                events.append(
+                    (head[len("event: ") :], json.loads(data[len("data: ") :]))
+                )
+                if events[-1][0] == "delta":
+                    break
+        await stream.aclose()
+        return events
+
+    events = asyncio.run(run())
+    assert [name for name, _ in events] == ["rows", "delta"]
+    assert [r["pri_id"] for r in events[0][1]] == [2]
+    assert events[1][1][0]["status"] == {"E": 1}
+    assert not live.feed.hub and live.feed._task is None
+
+
+def test_live_requires_token():
+    resp = TestClient(app).get("/live/interfaces")
+    assert resp.status_code == 401
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+import zlib
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.core import config
+from app.core.broadcast import Broadcaster
+from app.core.log_protocol import FrameBuffer, LogFilter
+from app.core.log_tailer import LogTailer, file_id, read_backlog
+from app.main import app
+
+
+def test_broadcaster_closes_slow_subscriber():
+    hub = Broadcaster(maxsize=2)
+    fast, slow = hub.subscribe(), hub.subscribe()
+    for i in range(3):
+        hub.publish(i)
+        assert fast.get_nowait() == i
+    assert slow.overflowed and slow not in hub.subscribers
+    assert asyncio.run(slow.get()) is None
+    assert fast in hub.subscribers
+
+
+def test_tailer_reads_appends_and_follows_rotation(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("old 1\nold 2\npart")
+    tailer = LogTailer(path)
+    tailer._open(seek_end=True)
+    sub = tailer.hub.subscribe()
+    assert tailer.offset == len("old 1\nold 2\n")
+    assert [b.lines for b in read_backlog(path, 0, tailer.offset)] == [
+        ["old 1", "old 2"]
+    ]
+
+    with path.open("a") as f:
+        f.write("ial\nnew\n")
+    tailer.poll()
+    assert sub.get_nowait().lines == ["partial", "new"]
+
+    with path.open("a") as f:
+        f.write("last before rotation\n")
+    os.rename(path, tmp_path / "app.log.1")
+    path.write_text("rotated\n")
+    tailer.poll()
+    assert sub.get_nowait().lines == ["last before rotation"]
+    assert sub.get_nowait().lines == ["rotated"]
+    assert tailer.offset == len("rotated\n")
+
+    path.write_text("x\n")  # truncated in place
+    tailer.poll()
+    assert sub.get_nowait().lines == ["x"]
+
+
+def test_log_filter_and_frame_buffer():
+    lines = ["10:00 INFO started", "10:01 WARNING slow", "10:02 ERROR boom"]
+    assert LogFilter(levels="warn,error").apply(lines) == lines[1:]
+    assert LogFilter(include=["boom", "start"], exclude="INFO").apply(lines) == [
+        lines[2]
+    ]
+    # Substrings, not regexes: nothing a client sends can backtrack.
+    assert LogFilter(include="(a+)+$").apply(["(a+)+$ literal", "aaaa!"]) == [
+        "(a+)+$ literal"
+    ]
+    with pytest.raises(ValueError):
+        LogFilter(include="x" * 201)
+    with pytest.raises(ValueError):
+        LogFilter(include=["x"] * 21)
+    with pytest.raises(ValueError):
+        LogFilter(levels=["LOUD"])
+    with pytest.raises(ValueError):
+        LogFilter(include=5)
+    with pytest.raises(ValueError):
+        LogFilter(levels=7)
+
+    buffer = FrameBuffer(max_lines=2, max_bytes=1000, max_delay=60)
+    assert buffer.timeout() is None
+    buffer.add([], 10)
+    assert buffer.take() is None
+    buffer.add(["a"], 12)
+    assert not buffer.full and buffer.timeout() > 0
+    buffer.add(["b"], 14, "1:2")
+    assert buffer.full
+    assert buffer.take() == {
+        "type": "lines",
+        "file": "1:2",
+        "offset": 14,
+        "lines": ["a", "b"],
+    }
+
+
+def _connect(client, path, monkeypatch, query=""):
+    monkeypatch.setattr(config, "LOG_FILE_PATH", str(path))
+    monkeypatch.setattr("app.core.deps.decode_token", lambda token: "user")
+    query += ("&" if query else "?") + "token=dummy"
+    return client.websocket_connect("/logs/stream" + query)
+
+
+def test_stream_requires_a_token(tmp_path, monkeypatch):
+    path = tmp_path / "private.log"
+    path.write_text("secret\n")
+    monkeypatch.setattr(config, "LOG_FILE_PATH", str(path))
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with TestClient(app).websocket_connect("/logs/stream"):
+            pass
+    assert exc.value.code == 1008
+
+
+def test_stream_closes_on_binary_messages(tmp_path, monkeypatch):
+    path = tmp_path / "binary.log"
+    path.write_text("a\n")
+    with _connect(TestClient(app), path, monkeypatch) as ws:
+        assert ws.receive_json()["lines"] == ["a"]
+        ws.send_bytes(b"\x00")
+        message = ws.receive()
+        assert message["type"] == "websocket.close"
+        assert message["code"] == 1003
+
+
+def test_stream_replays_tail_then_batches_live_lines(tmp_path, monkeypatch):
+    path = tmp_path / "stream.log"
+    path.write_text("a\nb\n")
+    file = file_id(path.stat())
+    with _connect(TestClient(app), path, monkeypatch) as ws:
+        assert ws.receive_json() == {
+            "type": "lines",
+            "file": file,
+            "offset": 4,
+            "lines": ["a", "b"],
+        }
+        with path.open("a") as f:
+            f.write("c\nd\n")
+        assert ws.receive_json() == {
+            "type": "lines",
+            "file": file,
+            "offset": 8,
+            "lines": ["c", "d"],
+        }
+
+
+def test_stream_resumes_from_offset_with_server_side_filters(tmp_path, monkeypatch):
+    path = tmp_path / "resume.log"
+    path.write_text("1 ERROR old\n2 INFO seen\n3 ERROR new\n4 INFO skip\n")
+    query = "?offset=12&levels=ERROR"
+    with _connect(TestClient(app), path, monkeypatch, query) as ws:
+        frame = ws.receive_json()
+        assert frame["lines"] == ["3 ERROR new"]
+        assert frame["offset"] == path.stat().st_size
+
+        ws.send_json({"type": "subscribe", "include": "x" * 201})
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"type": "subscribe", "include": 1, "levels": "ERROR"})
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"type": "subscribe", "levels": {"ERROR": True}})
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json(["subscribe"])
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"type": "subscribe", "include": "skip"})
+        assert ws.receive_json()["type"] == "subscribed"
+        with path.open("a") as f:
+            f.write("5 INFO skip me\n6 INFO other\n")
+        assert ws.receive_json()["lines"] == ["5 INFO skip me"]
+
+
+def test_stream_restarts_rotated_file_from_the_beginning(tmp_path, monkeypatch):
+    path = tmp_path / "rotated.log"
+    path.write_text("old 1\nold 2\n")
+    stale = file_id(path.stat())
+    os.rename(path, tmp_path / "rotated.log.1")
+    path.write_text("new 1\nnew 2\nnew 3\n")
+    # The offset of the old file would land in the middle of the new one.
+    query = f"?offset=12&file={stale}"
+    with _connect(TestClient(app), path, monkeypatch, query) as ws:
+        frame = ws.receive_json()
+        assert frame["lines"] == ["new 1", "new 2", "new 3"]
+        assert frame["file"] == file_id(path.stat()) != stale
+
+
+def test_stream_compressed_frames(tmp_path, monkeypatch):
+    path = tmp_path / "zip.log"
+    path.write_text("x\n")
+    with _connect(TestClient(app), path, monkeypatch, "?compress=true") as ws:
+        frame = json.loads(zlib.decompress(ws.receive_bytes()))
+        assert frame["lines"] == ["x"]
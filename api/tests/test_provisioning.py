@@ -1,5 +1,14 @@
+import io
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
 from fastapi.testclient import TestClient
 
+from app.core import export
+from app.db import queries
+from app.db.columnar import ColumnSet
+from app.db.pagination import encode_cursor
 from app.main import app
 
 
@@ -10,21 +19,23 @@ def auth_header():
 def test_list_interfaces(monkeypatch):
     captured = {}
 
-    def fake_fetch_all(query, params, limit=None, offset=None):
+    async def fake_fetch_all(query, params, limit=None, offset=None, name=None):
         captured.update({"params": params, "limit": limit, "offset": offset})
-        return [
-            {
-                "pri_id": 1,
-                "pri_cellular_number": "123",
-                "pri_status": "OK",
-                "pri_action_date": "2020-01-01T00:00:00",
-            }
-        ]
-
-    def fake_fetch_one(query, params=None):
+        return ColumnSet.from_records(
+            [
+                {
+                    "pri_id": 1,
+                    "pri_cellular_number": "123",
+                    "pri_status": "OK",
+                    "pri_action_date": "2020-01-01T00:00:00",
+                }
+            ]
+        )
+
+    async def fake_fetch_one(query, params=None, name=None):
         return {"cnt": 1}
 
-    monkeypatch.setattr("app.db.queries.fetch_all", fake_fetch_all)
+    monkeypatch.setattr("app.db.queries.fetch_columns", fake_fetch_all)
     monkeypatch.setattr("app.db.queries.fetch_one", fake_fetch_one)
     monkeypatch.setattr("app.core.deps.decode_token", lambda token: "user")
 
@@ -39,3 +50,490 @@ def test_list_interfaces(monkeypatch):
     assert captured["limit"] == 10
     assert captured["offset"] == 10
     assert captured["params"]["status"] == "OK"
+
+
+def test_list_interfaces_keyset_cursor(monkeypatch):
+    captured = {}
+
+    async def fake_fetch_all(query, params, limit=None, offset=None, name=None):
+        if "ROWNUM" in query:
+            captured.update({"query": query, "params": params})
+            return ColumnSet.from_records(
+                [
+                    {
+                        "pri_id": pri_id,
+                        "pri_cellular_number": "123",
+                        "pri_status": "OK",
+                        "pri_action_date": "2020-01-01T00:00:00",
+                    }
+                    for pri_id in (9, 8, 7)
+                ]
+            )
+        return ColumnSet([], [])
+
+    async def fake_fetch_one(query, params=None, name=None):
+        return {"cnt": 100}
+
+    monkeypatch.setattr("app.db.queries.fetch_columns", fake_fetch_all)
+    monkeypatch.setattr("app.db.queries.fetch_one", fake_fetch_one)
+    monkeypatch.setattr("app.core.deps.decode_token", lambda token: "user")
+
+    cursor = encode_cursor({"pri_id": 10}, "pri_id", "desc", "next")
+    client = TestClient(app)
+    resp = client.get(
+        "/provisioning/interfaces",
+        params={"page_size": 2, "sort_by": "pri_id", "cursor": cursor},
+        headers=auth_header(),
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [r["pri_id"] for r in body["rows"]] == [9, 8]
+    assert "OFFSET" not in captured["query"]
+    assert captured["params"]["cursor_id"] == 10
+    assert captured["params"]["limit_plus"] == 3
+    assert body["next_cursor"] and body["prev_cursor"]
+
+    resp = client.get(
+        "/provisioning/interfaces",
+        params={"sort_by": "pri_id", "cursor": "not-a-cursor"},
+        headers=auth_header(),
+    )
+    assert resp.status_code == 400
+
+    resp = client.get(
+        "/provisioning/interfaces",
+        params={"sort_by": "pri_nope"},
+        headers=auth_header(),
+    )
+    assert resp.status_code == 422
+
+
+def test_keyset_seek_handles_null_sort_values(monkeypatch):
+    captured = []
+
+    async def fake_fetch_columns(query, params, limit=None, offset=None, name=None):
+        captured.append((query, params))
+        return ColumnSet([], [])
+
+    async def fake_fetch_one(query, params=None, name=None):
+        return {"cnt": 0}
+
+    monkeypatch.setattr("app.db.queries.fetch_columns", fake_fetch_columns)
+    monkeypatch.setattr("app.db.queries.fetch_one", fake_fetch_one)
+    monkeypatch.setattr("app.core.deps.decode_token", lambda token: "user")
+    client = TestClient(app)
+
+    def page(sort_dir, value):
+        row = {"pri_id": 10, "pri_error_code": value}
+        cursor = encode_cursor(row, "pri_error_code", sort_dir, "next")
+        params = {"sort_by": "pri_error_code", "sort_dir": sort_dir, "cursor": cursor}
+        assert (
+            client.get(
+                "/provisioning/interfaces", params=params, headers=auth_header()
+            ).status_code
+            == 200
+        )
+        return captured[-1]
+
+    # NULLs come first when descending: after a NULL, the rest of the NULLs
+    # and then every non-NULL value.
+    query, params = page("desc", None)
+    assert (
+        "(pri_error_code IS NOT NULL OR (pri_error_code IS NULL AND pri_id < :cursor_id))"
+        in query
+    )
+    assert "DESC NULLS FIRST" in query and "cursor_value" not in params
+
+    # ...and last when ascending, so they still follow a non-NULL cursor.
+    query, params = page("asc", "E42")
+    assert "OR pri_error_code IS NULL)" in query and "ASC NULLS LAST" in query
+    assert params["cursor_value"] == "E42"
+
+    query, _ = page("asc", None)
+    assert "(pri_error_code IS NULL AND pri_id > :cursor_id)" in query
+
+
+def test_list_interfaces_count_modes(monkeypatch):
+    calls = []
+
+    async def fake_fetch_all(query, params, limit=None, offset=None, name=None):
+        return ColumnSet([], [])
+
+    async def fake_fetch_one(query, params=None, name=None):
+        calls.append(query)
+        return {"cnt": 42}
+
+    monkeypatch.setattr("app.db.queries.fetch_columns", fake_fetch_all)
+    monkeypatch.setattr("app.db.queries.fetch_one", fake_fetch_one)
+    monkeypatch.setattr("app.core.deps.decode_token", lambda token: "user")
+    queries.exact_counts.clear()
+    queries.listing_versions.clear()
+
+    client = TestClient(app)
+    url = "/provisioning/interfaces?error_code=E42"
+    for _ in range(2):
+        body = client.get(url, headers=auth_header()).json()
+        assert body["total_count"] == 42
+        assert body["count_mode"] == "exact"
+    assert len(calls) == 1  # second request served from the count cache
+
+    body = client.get(url + "&count=none", headers=auth_header()).json()
+    assert body["total_count"] is None
+    assert len(calls) == 1
+
+    client.get(url, headers={**auth_header(), "If-None-Match": 'W/"x"'})
+    assert len(calls) == 1  # conditional requests share the cached validator
+
+
+def test_stats_from_columns(monkeypatch):
+    async def fake_fetch_columns(query, params, limit=None, offset=None, name=None):
+        return ColumnSet(["group_key", "total"], [("OK", "E"), (7, 3)])
+
+    monkeypatch.setattr("app.db.queries.fetch_columns", fake_fetch_columns)
+    monkeypatch.setattr("app.core.deps.decode_token", lambda token: "user")
+
+    resp = TestClient(app).get(
+        "/provisioning/interfaces/stats",
+        params={"from": "2020-01-01T00:00:00", "to": "2020-01-02T00:00:00"},
+        headers=auth_header(),
+    )
+    assert resp.status_code == 200
+    assert resp.json() == [
+        {"group_key": "OK", "total": 7},
+        {"group_key": "E", "total": 3},
+    ]
+
+
+def test_export_streams_batches(monkeypatch):
+    captured = {}
+
+    async def fake_stream_columns(query, params, batch_size, name=None):
+        captured.update({"query": query, "params": params, "batch": batch_size})
+        for pri_id in (1, 2):
+            yield ColumnSet(["pri_id", "pri_status"], [(pri_id,), ("OK",)])
+
+    monkeypatch.setattr("app.db.queries.stream_columns", fake_stream_columns)
+    monkeypatch.setattr("app.core.deps.decode_token", lambda token: "user")
+
+    client = TestClient(app)
+    resp = client.get(
+        "/provisioning/interfaces/export?format=csv&status=OK&batch_size=100",
+        headers=auth_header(),
+    )
+    assert resp.status_code == 200
+    assert resp.text.splitlines() == ["pri_id,pri_status", "1,OK", "2,OK"]
+    assert captured["params"] == {"status": "OK"}
+    assert captured["batch"] == 100
+
+    resp = client.get(
+        "/provisioning/interfaces/export?format=ndjson", headers=auth_header()
+    )
+    assert [line for line in resp.text.splitlines()] == [
+        '{"pri_id": 1, "pri_status": "OK"}',
+        '{"pri_id": 2, "pri_status": "OK"}',
+    ]
+
+
+@pytest.mark.skipif(not export.HAS_PARQUET, reason="pyarrow not installed")
+def test_parquet_export_uses_declared_types(monkeypatch):
+    from decimal import Decimal
+
+    import pyarrow.parquet as pq
+
+    number = SimpleNamespace(name="DB_TYPE_NUMBER")
+    varchar = SimpleNamespace(name="DB_TYPE_VARCHAR")
+    types = [
+        ("pri_id", number, None, None, 0, -127, False),
+        ("pri_ne_id", number, None, None, 10, 0, True),
+        ("pri_error_code", varchar, None, None, 0, 0, True),
+        ("pri_amount", number, None, None, 12, 2, True),
+    ]
+    names = [t[0] for t in types]
+
+    async def fake_stream_columns(query, params, batch_size, name=None):
+        # All-NULL and integral values first, text and fractions later.
+        yield ColumnSet.from_rows(names, [(1, 7, None, 5)], types)
+        yield ColumnSet.from_rows(names, [(2, None, "E42", 2.5)], types)
+
+    monkeypatch.setattr("app.db.queries.stream_columns", fake_stream_columns)
+    monkeypatch.setattr("app.core.deps.decode_token", lambda token: "user")
+
+    resp = TestClient(app).get(
+        "/provisioning/interfaces/export?format=parquet", headers=auth_header()
+    )
+    assert resp.status_code == 200
+    table = pq.read_table(io.BytesIO(resp.content))
+    assert [str(f.type) for f in table.schema] == [
+        "decimal128(38, 10)",
+        "int64",
+        "string",
+        "decimal128(12, 2)",
+    ]
+    assert table.to_pydict() == {
+        "pri_id": [Decimal(1), Decimal(2)],
+        "pri_ne_id": [7, None],
+        "pri_error_code": [None, "E42"],
+        "pri_amount": [Decimal(5), Decimal("2.5")],
+    }
+
+
+@pytest.mark.skipif(not export.HAS_PARQUET, reason="pyarrow not installed")
+def test_export_writes_driver_arrow_batches(monkeypatch):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    batches = [
+        ColumnSet.from_arrow(
+            pa.table(
+                {
+                    "PRI_ID": pa.array([pri_id], pa.int64()),
+                    "PRI_STATUS": pa.array(["OK"], pa.string()),
+                }
+            )
+        )
+        for pri_id in (1, 2)
+    ]
+
+    async def fake_stream_columns(query, params, batch_size, name=None):
+        for batch in batches:
+            yield batch
+
+    monkeypatch.setattr("app.db.queries.stream_columns", fake_stream_columns)
+    monkeypatch.setattr("app.core.deps.decode_token", lambda token: "user")
+
+    client = TestClient(app)
+    resp = client.get(
+        "/provisioning/interfaces/export?format=parquet", headers=auth_header()
+    )
+    table = pq.read_table(io.BytesIO(resp.content))
+    assert table.to_pydict() == {"pri_id": [1, 2], "pri_status": ["OK", "OK"]}
+    # Written from the Arrow buffers, never converted to Python values.
+    assert all(batch._columns is None for batch in batches)
+
+    resp = client.get(
+        "/provisioning/interfaces/export?format=csv", headers=auth_header()
+    )
+    assert resp.text.splitlines() == ["pri_id,pri_status", "1,OK", "2,OK"]
+
+
+def test_conditional_get_answers_304_without_fetching_rows(monkeypatch):
+    pages = []
+
+    async def fake_fetch_columns(query, params, limit=None, offset=None, name=None):
+        pages.append(name)
+        return ColumnSet.from_records(
+            [
+                {
+                    "pri_id": i,
+                    "pri_cellular_number": "123",
+                    "pri_status": "OK",
+                    "pri_action_date": "2020-01-01T00:00:00",
+                }
+                for i in range(200)
+            ]
+        )
+
+    version = {"scn": 1000, "cnt": 200}
+
+    async def fake_fetch_one(query, params=None, name=None):
+        return dict(version)
+
+    monkeypatch.setattr("app.db.queries.fetch_columns", fake_fetch_columns)
+    monkeypatch.setattr("app.db.queries.fetch_one", fake_fetch_one)
+    monkeypatch.setattr("app.core.deps.decode_token", lambda token: "user")
+    queries.exact_counts.clear()
+    queries.listing_versions.clear()
+
+    client = TestClient(app)
+    url = "/provisioning/interfaces?page_size=200"
+    first = client.get(url, headers={**auth_header(), "Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["content-encoding"] == "gzip"
+    tag = first.headers["etag"]
+    assert tag.startswith('W/"')
+
+    again = client.get(url, headers={**auth_header(), "If-None-Match": tag})
+    assert again.status_code == 304 and again.content == b""
+    assert pages == ["list_interfaces.page"]
+
+    other = client.get(url + "&page=2", headers={**auth_header(), "If-None-Match": tag})
+    assert other.status_code == 200
+
+    version["scn"] = 1001  # a row was updated: same dates, same count
+    queries.listing_versions.clear()  # the validator's TTL elapsed
+    changed = client.get(url, headers={**auth_header(), "If-None-Match": tag})
+    assert changed.status_code == 200 and changed.headers["etag"] != tag
+
+
+def test_get_interface_reads_row_and_version_together(monkeypatch):
+    queried = []
+
+    async def fake_fetch_one(query, params=None, name=None):
+        queried.append(query)
+        return {
+            "ora_scn": 77,
+            "pri_id": 5,
+            "pri_cellular_number": "123",
+            "pri_status": "O",
+            "pri_action_date": "2020-01-01T00:00:00",
+        }
+
+    monkeypatch.setattr("app.db.queries.fetch_one", fake_fetch_one)
+    monkeypatch.setattr("app.core.deps.decode_token", lambda token: "user")
+
+    client = TestClient(app)
+    first = client.get("/provisioning/interfaces/5", headers=auth_header())
+    assert first.json()["pri_id"] == 5 and "ora_scn" not in first.json()
+    again = client.get(
+        "/provisioning/interfaces/5",
+        headers={**auth_header(), "If-None-Match": first.headers["etag"]},
+    )
+    assert again.status_code == 304
+    assert len(queried) == 2 and "ORA_ROWSCN" in queried[0]
+
+
+def test_fast_mode_matches_validated_response(monkeypatch):
+    async def fake_fetch_columns(query, params, limit=None, offset=None, name=None):
+        return ColumnSet.from_records(
+            [
+                {
+                    "pri_id": i,
+                    "pri_cellular_number": "123",
+                    "pri_status": "OK",
+                    "pri_action_date": datetime(2020, 1, 1, 0, 0, i, 250000),
+                    "pri_error_code": None if i % 2 else "E42",
+                    "pri_extra_column": "not in the schema",
+                }
+                for i in range(3)
+            ]
+        )
+
+    async def fake_fetch_one(query, params=None, name=None):
+        return {"cnt": 3, "max_date": None}
+
+    monkeypatch.setattr("app.db.queries.fetch_columns", fake_fetch_columns)
+    monkeypatch.setattr("app.db.queries.fetch_one", fake_fetch_one)
+    monkeypatch.setattr("app.core.deps.decode_token", lambda token: "user")
+
+    client = TestClient(app)
+    slow = client.get("/provisioning/interfaces", headers=auth_header())
+    fast = client.get("/provisioning/interfaces?fast=true", headers=auth_header())
+    assert fast.status_code == 200
+    assert fast.headers["content-type"] == "application/json"
+    assert fast.headers["etag"]
+    assert fast.json() == slow.json()
+
+
+def test_lookup_resolves_many_ids_in_one_query(monkeypatch):
+    captured = []
+
+    async def fake_stream_columns(query, params, batch_size, name=None):
+        captured.append((query, params))
+        yield ColumnSet(["pri_id", "pri_status"], [(1, 2), ("OK", "E")])
+
+    monkeypatch.setattr("app.db.queries.stream_columns", fake_stream_columns)
+    monkeypatch.setattr("app.core.deps.decode_token", lambda token: "user")
+
+    client = TestClient(app)
+    ids = list(range(1, 1201))
+    resp = client.post(
+        "/provisioning/interfaces/lookup",
+        json={"pri_ids": ids[:3], "msisdns": ["549111", "549111"]},
+        headers=auth_header(),
+    )
+    assert resp.status_code == 200
+    assert resp.text.splitlines() == [
+        '{"pri_id": 1, "pri_status": "OK"}',
+        '{"pri_id": 2, "pri_status": "E"}',
+    ]
+    query, params = captured[0]
+    assert len(captured) == 1
+    # Padded to 8 binds per list so every short list shares one statement.
+    assert sum(k.startswith("id_") for k in params) == 8
+    assert sum(k.startswith("msisdn_") for k in params) == 8
+    assert "pri_cellular_number IN (:msisdn_0" in query
+
+    resp = client.post(
+        "/provisioning/interfaces/lookup", json={"pri_ids": ids}, headers=auth_header()
+    )
+    assert resp.status_code == 422  # over LOOKUP_MAX_IDS (1000 by default)
+    resp = client.post(
+        "/provisioning/interfaces/lookup", json={}, headers=auth_header()
+    )
+    assert resp.status_code == 422
+
+
+def test_in_lists_stay_under_oracle_limit():
+    clause, params = queries._in_lists("pri_id", "id", list(range(1500)))
+    assert len(params) == 2048
+    assert clause.count(" IN (") == 3
+    assert all(
+        part.count(":") <= queries.IN_LIST_LIMIT for part in clause.split(" OR ")
+    )
+
+
+def test_stats_series_reshapes_rollup_rows(monkeypatch):
+    captured = {}
+
+    async def fake_fetch_columns(query, params, limit=None, offset=None, name=None):
+        captured.update({"query": query, "params": params})
+        t1, t2 = datetime(2024, 1, 1, 10), datetime(2024, 1, 1, 11)
+        return ColumnSet(
+            ["bucket", "is_other", "status", "error_code", "total", "is_total"],
+            [
+                (t1, t1, t1, t1, t2, t2),
+                (None, 0, 0, 1, None, 0),
+                (None, "O", "E", None, None, "O"),
+                (None, None, "42", None, None, None),
+                (10, 6, 3, 1, 4, 4),
+                (1, 0, 0, 0, 1, 0),
+            ],
+        )
+
+    monkeypatch.setattr("app.db.queries.fetch_columns", fake_fetch_columns)
+    monkeypatch.setattr("app.core.deps.decode_token", lambda token: "user")
+
+    client = TestClient(app)
+    params = {
+        "from": "2024-01-01T10:00:00",
+        "to": "2024-01-01T11:59:59",
+        "bucket": "hour",
+        "group_by": ["status", "error_code"],
+        "top_n": 2,
+    }
+    resp = client.get(
+        "/provisioning/interfaces/stats/series", params=params, headers=auth_header()
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["group_by"] == ["status", "error_code"]
+    first, second = body["series"]
+    assert first["total"] == 10
+    assert first["groups"] == [
+        {"key": {"status": "O", "error_code": None}, "other": False, "total": 6},
+        {"key": {"status": "E", "error_code": "42"}, "other": False, "total": 3},
+        {"key": {"status": None, "error_code": None}, "other": True, "total": 1},
+    ]
+    assert second["total"] == 4 and len(second["groups"]) == 1
+    assert "TRUNC(pri_action_date, 'HH24')" in captured["query"]
+    assert "ROLLUP((is_other, status, error_code))" in captured["query"]
+    assert captured["params"]["top_n"] == 2
+
+    bad = client.get(
+        "/provisioning/interfaces/stats/series",
+        params={**params, "group_by": ["msisdn"]},
+        headers=auth_header(),
+    )
+    assert bad.status_code == 400
+    too_many = client.get(
+        "/provisioning/interfaces/stats/series",
+        params={**params, "bucket": "minute", "to": "2024-03-01T00:00:00"},
+        headers=auth_header(),
+    )
+    assert too_many.status_code == 400
+
+    params["to"] = "2024-01-01T11:59:59+00:00"  # aware upper bound, naive lower
+    resp = client.get(
+        "/provisioning/interfaces/stats/series", params=params, headers=auth_header()
+    )
+    assert resp.status_code == 200
@@ -0,0 +1,155 @@
+import asyncio
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from app.db import rollup
+from app.db.columnar import ColumnSet
+from app.main import app
+
+
+def _seed_cube():
+    rollup.cube.clear()
+    rows = ColumnSet(
+        ["minute", "status", "error_code", "ne_service", "total"],
+        [
+            (datetime(2024, 1, 1, 10, 0), datetime(2024, 1, 1, 10, 1)),
+            ("OK", "E"),
+            (None, "42"),
+            ("SVC", "SVC"),
+            (5, 2),
+        ],
+    )
+    rollup.cube.advance(rows, datetime(2024, 1, 1, 10, 0), datetime(2024, 1, 1, 10, 30))
+
+
+def test_plan_splits_range_into_cube_minutes_and_gaps():
+    _seed_cube()
+    plan = rollup.cube.plan(
+        datetime(2024, 1, 1, 9, 59, 30), datetime(2024, 1, 1, 10, 45)
+    )
+    assert plan.lo == datetime(2024, 1, 1, 10, 0)
+    assert plan.hi == datetime(2024, 1, 1, 10, 30)
+    assert plan.gaps == [
+        (datetime(2024, 1, 1, 9, 59, 30), datetime(2024, 1, 1, 10, 0), False),
+        (datetime(2024, 1, 1, 10, 30), datetime(2024, 1, 1, 10, 45), True),
+    ]
+    assert rollup.cube.plan(datetime(2024, 1, 2), datetime(2024, 1, 3)) is None
+
+
+def test_stats_merges_cube_and_oracle_gaps(monkeypatch):
+    _seed_cube()
+    queried = []
+
+    async def fake_fetch_columns(query, params, limit=None, offset=None, name=None):
+        queried.append(params)
+        return ColumnSet(["group_key", "total"], [("OK",), (1,)])
+
+    monkeypatch.setattr("app.db.queries.fetch_columns", fake_fetch_columns)
+    monkeypatch.setattr("app.core.deps.decode_token", lambda token: "user")
+
+    resp = TestClient(app).get(
+        "/provisioning/interfaces/stats",
+        params={"from": "2024-01-01T10:00:00", "to": "2024-01-01T10:30:00"},
+        headers={"Authorization": "Bearer dummy"},
+    )
+    rollup.cube.clear()
+    assert resp.status_code == 200
+    assert sorted(resp.json(), key=lambda i: i["group_key"]) == [
+        {"group_key": "E", "total": 2},
+        {"group_key": "OK", "total": 6},
+    ]
+    # Only the inclusive upper instant falls outside the cube.
+    assert queried == [
+        {
+            "date_from": datetime(2024, 1, 1, 10, 30),
+            "date_to": datetime(2024, 1, 1, 10, 30),
+        }
+    ]
+
+
+def test_plan_accepts_aware_bounds(monkeypatch):
+    _seed_cube()
+    monkeypatch.setattr("app.core.config.DB_TIMEZONE", "America/Argentina/Buenos_Aires")
+    plan = rollup.cube.plan(
+        datetime(2024, 1, 1, 13, 5, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, 13, 20, tzinfo=timezone.utc),
+    )
+    rollup.cube.clear()
+    assert plan.lo == datetime(2024, 1, 1, 10, 5)
+    assert plan.hi == datetime(2024, 1, 1, 10, 20)
+
+
+def test_refresh_picks_up_rows_that_leave_pending(monkeypatch):
+    rollup.cube.clear()
+    minute = datetime(2024, 1, 1, 10, 0)
+    status = {"value": "K"}
+    queried = []
+
+    async def fake_fetch_columns(query, params, limit=None, offset=None, name=None):
+        queried.append((params["lo"], params["hi"]))
+        return ColumnSet(
+            ["minute", "status", "error_code", "ne_service", "total"],
+            [(minute,), (status["value"],), (None,), ("SVC",), (1,)],
+        )
+
+    monkeypatch.setattr("app.db.rollup.fetch_columns", fake_fetch_columns)
+    monkeypatch.setattr("app.core.config.ROLLUP_SETTLE_SECONDS", 0)
+    monkeypatch.setattr("app.core.config.ROLLUP_RECHECK_MINUTES", 30)
+
+    asyncio.run(rollup.refresh(datetime(2024, 1, 1, 10, 5)))
+    first = rollup.cube.changed(minute, minute + rollup.MINUTE)
+    assert rollup.cube.totals("status", minute, minute + rollup.MINUTE) == {"K": 1}
+
+    status["value"] = "O"
+    asyncio.run(rollup.refresh(datetime(2024, 1, 1, 10, 6)))
+    assert queried[-1] == (datetime(2024, 1, 1, 9, 36), datetime(2024, 1, 1, 10, 6))
+    assert rollup.cube.totals("status", minute, minute + rollup.MINUTE) == {"O": 1}
+    assert rollup.cube.changed(minute, minute + rollup.MINUTE) > first
+    rollup.cube.clear()
+
+
+def test_refresh_rechecks_older_minutes_while_they_hold_pending_rows(monkeypatch):
+    rollup.cube.clear()
+    old, recent = datetime(2024, 1, 1, 9, 0), datetime(2024, 1, 1, 10, 0)
+    status = {old: "K", recent: "O"}
+    queried = []
+
+    async def fake_fetch_columns(query, params, limit=None, offset=None, name=None):
+        queried.append((params["lo"], params["hi"]))
+        minutes = [m for m in status if params["lo"] <= m < params["hi"]]
+        return ColumnSet(
+            ["minute", "status", "error_code", "ne_service", "total"],
+            [
+                tuple(minutes),
+                tuple(status[m] for m in minutes),
+                (None,) * len(minutes),
+                ("SVC",) * len(minutes),
+                (1,) * len(minutes),
+            ],
+        )
+
+    monkeypatch.setattr("app.db.rollup.fetch_columns", fake_fetch_columns)
+    monkeypatch.setattr("app.core.config.ROLLUP_SETTLE_SECONDS", 0)
+    monkeypatch.setattr("app.core.config.ROLLUP_RECHECK_MINUTES", 30)
+
+    asyncio.run(rollup.refresh(datetime(2024, 1, 1, 10, 5)))
+    assert rollup.cube.pending(datetime(2024, 1, 1, 9, 35)) == [
+        (old, old + rollup.MINUTE)
+    ]
+
+    # 09:00 is far outside the trailing window but is still re-read.
+    status[old] = "E"
+    queried.clear()
+    asyncio.run(rollup.refresh(datetime(2024, 1, 1, 10, 6)))
+    assert queried == [
+        (datetime(2024, 1, 1, 9, 36), datetime(2024, 1, 1, 10, 6)),
+        (old, old + rollup.MINUTE),
+    ]
+    assert rollup.cube.totals("status", old, old + rollup.MINUTE) == {"E": 1}
+
+    # Once settled it is left alone.
+    queried.clear()
+    asyncio.run(rollup.refresh(datetime(2024, 1, 1, 10, 7)))
+    assert queried == [(datetime(2024, 1, 1, 9, 37), datetime(2024, 1, 1, 10, 7))]
+    rollup.cube.clear()
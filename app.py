@@ -5,11 +5,16 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
-from config.db_config import get_connection
-from data.query_builder import build_query
-from services.data_service import get_transacciones, get_actions, get_services
-from visualizations.charts import kpi_cards, error_comparison_bar_chart
-from utils.helpers import normalize_error_message
+from config.db_config import open_pool, session_connection
+from data.query_builder import build_aggregate_query, build_comparison_query, build_query
+from services.data_service import get_comparacion, get_conteos, get_actions, get_services, reporte_memoria
+from services.error_analysis import ErrorAnalysis, analyze
+from services.extract_cache import leer_transacciones
+from services.result_cache import cached, cached_read
+from visualizations.charts import kpi_cards_from_counts, error_delta_bar_chart
+
+# Columnas que usan los widgets del modo crudo; el detalle trae las suyas por página
+COLUMNAS_DASHBOARD = ["pri_id", "pri_action_date", "pri_status", "pri_error_code", "pri_message_error"]
 
 PALETTE = ["#FF7F50", "#F4A261", "#E9C46A", "#2A9D8F", "#264653"]
 px.defaults.template = "plotly_dark"
@@ -22,29 +27,6 @@ except Exception:
     HAS_AUTOREFRESH = False
 
 
-def ensure_conn():
-    """
-    Devuelve una conexión Oracle viva.
-    Si la conexión actual está caída, reintenta usando st.session_state['conn_params'].
-    """
-    conn = st.session_state.get("db_conn")
-    try:
-        if conn:
-            # oracledb/cx_Oracle proveen ping()
-            conn.ping()
-            return conn
-    except Exception:
-        pass  # ping falló → reconectar
-
-    params = st.session_state.get("conn_params")
-    if not params:
-        st.error("No hay parámetros de conexión en sesión. Conectate desde el sidebar.")
-        st.stop()
-
-    new_conn = get_connection(**params)
-    st.session_state["db_conn"] = new_conn
-    return new_conn
-
 st.set_page_config(page_title="Dashboard Provisioning", layout="wide")
 st.markdown("""
 <style>
@@ -69,47 +51,20 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-def _prepare_error_counts_by_message(df: pd.DataFrame) -> pd.DataFrame:
-    if df is None or df.empty:
-        return pd.DataFrame(columns=["pri_message_error", "count"])
-    req = {"pri_status", "pri_message_error"}
-    if not req.issubset(df.columns):
-        return pd.DataFrame(columns=["pri_message_error", "count"])
-    err = df[df["pri_status"] == "E"].copy()
-    if err.empty:
-        return pd.DataFrame(columns=["pri_message_error", "count"])
-    err["pri_message_error"] = err["pri_message_error"].astype(str).fillna("").apply(normalize_error_message)
-    g = (err.groupby("pri_message_error").size().reset_index(name="count").sort_values("count", ascending=False))
-    return g
-
-
-def _prep_error_code_counts(df: pd.DataFrame) -> pd.DataFrame:
-    if df is None or df.empty:
-        return pd.DataFrame(columns=["pri_error_code_str", "pri_message_error_norm", "count"])
-    req = {"pri_status", "pri_error_code", "pri_message_error"}
-    if not req.issubset(df.columns):
-        return pd.DataFrame(columns=["pri_error_code_str", "pri_message_error_norm", "count"])
-    err = df[df["pri_status"] == "E"].copy()
-    if err.empty:
-        return pd.DataFrame(columns=["pri_error_code_str", "pri_message_error_norm", "count"])
-
-    err["pri_error_code_str"] = err["pri_error_code"].astype(str).str.replace(r"\.0$", "", regex=True)
-    err["pri_message_error_norm"] = err["pri_message_error"].astype(str).fillna("").apply(normalize_error_message)
-
-    counts = (err.groupby("pri_error_code_str").size().reset_index(name="count").sort_values("count", ascending=False))
-    top_msg = (err.groupby(["pri_error_code_str","pri_message_error_norm"]).size()
-                 .reset_index(name="n")
-                 .sort_values(["pri_error_code_str","n"], ascending=[True, False])
-                 .drop_duplicates(subset=["pri_error_code_str"]))
-    return counts.merge(top_msg[["pri_error_code_str","pri_message_error_norm"]], on="pri_error_code_str", how="left")
-
-
-def error_codes_bar(df_actual: pd.DataFrame,
-                    df_cmp: pd.DataFrame | None = None,
+def _resumen_deltas(comparacion: pd.DataFrame) -> pd.DataFrame:
+    """Diferencia por código y mensaje, tal como la devuelve la consulta."""
+    summary = analyze(comparacion, "delta").summary
+    return summary[["pri_error_code_str", "pri_message_error_norm", "count"]].rename(columns={
+        "pri_error_code_str": "pri_error_code", "pri_message_error_norm": "pri_message_error", "count": "diferencia",
+    })
+
+
+def error_codes_bar(actual: ErrorAnalysis,
+                    cmp: ErrorAnalysis | None = None,
                     top_n: int = 10,
                     full: bool = False) -> go.Figure:
-    cur = _prep_error_code_counts(df_actual)
-    cmp_df = _prep_error_code_counts(df_cmp)
+    cur = actual.code_counts
+    cmp_df = (cmp or ErrorAnalysis.from_rows(None)).code_counts
 
     if cur.empty and cmp_df.empty:
         fig = go.Figure()
@@ -152,12 +107,12 @@ def error_codes_bar(df_actual: pd.DataFrame,
     return fig
 
 
-def error_messages_bar(df_actual: pd.DataFrame,
-                       df_cmp: pd.DataFrame | None = None,
+def error_messages_bar(actual: ErrorAnalysis,
+                       cmp: ErrorAnalysis | None = None,
                        top_n: int = 10) -> go.Figure:
-    cur = _prepare_error_counts_by_message(df_actual)
-    cmp_df = _prepare_error_counts_by_message(df_cmp) if df_cmp is not None else pd.DataFrame()
-    if cur.empty and (df_cmp is None or cmp_df.empty):
+    cur = actual.message_counts
+    cmp_df = (cmp or ErrorAnalysis.from_rows(None)).message_counts
+    if cur.empty and cmp_df.empty:
         fig = go.Figure()
         fig.add_annotation(text="No data available", x=0.5, y=0.5, showarrow=False, xref="paper", yref="paper")
         fig.update_layout(height=360, margin=dict(l=10, r=10, t=30, b=10))
@@ -179,14 +134,22 @@ def error_messages_bar(df_actual: pd.DataFrame,
     return fig
 
 
-def _resumen_errores(df: pd.DataFrame) -> pd.DataFrame:
-    if df is None or df.empty:
-        return pd.DataFrame(columns=["pri_error_code", "pri_message_error", "cantidad"])
-    err = df[df["pri_status"] == "E"].copy()
-    if err.empty:
-        return pd.DataFrame(columns=["pri_error_code", "pri_message_error", "cantidad"])
-    err["pri_message_error"] = err["pri_message_error"].astype(str).fillna("").apply(normalize_error_message)
-    return err.groupby(["pri_error_code", "pri_message_error"]).size().reset_index(name="cantidad")
+def _consultar(reader, query, binds):
+    """Lee con la caché de resultados: los reruns por widgets no vuelven a Oracle.
+
+    Con auto-actualizar, un resultado no se reutiliza por más que el intervalo.
+    """
+    max_age = intervalo if auto_refresh else None
+    return cached_read(st.session_state["conn_params"], reader, query, binds, session_connection, max_age)
+
+
+def _consultar_transacciones(filtros, query, binds):
+    """Filas crudas armadas desde el extracto por hora (solo se consultan las horas faltantes)."""
+    params = st.session_state["conn_params"]
+    max_age = intervalo if auto_refresh else None
+    return cached(params, "extracto", query, binds,
+                  lambda: leer_transacciones(params, session_connection, **filtros,
+                                             columns=COLUMNAS_DASHBOARD), max_age)
 
 
 with st.sidebar:
@@ -197,10 +160,9 @@ with st.sidebar:
     user = st.text_input("Usuario")
     password = st.text_input("Contraseña", type="password")
     if st.button("Conectar"):
-        conn = get_connection(host, port, service_name, user, password)
-        if conn:
+        pool = open_pool(host, port, service_name, user, password)
+        if pool:
             st.session_state["connection_name"] = f"{host}:{port}/{service_name}"
-            st.session_state["db_conn"] = conn
             st.session_state["conn_params"] = {
                 "host": host,
                 "port": port,
@@ -228,7 +190,7 @@ st.markdown(f"<div class='topbar'>Conectado a: "
             f"<span class='{'pill-ok' if con_name else 'pill-bad'}'>{con_name or 'Sin conexión'}</span>"
             f"</div>", unsafe_allow_html=True)
 
-if "db_conn" not in st.session_state:
+if "conn_params" not in st.session_state:
     st.warning("🔌 No hay conexión activa")
     st.page_link("pages/operaciones_tiempo_real.py", label="⚡ Operaciones en tiempo real", icon="⚡")
     st.stop()
@@ -247,6 +209,8 @@ with st.form("filtros"):
         ne_id = st.text_input("NE ID", key="ne_id")
     with col4:
         comparar = st.checkbox("Comparar con otro periodo", key="comparar")
+        st.checkbox("Modo agregado (conteos en Oracle)", value=True, key="agregado",
+                    help="Los gráficos se calculan en la base; el detalle trae las filas por páginas.")
 
     if comparar:
         cc1, cc2 = st.columns(2)
@@ -259,17 +223,18 @@ with st.form("filtros"):
 
     selected_services = selected_actions = None
     if ne_id:
-        conn = ensure_conn()
-        services = get_services(conn, ne_id)
+        with session_connection() as conn:
+            services = get_services(conn, ne_id)
         selected_services = st.multiselect("Servicio", services)
         if selected_services:
-            actions = get_actions(conn, ne_id, selected_services)
+            with session_connection() as conn:
+                actions = get_actions(conn, ne_id, selected_services)
             selected_actions = st.multiselect("Acción", actions)
 
     submitted = st.form_submit_button("Aplicar filtros")
 
 # Si es el primer render y no hay datos todavía, esperar a que el usuario aplique filtros
-if not submitted and "transacciones_df" not in st.session_state:
+if not submitted and "detalle_consulta" not in st.session_state:
     st.info("Definí filtros y presioná **Aplicar filtros**.")
     st.stop()
 
@@ -283,57 +248,88 @@ else:
     comparar = False
     fecha_ini_cmp = fecha_fin_cmp = None
 
-# Query principal
-conn = ensure_conn()
-query = build_query(
-    fecha_ini,
-    fecha_fin,
-    ne_id or None,
-    selected_actions or None,
-    selected_services or None,
-)
-df = get_transacciones(conn, query)
-st.session_state["transacciones_df"] = df
-
-# Si hay comparación:
+filtros = {
+    "fecha_ini": fecha_ini,
+    "fecha_fin": fecha_fin,
+    "ne_id": ne_id or None,
+    "actions": selected_actions or None,
+    "services": selected_services or None,
+}
+agregado = st.session_state.get("agregado", True)
+freq = "H" if (fecha_fin - fecha_ini) <= datetime.timedelta(days=1) else "D"
+
+if agregado:
+    # Modo agregado: KPIs, serie, estados y errores se cuentan en Oracle y
+    # solo viajan los conteos; el detalle consulta las filas por páginas.
+    consultas = [
+        build_aggregate_query("status", **filtros),
+        build_aggregate_query("hour" if freq == "H" else "day", **filtros),
+        build_aggregate_query("error", **filtros),
+    ]
+    status_counts, df_ts, errores = [_consultar(get_conteos, q, b) for q, b in consultas]
+    status_counts = status_counts.sort_values("cantidad", ascending=False)
+    df_ts = df_ts.sort_values("pri_action_date")
+    errores_actual = analyze(errores, "cantidad")
+    total = int(status_counts["cantidad"].sum())
+    st.session_state.pop("transacciones_df", None)
+else:
+    consultas = [build_query(**filtros, columns=COLUMNAS_DASHBOARD)]
+    df = _consultar_transacciones(filtros, *consultas[0])
+    st.session_state["transacciones_df"] = df
+    if df.empty or "pri_status" not in df.columns:
+        status_counts = pd.DataFrame(columns=["pri_status", "cantidad"])
+        df_ts = pd.DataFrame(columns=["pri_action_date", "cantidad"])
+    else:
+        status_counts = (df["pri_status"].value_counts().rename_axis("pri_status").reset_index(name="cantidad")
+                           .astype({"pri_status": "object"}))
+        df_ts = (df.assign(pri_action_date=pd.to_datetime(df["pri_action_date"]))
+                   .groupby(pd.Grouper(key="pri_action_date", freq=freq)).size().reset_index(name="cantidad"))
+    # Subconjunto de errores y mensajes normalizados se calculan una vez por frame
+    errores_actual = analyze(df)
+    errores = errores_actual.by_code_message
+    total = len(df)
+
+# Lo que necesita la página de detalle para paginar las filas completas
+st.session_state["detalle_consulta"] = {"filtros": filtros, "estados": status_counts, "errores": errores}
+
+# Si hay comparación: conteos de ambos periodos en una sola consulta agregada,
+# sin traer las filas del periodo de comparación.
 if comparar:
-    conn = ensure_conn()
-    query_cmp = build_query(
+    query_cmp, binds_cmp = build_comparison_query(
+        fecha_ini,
+        fecha_fin,
         fecha_ini_cmp,
         fecha_fin_cmp,
         ne_id or None,
         selected_actions or None,
         selected_services or None,
     )
-    df_cmp = get_transacciones(conn, query_cmp)
+    comparacion = _consultar(get_comparacion, query_cmp, binds_cmp)
+    errores_cmp = analyze(comparacion, "count_cmp")
 else:
-    query_cmp = ""
-    df_cmp = pd.DataFrame()
+    query_cmp, binds_cmp = "", {}
+    comparacion = pd.DataFrame()
+    errores_cmp = None
 
 st.caption(f"Última actualización: {datetime.datetime.now():%Y-%m-%d %H:%M:%S}")
-st.success(f"Total de transacciones recuperadas: {len(df)}")
+st.success(f"Total de transacciones{'' if agregado else ' recuperadas'}: {total}")
 if comparar:
-    st.success(f"Total periodo comparación: {len(df_cmp)}")
+    st.success(f"Total periodo comparación: {int(comparacion['count_cmp'].sum())}")
 
-kpi_cards(df)
+kpi_cards_from_counts(status_counts.set_index("pri_status")["cantidad"])
 
 col1, col2 = st.columns(2)
 with col1:
-    if df.empty or "pri_action_date" not in df.columns:
+    if df_ts.empty:
         st.info("No data available")
     else:
-        df_ts = df.assign(pri_action_date=pd.to_datetime(df["pri_action_date"]))
-        freq = "H" if (fecha_fin - fecha_ini) <= datetime.timedelta(days=1) else "D"
-        df_ts = df_ts.groupby(pd.Grouper(key="pri_action_date", freq=freq)).size().reset_index(name="cantidad")
         title = "Transacciones por hora" if freq == "H" else "Transacciones por día"
         fig_time = px.line(df_ts, x="pri_action_date", y="cantidad", labels={"pri_action_date":"Fecha", "cantidad":"Transacciones"}, title=title)
         st.plotly_chart(fig_time, use_container_width=True)
 with col2:
-    if df.empty or "pri_status" not in df.columns:
+    if status_counts.empty:
         st.info("No data available")
     else:
-        status_counts = df["pri_status"].value_counts().reset_index()
-        status_counts.columns = ["pri_status", "cantidad"]
         fig_status = px.bar(status_counts, x="pri_status", y="cantidad", labels={"pri_status":"Estado", "cantidad":"Transacciones"}, title="Transacciones por estado", color="pri_status", color_discrete_sequence=PALETTE)
         st.plotly_chart(fig_status, use_container_width=True)
 
@@ -344,14 +340,14 @@ with c1:
 with c2:
     ver_completo = st.toggle("Ver completo", value=False)
 
-fig_err_codes = error_codes_bar(df, df_cmp if comparar else None, top_n=top_n_codes, full=ver_completo)
+fig_err_codes = error_codes_bar(errores_actual, errores_cmp, top_n=top_n_codes, full=ver_completo)
 st.plotly_chart(fig_err_codes, use_container_width=True)
 
-map_cur = _prep_error_code_counts(df)[["pri_error_code_str", "pri_message_error_norm", "count"]].rename(
+map_cur = errores_actual.code_counts[["pri_error_code_str", "pri_message_error_norm", "count"]].rename(
     columns={"pri_error_code_str":"pri_error_code", "count":"count_actual"}
 )
-if comparar and not df_cmp.empty:
-    map_cmp = _prep_error_code_counts(df_cmp)[["pri_error_code_str","count"]].rename(
+if comparar and not errores_cmp.code_counts.empty:
+    map_cmp = errores_cmp.code_counts[["pri_error_code_str","count"]].rename(
         columns={"pri_error_code_str":"pri_error_code", "count":"count_cmp"}
     )
     table = map_cur.merge(map_cmp, on="pri_error_code", how="left")
@@ -365,21 +361,30 @@ csv_bytes = table.to_csv(index=False).encode("utf-8")
 st.download_button("⬇️ Descargar tabla (CSV)", data=csv_bytes, file_name="errores_por_codigo.csv", mime="text/csv")
 
 with st.expander("Ver errores por mensaje (Top 10)"):
-    st.plotly_chart(error_messages_bar(df, df_cmp if comparar else None, top_n=10), use_container_width=True)
+    st.plotly_chart(error_messages_bar(errores_actual, errores_cmp, top_n=10), use_container_width=True)
 
-if comparar and not df_cmp.empty:
-    resumen_actual = _resumen_errores(df)
-    resumen_cmp = _resumen_errores(df_cmp)
+if comparar and not comparacion.empty:
     with st.expander("Comparación de códigos de error entre periodos"):
-        st.plotly_chart(error_comparison_bar_chart(resumen_actual, resumen_cmp), use_container_width=True)
+        st.plotly_chart(error_delta_bar_chart(_resumen_deltas(comparacion)), use_container_width=True)
+        por_estado = (comparacion.groupby("pri_status")[["count_actual", "count_cmp", "delta"]].sum()
+                                 .reset_index().sort_values("count_actual", ascending=False))
+        st.dataframe(por_estado, use_container_width=True)
 
 st.write("📋 Log de ejecución")
-st.code(query, language="sql")
+for query, binds in consultas:
+    st.code(query, language="sql")
+    st.json({k: str(v) for k, v in binds.items()}, expanded=False)
 if comparar and query_cmp:
     st.code(query_cmp, language="sql")
+    st.json({k: str(v) for k, v in binds_cmp.items()}, expanded=False)
+
+with st.expander("🧠 Memoria de la sesión"):
+    frames = {k: v for k, v in st.session_state.items() if isinstance(v, pd.DataFrame)}
+    st.caption("Tamaño de los DataFrames guardados en la sesión, antes y después de compactar tipos.")
+    st.dataframe(reporte_memoria(frames), use_container_width=True)
 
 with st.expander("KPIs (vista legacy)"):
-    kpi_cards(df)
+    kpi_cards_from_counts(status_counts.set_index("pri_status")["cantidad"])
 
 st.page_link("pages/operaciones_tiempo_real.py", label="⚡ Operaciones en tiempo real", icon="⚡")
 st.page_link("pages/detalle_transacciones.py", label="📄 Ver detalle de transacciones")
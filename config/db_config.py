@@ -1,21 +1,111 @@
 
+import contextlib
+import os
+
 import cx_Oracle
 import streamlit as st
 
+POOL_MIN = int(os.getenv("DASHBOARD_POOL_MIN", "1"))
+POOL_MAX = int(os.getenv("DASHBOARD_POOL_MAX", "10"))
+# Segundos que una sesión puede estar ociosa antes de que acquire() la
+# verifique con un ping; evita el ping manual en cada rerun.
+POOL_PING_INTERVAL = int(os.getenv("DASHBOARD_POOL_PING_INTERVAL", "60"))
+# Milisegundos que acquire() espera una sesión libre con el pool lleno antes
+# de fallar, en lugar de bloquear el rerun indefinidamente.
+POOL_WAIT_TIMEOUT = int(os.getenv("DASHBOARD_POOL_WAIT_TIMEOUT_MS", "10000"))
+
 
 def build_dsn(host, port, service_name):
     """Construye un DSN utilizando los parámetros de conexión."""
     return cx_Oracle.makedsn(host, int(port), service_name=service_name)
 
 
-def get_connection(host, port, service_name, user, password):
-    """Abre una conexión utilizando los datos proporcionados."""
+def _pool_is_open(pool):
+    try:
+        pool.opened
+        return True
+    except cx_Oracle.Error:
+        return False
+
+
+@st.cache_resource(show_spinner=False, validate=_pool_is_open)
+def get_pool(host, port, service_name, user, password):
+    """Devuelve el pool de sesiones compartido para estas credenciales.
+
+    Se crea una única vez por proceso y lo comparten todas las sesiones de
+    navegador que usen los mismos datos de conexión.
+    """
+    pool = cx_Oracle.SessionPool(
+        user=user,
+        password=password,
+        dsn=build_dsn(host, port, service_name),
+        min=POOL_MIN,
+        max=POOL_MAX,
+        increment=1,
+        threaded=True,
+        getmode=cx_Oracle.SPOOL_ATTRVAL_TIMEDWAIT,
+    )
+    pool.ping_interval = POOL_PING_INTERVAL
+    pool.wait_timeout = POOL_WAIT_TIMEOUT
+    return pool
+
+
+@contextlib.contextmanager
+def pooled_connection(params):
+    """Presta una conexión del pool durante el bloque ``with``.
+
+    Si el pool quedó cerrado o roto se descarta sólo esa entrada del cache
+    y se recrea una vez. Un pool que sigue abierto (sin sesiones libres a
+    tiempo, base caída) no se toca y el error se propaga: lo comparten todas
+    las sesiones con las mismas credenciales, por eso nunca se cierra acá.
+    """
+    pool = get_pool(**params)
     try:
-        dsn = build_dsn(host, port, service_name)
-        if "db_conn" in st.session_state:
-            st.session_state["db_conn"].close()
-        st.session_state["db_conn"] = cx_Oracle.connect(user, password, dsn)
-        return st.session_state["db_conn"]
+        conn = pool.acquire()
+    except cx_Oracle.Error:
+        if _pool_is_open(pool):
+            raise
+        get_pool.clear(**params)
+        conn = get_pool(**params).acquire()
+    try:
+        yield conn
+    finally:
+        conn.close()  # devuelve la sesión al pool
+
+
+@contextlib.contextmanager
+def session_connection():
+    """Conexión del pool para los parámetros guardados en la sesión."""
+    params = st.session_state.get("conn_params")
+    if not params:
+        st.error("No hay parámetros de conexión en sesión. Conectate desde el sidebar.")
+        st.stop()
+    with pooled_connection(params) as conn:
+        yield conn
+
+
+def open_pool(host, port, service_name, user, password):
+    """Valida las credenciales contra el pool compartido.
+
+    Devuelve el pool si se pudo obtener y verificar una sesión, o ``None``
+    mostrando el error.
+    """
+    params = {
+        "host": host,
+        "port": port,
+        "service_name": service_name,
+        "user": user,
+        "password": password,
+    }
+    try:
+        with pooled_connection(params) as conn:
+            conn.ping()
+        return get_pool(**params)
     except cx_Oracle.Error as e:
         st.error(f"Error de conexión: {e}")
         return None
+
+
+def get_connection(host, port, service_name, user, password):
+    """Abre una conexión dedicada (para scripts fuera de Streamlit)."""
+    return cx_Oracle.connect(user, password, build_dsn(host, port, service_name))
@@ -1,68 +1,239 @@
 
 """Helpers to construct SQL queries with optional filters."""
 
-DATE_FORMAT = "%d-%m-%Y %H:%M:%S"
-ORACLE_DATE_FORMAT = "DD-MM-YYYY HH24:MI:SS"
+import re
+from functools import lru_cache
+from pathlib import Path
 
+SQL_DIR = Path(__file__).resolve().parents[1] / "sql"
+BASE_QUERY_PATH = SQL_DIR / "base_query.sql"
+COMPARISON_QUERY_PATH = SQL_DIR / "comparison_query.sql"
+AGGREGATE_QUERY_PATH = SQL_DIR / "aggregate_query.sql"
 
-def build_query(fecha_ini, fecha_fin=None, ne_id=None, actions=None, services=None):
-    """Load base SQL and inject formatted filters.
+# Same normalization as utils.helpers.normalize_error_message, in Oracle.
+NORMALIZED_MESSAGE_SQL = (
+    "TRIM(REGEXP_REPLACE(REGEXP_REPLACE(a.pri_message_error, '[0-9]+', ''), "
+    "'[[:space:]]+', ' '))"
+)
 
-    The base query contains the placeholders ``:fecha_ini`` and
-    ``:fecha_fin``. This function replaces those placeholders with Oracle
-    ``TO_DATE`` expressions formatted as ``DD-MM-YYYY HH24:MI:SS``. If
-    ``fecha_fin`` is not provided, the ``:fecha_fin`` placeholder is
-    replaced with ``SYSDATE``. When ``ne_id`` or lists of ``actions`` or
-    ``services`` are provided, respective ``AND`` clauses are appended using
-    the ``:ne_id``, ``:action`` and ``:service`` placeholders defined in
-    ``sql/base_query.sql``.
+_COLUMN_RE = re.compile(r"^pri_[a-z_]+$")
+# Oracle rejects IN lists with more elements than this (ORA-01795).
+IN_LIST_LIMIT = 1000
 
+# kind -> (group by expressions, select list)
+AGGREGATES = {
+    "status": ("a.pri_status", "a.pri_status"),
+    "hour": (
+        "TRUNC(a.pri_action_date, 'HH24')",
+        "TRUNC(a.pri_action_date, 'HH24') AS pri_action_date",
+    ),
+    "day": (
+        "TRUNC(a.pri_action_date, 'DD')",
+        "TRUNC(a.pri_action_date, 'DD') AS pri_action_date",
+    ),
+    "error": (
+        f"a.pri_error_code, {NORMALIZED_MESSAGE_SQL}",
+        f"a.pri_error_code, {NORMALIZED_MESSAGE_SQL} AS pri_message_error",
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def _load_sql(path):
+    return path.read_text(encoding="utf-8")
+
+
+def load_base_query():
+    """Return the text of ``sql/base_query.sql``, read once per process."""
+    return _load_sql(BASE_QUERY_PATH)
+
+
+def _bucket_size(n):
+    """Smallest power of two greater than or equal to ``n``."""
+    size = 1
+    while size < n:
+        size *= 2
+    return size
+
+
+def in_list_binds(column, prefix, values):
+    """Build an ``AND column IN (...)`` clause with one bind per value.
+
+    The list is padded up to the next power of two by repeating its last
+    value, so lists of 3 and 4 elements share the same statement text and
+    Oracle keeps a handful of cursors instead of one per list length.
+
+    Longer lists are split into ``IN`` lists of at most ``IN_LIST_LIMIT``
+    joined with ``OR``.
+
+    Returns the clause and the dictionary of bind values.
     """
+    values = list(dict.fromkeys(values))
+    padded = values + [values[-1]] * (_bucket_size(len(values)) - len(values))
+    names = [f"{prefix}_{i}" for i in range(len(padded))]
+    lists = [
+        f"{column} IN ({', '.join(':' + n for n in names[i : i + IN_LIST_LIMIT])})"
+        for i in range(0, len(names), IN_LIST_LIMIT)
+    ]
+    if len(lists) == 1:
+        return f"AND {lists[0]}", dict(zip(names, padded))
+    return f"AND ({' OR '.join(lists)})", dict(zip(names, padded))
+
+
+def _date_range(fecha_ini, fecha_fin):
+    binds = {"fecha_ini": fecha_ini}
+    if fecha_fin:
+        binds["fecha_fin"] = fecha_fin
+        return ":fecha_fin", binds
+    return "SYSDATE", binds
+
 
-    with open("sql/base_query.sql", "r", encoding="utf-8") as f:
-        query = f.read()
+def select_list(columns=None):
+    """``a.col, ...`` for the given column names, or ``a.*`` when ``None``."""
+    if not columns:
+        return "a.*"
+    for column in columns:
+        if not _COLUMN_RE.match(column):
+            raise ValueError(f"Invalid column name: {column!r}")
+    return ", ".join(f"a.{column}" for column in columns)
 
-    fecha_ini_str = fecha_ini.strftime(DATE_FORMAT)
-    query = query.replace(
-        ":fecha_ini",
-        f"TO_DATE('{fecha_ini_str}', '{ORACLE_DATE_FORMAT}')",
+
+def build_query(
+    fecha_ini, fecha_fin=None, ne_id=None, actions=None, services=None, columns=None
+):
+    """Build the base transactions query and its bind variables.
+
+    The base query in ``sql/base_query.sql`` filters on
+    ``:fecha_ini``/``:fecha_fin``, which are bound as datetimes. If
+    ``fecha_fin`` is not provided ``SYSDATE`` is used instead. When
+    ``ne_id`` or lists of ``actions`` or ``services`` are provided the
+    ``{ne_id}``, ``{action}`` and ``{service}`` slots of the template are
+    filled with ``AND`` clauses that reference bind variables, so the
+    statement text only depends on which filters are present (and on the
+    bucketed list sizes), never on their values. ``columns`` restricts the
+    select list to the columns a view needs (all columns by default).
+
+    Returns a ``(query, binds)`` tuple ready for ``pd.read_sql(query, conn,
+    params=binds)``.
+    """
+
+    fecha_fin_sql, binds = _date_range(fecha_ini, fecha_fin)
+    slots, filter_binds = _filter_slots(ne_id, actions, services)
+    binds.update(filter_binds)
+    query = load_base_query().format(
+        columns=select_list(columns), fecha_fin=fecha_fin_sql, **slots
     )
+    return query, binds
 
-    if fecha_fin:
-        fecha_fin_str = fecha_fin.strftime(DATE_FORMAT)
-        query = query.replace(
-            ":fecha_fin",
-            f"TO_DATE('{fecha_fin_str}', '{ORACLE_DATE_FORMAT}')",
-        )
-    else:
-        query = query.replace(":fecha_fin", "SYSDATE")
 
+def build_aggregate_query(
+    kind, fecha_ini, fecha_fin=None, ne_id=None, actions=None, services=None
+):
+    """Build a ``COUNT(*) AS cantidad`` query over the same rows as :func:`build_query`.
+
+    ``kind`` selects the grouping (see ``AGGREGATES``): ``status`` (KPIs and
+    status chart), ``hour``/``day`` (time series, ``pri_action_date`` is the
+    truncated date) or ``error`` (error rows by ``pri_error_code`` and
+    normalized ``pri_message_error``). Only the aggregated rows leave the
+    database.
+    """
+    group_by, columns = AGGREGATES[kind]
+    fecha_fin_sql, binds = _date_range(fecha_ini, fecha_fin)
+    slots, filter_binds = _filter_slots(ne_id, actions, services)
+    binds.update(filter_binds)
+    slots["status"] = ""
+    if kind == "error":
+        slots["status"] = "AND a.pri_status = :status"
+        binds["status"] = "E"
+    query = _load_sql(AGGREGATE_QUERY_PATH).format(
+        columns=columns, group_by=group_by, fecha_fin=fecha_fin_sql, **slots
+    )
+    return query, binds
+
+
+def build_page_query(
+    fecha_ini,
+    fecha_fin=None,
+    ne_id=None,
+    actions=None,
+    services=None,
+    status=None,
+    error_code=None,
+    message=None,
+    page=1,
+    page_size=100,
+):
+    """Build the query for one page of raw rows, newest first.
+
+    Same filters as :func:`build_query`, plus optional ``status``,
+    ``error_code`` and normalized ``message``. Paging uses ``ROWNUM`` so the
+    statement text does not depend on the page; the ``rn`` column is part of
+    the result.
+    """
+    query, binds = build_query(fecha_ini, fecha_fin, ne_id, actions, services)
+    if status:
+        query += "\nAND a.pri_status = :status"
+        binds["status"] = status
+    if error_code is not None:
+        query += "\nAND a.pri_error_code = :error_code"
+        binds["error_code"] = error_code
+    if message is not None:
+        query += f"\nAND {NORMALIZED_MESSAGE_SQL} = :message"
+        binds["message"] = message
+    query = (
+        "SELECT * FROM (SELECT p.*, ROWNUM AS rn FROM (\n"
+        f"{query}\nORDER BY a.pri_action_date DESC, a.pri_id DESC"
+        ") p WHERE ROWNUM <= :last_row) WHERE rn > :first_row"
+    )
+    binds["first_row"] = (page - 1) * page_size
+    binds["last_row"] = page * page_size
+    return query, binds
+
+
+def _filter_slots(ne_id, actions, services):
+    """Fill the ``{ne_id}``, ``{action}`` and ``{service}`` template slots."""
+    binds = {}
+    slots = {"ne_id": "", "action": "", "service": ""}
     if ne_id:
-        query = query.replace(
-            ":ne_id",
-            f"AND a.pri_ne_id = '{ne_id}'",
-        )
-    else:
-        query = query.replace(":ne_id", "")
+        slots["ne_id"] = "AND a.pri_ne_id = :ne_id"
+        binds["ne_id"] = ne_id
 
     if actions:
-        formatted_actions = "', '".join(actions)
-        query = query.replace(
-            ":action",
-            f"AND a.pri_action IN ('{formatted_actions}')",
+        slots["action"], action_binds = in_list_binds("a.pri_action", "action", actions)
+        binds.update(action_binds)
 
+    if services:
+        slots["service"], service_binds = in_list_binds(
+            "a.pri_ne_service", "service", services
         )
-    else:
-        query = query.replace(":action", "")
+        binds.update(service_binds)
+    return slots, binds
 
-    if services:
-        formatted_services = "', '".join(services)
-        query = query.replace(
-            ":service",
-            f"AND a.pri_ne_service IN ('{formatted_services}')",
 
-        )
-    else:
-        query = query.replace(":service", "")
+def build_comparison_query(
+    fecha_ini,
+    fecha_fin,
+    fecha_ini_cmp,
+    fecha_fin_cmp,
+    ne_id=None,
+    actions=None,
+    services=None,
+):
+    """Build the two-period comparison query and its bind variables.
 
-    return query
+    ``sql/comparison_query.sql`` scans both ranges in a single statement and
+    uses conditional aggregation to return, per status, error code and
+    normalized message (digits removed, whitespace collapsed, like
+    :func:`utils.helpers.normalize_error_message`), ``count_actual``,
+    ``count_cmp`` and their ``delta``. Filters are the same as in
+    :func:`build_query`.
+    """
+    binds = {
+        "fecha_ini": fecha_ini,
+        "fecha_fin": fecha_fin,
+        "fecha_ini_cmp": fecha_ini_cmp,
+        "fecha_fin_cmp": fecha_fin_cmp,
+    }
+    slots, filter_binds = _filter_slots(ne_id, actions, services)
+    binds.update(filter_binds)
+    return _load_sql(COMPARISON_QUERY_PATH).format(**slots), binds
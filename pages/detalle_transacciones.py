@@ -1,6 +1,10 @@
+import math
+
 import streamlit as st
 import pandas as pd
-from utils.helpers import normalize_error_message
+from config.db_config import session_connection
+from data.query_builder import build_page_query
+from services.data_service import get_pagina
 from utils.sql_utils import generar_insert
 
 try:
@@ -21,32 +25,50 @@ st.markdown(
 )
 st.title("📄 Detalle de transacciones")
 
-df = st.session_state.get("transacciones_df")
+consulta = st.session_state.get("detalle_consulta")
 
-if df is None:
-    st.warning("No hay datos de transacciones en la sesión")
-else:
-    estados = ["Todos"] + df["pri_status"].dropna().unique().tolist()
-    estado = st.selectbox("Filtrar por estado", estados)
 
-    df_filtrado = (
-        df if estado == "Todos" else df[df["pri_status"] == estado]
-    ).copy()
+def _detalle_paginado(consulta):
+    """Las filas completas se consultan a Oracle de a una página."""
+    estados_df = consulta["estados"]
+    errores_df = consulta["errores"]
+    estados = ["Todos"] + estados_df["pri_status"].dropna().tolist()
+    estado = st.selectbox("Filtrar por estado", estados)
 
-    if estado == "E":
-        errores = ["Todos"] + df_filtrado["pri_error_code"].dropna().unique().tolist()
+    total = int(estados_df["cantidad"].sum())
+    filtro = {"status": None if estado == "Todos" else estado}
+    if estado != "Todos":
+        total = int(estados_df.loc[estados_df["pri_status"] == estado, "cantidad"].sum())
+    if estado == "E" and errores_df is not None and not errores_df.empty:
+        errores = ["Todos"] + errores_df["pri_error_code"].dropna().unique().tolist()
         error = st.selectbox("Tipo de error", errores)
+        sub = errores_df
         if error != "Todos":
-            df_filtrado = df_filtrado[df_filtrado["pri_error_code"] == error].copy()
-
-        df_filtrado["pri_message_error"] = df_filtrado["pri_message_error"].apply(
-            normalize_error_message
-        )
-        mensajes = ["Todos"] + df_filtrado["pri_message_error"].dropna().unique().tolist()
+            sub = sub[sub["pri_error_code"] == error]
+            filtro["error_code"] = error
+        mensajes = ["Todos"] + sub["pri_message_error"].dropna().unique().tolist()
         mensaje = st.selectbox("Descripción del error", mensajes)
         if mensaje != "Todos":
-            df_filtrado = df_filtrado[df_filtrado["pri_message_error"] == mensaje]
+            sub = sub[sub["pri_message_error"] == mensaje]
+            filtro["message"] = mensaje
+        total = int(sub["cantidad"].sum())
 
+    c1, c2 = st.columns(2)
+    with c1:
+        page_size = st.selectbox("Filas por página", [50, 100, 500, 1000], index=1)
+    with c2:
+        paginas = max(1, math.ceil(total / page_size))
+        page = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, value=1)
+
+    query, binds = build_page_query(
+        **consulta["filtros"], **filtro, page=int(page), page_size=page_size
+    )
+    with session_connection() as conn:
+        return get_pagina(conn, query, binds)
+
+
+if consulta is not None:
+    df_filtrado = _detalle_paginado(consulta)
     if HAS_AGGRID:
         AgGrid(df_filtrado)
     else:
@@ -54,15 +76,14 @@ else:
 
     if not df_filtrado.empty:
         inserts = [generar_insert(fila.to_dict()) for _, fila in df_filtrado.iterrows()]
-
-        sql_contenido = "\n".join(inserts)
-
         st.download_button(
-            "Generar insert SQL",
-            data=sql_contenido,
+            "Generar insert SQL (página actual)",
+            data="\n".join(inserts),
             file_name="transacciones_insert.sql",
             mime="application/sql",
         )
+else:
+    st.warning("No hay datos de transacciones en la sesión")
 
 if st.button("Volver"):
     st.switch_page("app.py")
@@ -4,15 +4,23 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 
+from config.db_config import session_connection
 from data.query_builder import build_query
-from services.data_service import get_transacciones
+from services.data_service import reporte_memoria
+from services.extract_cache import leer_transacciones
 from ml.predict import score_anomalies
-from utils.helpers import normalize_error_message
+from utils.helpers import normalize_error_messages
 
 st.title("🧭 Detección de anomalías")
 
+# Columnas que usan las features del modelo y la tabla de resultados
+COLUMNAS_ANOMALIAS = [
+    "pri_id", "pri_action_date", "pri_status", "pri_error_code",
+    "pri_ne_service", "pri_action", "pri_message_error",
+]
+
 # -------------- Requisito: conexión activa --------------
-if "db_conn" not in st.session_state:
+if "conn_params" not in st.session_state:
     st.warning("🔌 No hay conexión activa")
     st.stop()
 
@@ -86,18 +94,29 @@ def _get_filters_with_shortcuts():
 fecha_ini, fecha_fin, ne_id, selected_actions, selected_services, buscar = _get_filters_with_shortcuts()
 
 # -------------- Construcción de query & carga con control de botón --------------
-query = build_query(
+query, binds = build_query(
     fecha_ini,
     fecha_fin,
     ne_id or None,
     selected_actions or None,
     selected_services or None,
+    COLUMNAS_ANOMALIAS,
 )
 
 # Cargar datos al apretar Buscar o en el primer render
 if buscar or "anom_first" not in st.session_state:
     st.session_state["anom_first"] = True
-    df = get_transacciones(st.session_state["db_conn"], query)
+    # Desde el extracto por hora: mover o ampliar la ventana solo trae las horas nuevas
+    df = leer_transacciones(
+        st.session_state["conn_params"],
+        session_connection,
+        fecha_ini,
+        fecha_fin,
+        ne_id or None,
+        selected_actions or None,
+        selected_services or None,
+        COLUMNAS_ANOMALIAS,
+    )
     st.session_state["anom_df"] = df
 else:
     df = st.session_state.get("anom_df", pd.DataFrame())
@@ -105,7 +124,9 @@ else:
 # -------------- Diagnóstico (SQL y conteos) --------------
 with st.expander("🔧 Ver SQL y conteos"):
     st.code(query, language="sql")
+    st.json({k: str(v) for k, v in binds.items()}, expanded=False)
     st.write(f"Total filas: **{len(df)}**")
+    st.dataframe(reporte_memoria({"anom_df": df}), use_container_width=True)
     if not df.empty and "pri_status" in df.columns:
         st.write("Distribución por pri_status:")
         st.dataframe(
@@ -138,12 +159,9 @@ scored = scored.copy()
 scored["pri_error_code_str"] = (
     scored.get("pri_error_code", "").astype(str).str.replace(r"\.0$", "", regex=True)
 )
-scored["pri_message_error_norm"] = (
-    scored.get("pri_message_error", "")
-    .astype(str)
-    .fillna("")
-    .apply(normalize_error_message)
-)
+scored["pri_message_error_norm"] = normalize_error_messages(
+    scored.get("pri_message_error", pd.Series("", index=scored.index))
+).fillna("")
 
 # -------------- Controles UI de visualización --------------
 st.subheader("Resultados")
@@ -12,7 +12,7 @@ from datetime import datetime
 fecha_ini = datetime(2025, 1, 1)
 fecha_fin = datetime(2025, 8, 1)
 
-query = build_query(fecha_ini, fecha_fin, ne_id=None, selected_actions=None, selected_services=None)
-df = get_transacciones(conn, query)
+query, binds = build_query(fecha_ini, fecha_fin, ne_id=None, actions=None, services=None)
+df = get_transacciones(conn, query, binds)
 print("Entrenando con filas:", len(df))
 print("Modelo guardado en:", train_isoforest(df, contamination=0.02))
@@ -1,10 +1,86 @@
 import pandas as pd
 
+from data.query_builder import in_list_binds
 
-def get_transacciones(conn, query):
-    """Retrieve transactions and normalize column names."""
-    df = pd.read_sql(query, conn)
+
+# Low-cardinality columns kept as ``category`` (integer codes plus one copy of
+# each distinct value) instead of one Python object per row. Raw
+# ``pri_message_error`` texts embed ids and timings, so they stay objects.
+CATEGORY_COLUMNS = (
+    "pri_status",
+    "pri_error_code",
+    "pri_ne_service",
+    "pri_action",
+    "pri_ne_id",
+)
+
+
+def get_transacciones(conn, query, binds=None):
+    """Retrieve transactions and normalize column names.
+
+    ``query`` and ``binds`` are the pair returned by
+    :func:`data.query_builder.build_query`.
+    """
+    df = pd.read_sql(query, conn, params=binds or {})
+    df.columns = df.columns.str.lower()
+    return df
+
+
+def compactar(df, columns=CATEGORY_COLUMNS):
+    """Convert the low-cardinality ``columns`` present in ``df`` to ``category``.
+
+    The size before conversion is kept in ``df.attrs["bytes_sin_compactar"]``
+    for :func:`reporte_memoria`.
+    """
+    before = int(df.memory_usage(index=True, deep=True).sum())
+    df = df.astype({c: "category" for c in columns if c in df.columns})
+    df.attrs["bytes_sin_compactar"] = before
+    return df
+
+
+def reporte_memoria(frames):
+    """Rows, columns and MB (before/after :func:`compactar`) per named frame."""
+    rows = []
+    for name, df in frames.items():
+        after = int(df.memory_usage(index=True, deep=True).sum())
+        before = df.attrs.get("bytes_sin_compactar", after)
+        rows.append(
+            {
+                "frame": name,
+                "filas": len(df),
+                "columnas": df.shape[1],
+                "mb_antes": round(before / 2**20, 2),
+                "mb_despues": round(after / 2**20, 2),
+            }
+        )
+    return pd.DataFrame(
+        rows, columns=["frame", "filas", "columnas", "mb_antes", "mb_despues"]
+    )
+
+
+def get_conteos(conn, query, binds):
+    """Run a query from :func:`data.query_builder.build_aggregate_query`."""
+    df = pd.read_sql(query, conn, params=binds)
+    df.columns = df.columns.str.lower()
+    df["cantidad"] = df["cantidad"].astype("int64")
+    return df
+
+
+def get_pagina(conn, query, binds):
+    """Run a query from :func:`data.query_builder.build_page_query`."""
+    return get_transacciones(conn, query, binds).drop(columns="rn")
+
+
+def get_comparacion(conn, query, binds):
+    """Run the query from :func:`data.query_builder.build_comparison_query`.
+
+    Returns one row per status, error code and normalized message with
+    ``count_actual``, ``count_cmp`` and ``delta``.
+    """
+    df = pd.read_sql(query, conn, params=binds)
     df.columns = df.columns.str.lower()
+    counts = ["count_actual", "count_cmp", "delta"]
+    df[counts] = df[counts].astype("int64")
     return df
 
 
@@ -16,8 +92,9 @@ def get_actions(conn, ne_id, services=None):
     )
     params = {"ne_id": ne_id}
     if services:
-        formatted_services = "', '".join(services)
-        query += f" AND pri_ne_service IN ('{formatted_services}')"
+        clause, service_binds = in_list_binds("pri_ne_service", "service", services)
+        query += f" {clause}"
+        params.update(service_binds)
     df = pd.read_sql(query, conn, params=params)
     df.columns = df.columns.str.lower()
     return df["pri_action"].tolist()
@@ -34,10 +111,16 @@ def get_services(conn, ne_id):
     return df["pri_ne_service"].tolist()
 
 
-def get_realtime_transacciones(conn, start_time, ne_id=None, ne_group=None):
-    """Retrieve real-time transactions since ``start_time``."""
+def get_realtime_transacciones(conn, start_time, ne_id=None, ne_group=None, after=None):
+    """Retrieve real-time transactions since ``start_time``.
+
+    ``after`` is an optional ``(pri_action_date, pri_id)`` watermark: only
+    rows strictly after it, in that order, are returned, so a poller can
+    fetch just what is new since its previous call.
+    """
     query = (
-        "SELECT pri_ne_id, pri_ne_group, pri_status, pri_error_code, pri_action_date "
+        "SELECT pri_id, pri_ne_id, pri_ne_group, pri_status, pri_error_code, "
+        "pri_action_date "
         "FROM swp_provisioning_interfaces "
         "WHERE pri_action_date >= TO_DATE(:start_time, 'DD-MM-YYYY HH24:MI:SS')"
     )
@@ -48,6 +131,35 @@ def get_realtime_transacciones(conn, start_time, ne_id=None, ne_group=None):
     if ne_group:
         query += " AND pri_ne_group = :ne_group"
         params["ne_group"] = ne_group
+    if after is not None:
+        query += (
+            " AND (pri_action_date > :after_date"
+            " OR (pri_action_date = :after_date AND pri_id > :after_id))"
+        )
+        params["after_date"], params["after_id"] = after
+    query += " ORDER BY pri_action_date, pri_id"
     df = pd.read_sql(query, conn, params=params)
     df.columns = df.columns.str.lower()
     return df
+
+
+def get_estados(conn, pri_ids, chunk_size=512):
+    """Return ``pri_id``, ``pri_status`` and ``pri_error_code`` for ``pri_ids``.
+
+    The ids are queried in chunks of ``chunk_size`` (Oracle accepts at most
+    1000 elements per ``IN`` list).
+    """
+    pri_ids = list(pri_ids)
+    frames = []
+    for i in range(0, len(pri_ids), chunk_size):
+        clause, binds = in_list_binds("pri_id", "id", pri_ids[i : i + chunk_size])
+        query = (
+            "SELECT pri_id, pri_status, pri_error_code "
+            f"FROM swp_provisioning_interfaces WHERE 1=1 {clause}"
+        )
+        frames.append(pd.read_sql(query, conn, params=binds))
+    if not frames:
+        return pd.DataFrame(columns=["pri_id", "pri_status", "pri_error_code"])
+    df = pd.concat(frames, ignore_index=True)
+    df.columns = df.columns.str.lower()
+    return df
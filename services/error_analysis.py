@@ -0,0 +1,177 @@
+"""Error breakdowns of a transaction frame, computed once per frame."""
+
+import threading
+import weakref
+from collections import OrderedDict
+from functools import cached_property
+
+import pandas as pd
+
+from services.result_cache import version_of
+from utils.helpers import normalize_error_messages
+
+MEMO_SIZE = 64
+
+_SUMMARY_COLUMNS = [
+    "pri_error_code",
+    "pri_error_code_str",
+    "pri_message_error_norm",
+    "count",
+]
+
+
+class ErrorAnalysis:
+    """Error rows grouped by code and normalized message, plus what derives from it.
+
+    Build it with :meth:`from_rows` (raw transactions: the error subset is
+    taken and its messages normalized once) or :meth:`from_counts`
+    (already aggregated rows such as ``build_aggregate_query("error")`` or
+    the comparison query). Every table below comes from ``summary``, which
+    has one row per ``pri_error_code`` / ``pri_message_error_norm``.
+    """
+
+    def __init__(self, summary):
+        self.summary = summary
+
+    @classmethod
+    def from_rows(cls, df):
+        if (
+            df is None
+            or df.empty
+            or not {"pri_status", "pri_error_code", "pri_message_error"}
+            <= set(df.columns)
+        ):
+            return cls(_empty_summary())
+        errors = df[df["pri_status"] == "E"]
+        messages = normalize_error_messages(errors["pri_message_error"]).fillna("")
+        counts = (
+            errors.groupby(
+                [errors["pri_error_code"], messages.rename("pri_message_error_norm")],
+                dropna=False,
+                observed=True,
+            )
+            .size()
+            .reset_index(name="count")
+        )
+        return cls(_summary(counts))
+
+    @classmethod
+    def from_counts(cls, agg, value="cantidad"):
+        """``agg`` has ``pri_error_code``, normalized ``pri_message_error`` and ``value``."""
+        if agg is None or agg.empty:
+            return cls(_empty_summary())
+        if "pri_status" in agg.columns:
+            agg = agg[agg["pri_status"] == "E"]
+        counts = (
+            agg.groupby(
+                [
+                    agg["pri_error_code"],
+                    agg["pri_message_error"]
+                    .fillna("")
+                    .rename("pri_message_error_norm"),
+                ],
+                dropna=False,
+            )[value]
+            .sum()
+            .reset_index(name="count")
+        )
+        return cls(_summary(counts[counts["count"] != 0]))
+
+    @property
+    def total(self):
+        return int(self.summary["count"].sum())
+
+    @cached_property
+    def code_counts(self):
+        """``pri_error_code_str``, ``count`` and the most frequent message per code."""
+        counts = (
+            self.summary.groupby("pri_error_code_str")["count"]
+            .sum()
+            .reset_index()
+            .sort_values("count", ascending=False, kind="stable")
+        )
+        top_msg = self.summary.sort_values(
+            "count", ascending=False, kind="stable"
+        ).drop_duplicates(subset=["pri_error_code_str"])
+        return counts.merge(
+            top_msg[["pri_error_code_str", "pri_message_error_norm"]],
+            on="pri_error_code_str",
+            how="left",
+        )[["pri_error_code_str", "pri_message_error_norm", "count"]]
+
+    @cached_property
+    def message_counts(self):
+        """``pri_message_error`` (normalized) and ``count``, most frequent first."""
+        return (
+            self.summary.groupby("pri_message_error_norm")["count"]
+            .sum()
+            .reset_index()
+            .rename(columns={"pri_message_error_norm": "pri_message_error"})
+            .sort_values("count", ascending=False, kind="stable", ignore_index=True)
+        )
+
+    @cached_property
+    def by_code_message(self):
+        """``pri_error_code`` (original values), ``pri_message_error``, ``cantidad``."""
+        return self.summary[
+            ["pri_error_code", "pri_message_error_norm", "count"]
+        ].rename(
+            columns={"pri_message_error_norm": "pri_message_error", "count": "cantidad"}
+        )
+
+
+def _empty_summary():
+    return pd.DataFrame(columns=_SUMMARY_COLUMNS)
+
+
+def _summary(counts):
+    codes = counts["pri_error_code"].astype(object)
+    return pd.DataFrame(
+        {
+            "pri_error_code": codes,
+            # Missing codes get a label of their own instead of being dropped.
+            "pri_error_code_str": codes.fillna("nan")
+            .astype(str)
+            .str.replace(r"\.0$", "", regex=True),
+            "pri_message_error_norm": counts["pri_message_error_norm"].astype(object),
+            "count": counts["count"].astype("int64"),
+        }
+    )[_SUMMARY_COLUMNS]
+
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def analyze(df, value=None):
+    """Memoized :class:`ErrorAnalysis` for ``df``.
+
+    ``value=None`` treats ``df`` as raw rows, otherwise as aggregated rows
+    counted in column ``value``. The copies of one cached result that
+    :meth:`services.result_cache.ResultCache.fetch` hands out on each rerun
+    share a key (with their columns and shape, in case a caller added
+    some); any other frame, including one derived from such a copy, is
+    keyed by identity for as long as it is alive.
+    """
+    version = version_of(df) if df is not None else None
+    if version is not None:
+        key = ("version", version, df.shape, tuple(df.columns), value)
+        ref = None
+    else:
+        key = ("id", id(df), value)
+        ref = weakref.ref(df) if df is not None else None
+    with _memo_lock:
+        entry = _memo.get(key)
+        if entry is not None and (entry[0] is None or entry[0]() is df):
+            _memo.move_to_end(key)
+            return entry[1]
+    result = (
+        ErrorAnalysis.from_rows(df)
+        if value is None
+        else ErrorAnalysis.from_counts(df, value)
+    )
+    with _memo_lock:
+        _memo[key] = (ref, result)
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    return result
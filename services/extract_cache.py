@@ -0,0 +1,213 @@
+"""On-disk extract of provisioning rows partitioned by hour.
+
+A date range is assembled from one Parquet file per hour plus a query for
+the hours that are not on disk yet, so shifting or widening a window only
+fetches the new hours. Hours that are over (plus a grace period for late
+rows) are immutable and written once; the open hour is always re-read, and
+so is any hour that still holds rows in a pending status, since those rows
+change status long after the grace period.
+"""
+
+import datetime
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from data.query_builder import build_query
+from services.data_service import compactar, get_transacciones
+from services.realtime_feed import PENDING_STATUSES
+
+try:
+    import pyarrow  # noqa: F401
+
+    HAS_PARQUET = True
+except Exception:
+    HAS_PARQUET = False
+
+CACHE_DIR = Path(
+    os.getenv(
+        "DASHBOARD_EXTRACT_DIR", Path(tempfile.gettempdir()) / "dashboard_extracts"
+    )
+)
+# An hour is considered closed this long after it ends.
+CLOSE_GRACE = datetime.timedelta(
+    minutes=float(os.getenv("DASHBOARD_EXTRACT_GRACE_MINUTES", "5"))
+)
+RETENTION = datetime.timedelta(
+    days=float(os.getenv("DASHBOARD_EXTRACT_RETENTION_DAYS", "31"))
+)
+HOUR = datetime.timedelta(hours=1)
+_NAME_FORMAT = "%Y%m%d%H"
+
+
+def hours(fecha_ini, fecha_fin):
+    """Start of every hour overlapping ``[fecha_ini, fecha_fin]``."""
+    hour = fecha_ini.replace(minute=0, second=0, microsecond=0)
+    result = []
+    while hour <= fecha_fin:
+        result.append(hour)
+        hour += HOUR
+    return result
+
+
+def runs(hour_list):
+    """Group sorted hour starts into contiguous ``(start, end)`` ranges, end exclusive."""
+    result = []
+    for hour in hour_list:
+        if result and result[-1][1] == hour:
+            result[-1] = (result[-1][0], hour + HOUR)
+        else:
+            result.append((hour, hour + HOUR))
+    return result
+
+
+def pending_hours(df):
+    """Start of every hour holding a row whose status is still pending."""
+    if "pri_status" not in df.columns:
+        return set()
+    fechas = pd.to_datetime(
+        df.loc[df["pri_status"].isin(PENDING_STATUSES), "pri_action_date"]
+    )
+    return {hour.to_pydatetime() for hour in fechas.dt.floor("h")}
+
+
+class ExtractCache:
+    """Hourly Parquet partitions under ``root``, one folder per scope.
+
+    ``scope`` identifies everything but the dates (connection and filters);
+    ``fetch(start, end)`` must return the rows with ``start <=
+    pri_action_date <= end`` for that scope.
+    """
+
+    def __init__(
+        self,
+        root=CACHE_DIR,
+        grace=CLOSE_GRACE,
+        retention=RETENTION,
+        clock=datetime.datetime.now,
+    ):
+        self.root = Path(root)
+        self.grace = grace
+        self.retention = retention
+        self.clock = clock
+        self.fetched_hours = 0
+
+    def folder(self, scope):
+        digest = hashlib.sha1(repr(scope).encode("utf-8")).hexdigest()[:16]
+        return self.root / digest
+
+    def load(self, scope, fecha_ini, fecha_fin, fetch):
+        """Rows of ``[fecha_ini, fecha_fin]``, fetching only the missing hours."""
+        now = self.clock()
+        folder = self.folder(scope)
+        needed = hours(fecha_ini, fecha_fin)
+        closed = {h for h in needed if h + HOUR + self.grace <= now}
+        on_disk = {h for h in closed if self._path(folder, h).exists()}
+
+        frames = []
+        for start, end in runs([h for h in needed if h not in on_disk]):
+            df = fetch(start, end)
+            df = df[pd.to_datetime(df["pri_action_date"]) < end]
+            self.fetched_hours += int((end - start) / HOUR)
+            unsettled = pending_hours(df)
+            self._store(
+                folder,
+                df,
+                [
+                    h
+                    for h in hours(start, end - HOUR)
+                    if h in closed and h not in unsettled
+                ],
+            )
+            frames.append(df)
+        frames += [pd.read_parquet(self._path(folder, h)) for h in sorted(on_disk)]
+        self.prune(folder, now)
+
+        frames = [f for f in frames if not f.empty] or frames[:1]
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        fechas = pd.to_datetime(df["pri_action_date"])
+        df = df[(fechas >= fecha_ini) & (fechas <= fecha_fin)]
+        return df.sort_values("pri_action_date", kind="stable", ignore_index=True)
+
+    def _path(self, folder, hour):
+        return folder / f"{hour.strftime(_NAME_FORMAT)}.parquet"
+
+    def _store(self, folder, df, closed_hours):
+        if not closed_hours:
+            return
+        folder.mkdir(parents=True, exist_ok=True)
+        hour_of = pd.to_datetime(df["pri_action_date"]).dt.floor("h")
+        for hour in closed_hours:
+            path = self._path(folder, hour)
+            # Written under a unique temporary name so readers never see half
+            # a file and sessions storing the same hour do not collide.
+            fd, tmp = tempfile.mkstemp(dir=folder, prefix=path.stem, suffix=".tmp")
+            os.close(fd)
+            try:
+                df[hour_of == hour].to_parquet(tmp, index=False)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+    def prune(self, folder, now):
+        """Delete partitions older than the retention period."""
+        limit = now - self.retention
+        for path in folder.glob("*.parquet"):
+            try:
+                hour = datetime.datetime.strptime(path.stem, _NAME_FORMAT)
+            except ValueError:
+                continue
+            if hour < limit:
+                path.unlink(missing_ok=True)
+
+
+@st.cache_resource(show_spinner=False)
+def get_extract_cache():
+    """Return the extract cache shared by every session of this process."""
+    return ExtractCache()
+
+
+def leer_transacciones(
+    params,
+    connect,
+    fecha_ini,
+    fecha_fin,
+    ne_id=None,
+    actions=None,
+    services=None,
+    columns=None,
+):
+    """Same rows as ``build_query`` + ``get_transacciones``, through the extract.
+
+    ``connect()`` must return a context manager yielding a connection, e.g.
+    :func:`config.db_config.session_connection`. ``columns`` is the view's
+    projection (``pri_action_date`` is always included); the result goes
+    through :func:`services.data_service.compactar`. Without pyarrow the
+    whole range is queried directly.
+    """
+    if columns and "pri_action_date" not in columns:
+        columns = [*columns, "pri_action_date"]
+
+    def fetch(start, end):
+        query, binds = build_query(start, end, ne_id, actions, services, columns)
+        with connect() as conn:
+            return get_transacciones(conn, query, binds)
+
+    if not HAS_PARQUET:
+        return compactar(fetch(fecha_ini, fecha_fin))
+    identity = tuple(params.get(k) for k in ("host", "port", "service_name", "user"))
+    scope = (
+        identity,
+        ne_id,
+        tuple(sorted(actions or ())),
+        tuple(sorted(services or ())),
+        tuple(columns or ()),
+    )
+    return compactar(get_extract_cache().load(scope, fecha_ini, fecha_fin, fetch))
@@ -0,0 +1,121 @@
+"""Incremental feed for the real-time operations page."""
+
+import os
+from collections import Counter, OrderedDict
+
+import pandas as pd
+
+from services.data_service import get_estados, get_realtime_transacciones
+
+BUFFER_ROWS = int(os.getenv("DASHBOARD_RT_BUFFER_ROWS", "5000"))
+PENDING_STATUSES = frozenset({"K", "T", "PENDING"})
+# Oldest pending rows stop being rechecked past this many.
+MAX_PENDING = int(os.getenv("DASHBOARD_RT_MAX_PENDING", "1000"))
+COLUMNS = [
+    "pri_id",
+    "pri_ne_id",
+    "pri_ne_group",
+    "pri_status",
+    "pri_error_code",
+    "pri_action_date",
+]
+
+
+class RealtimeFeed:
+    """Transactions since ``start_time``, fetched past a watermark.
+
+    Each :meth:`refresh` only reads rows after the last
+    ``(pri_action_date, pri_id)`` seen, plus the current status of rows that
+    were still pending, so its cost follows the rate of new and pending
+    rows rather than the time elapsed since the start. The latest
+    ``max_rows`` rows are kept in a ring buffer for display, while the
+    status counters cover every row seen. At most ``max_pending`` pending
+    rows are rechecked, the most recent ones.
+    """
+
+    def __init__(
+        self,
+        start_time,
+        ne_id=None,
+        ne_group=None,
+        max_rows=BUFFER_ROWS,
+        max_pending=MAX_PENDING,
+    ):
+        self.start_time = start_time
+        self.ne_id = ne_id
+        self.ne_group = ne_group
+        self.max_rows = max_rows
+        self.max_pending = max_pending
+        self.watermark = None
+        self.rows = OrderedDict()
+        self.counts = Counter()
+        self.pending = {}
+
+    def refresh(self, conn):
+        """Fetch what changed since the previous call; return the new row count."""
+        return self.apply(*self.fetch(conn))
+
+    def fetch(self, conn):
+        """Query what changed since the last :meth:`apply` without touching
+        the feed, so readers are not held up by the database round trips.
+
+        Returns ``(new_rows, estados)`` for :meth:`apply`.
+        """
+        new = get_realtime_transacciones(
+            conn, self.start_time, self.ne_id, self.ne_group, after=self.watermark
+        )
+        estados = get_estados(conn, list(self.pending)) if self.pending else None
+        return new, estados
+
+    def apply(self, new, estados=None):
+        """Fold a :meth:`fetch` result into the feed; return the new row count."""
+        if estados is not None:
+            self._update_pending(estados)
+        if new.empty:
+            return 0
+        for row in new[COLUMNS].to_dict("records"):
+            pri_id, status = row["pri_id"], row["pri_status"]
+            self.rows[pri_id] = row
+            self.counts[status] += 1
+            if status in PENDING_STATUSES:
+                self.pending[pri_id] = status
+        while len(self.rows) > self.max_rows:
+            self.rows.popitem(last=False)
+        while len(self.pending) > self.max_pending:
+            del self.pending[next(iter(self.pending))]
+        last = new.iloc[-1]
+        self.watermark = (last["pri_action_date"].to_pydatetime(), int(last["pri_id"]))
+        return len(new)
+
+    def _update_pending(self, estados):
+        seen = set()
+        for pri_id, status, error_code in estados[
+            ["pri_id", "pri_status", "pri_error_code"]
+        ].itertuples(index=False):
+            seen.add(pri_id)
+            old = self.pending.get(pri_id)
+            if old is None or status == old:
+                continue
+            self.counts[old] -= 1
+            self.counts[status] += 1
+            if status in PENDING_STATUSES:
+                self.pending[pri_id] = status
+            else:
+                del self.pending[pri_id]
+            if pri_id in self.rows:
+                self.rows[pri_id].update(pri_status=status, pri_error_code=error_code)
+        for pri_id in [p for p in self.pending if p not in seen]:
+            del self.pending[pri_id]  # deleted meanwhile
+
+    def kpis(self):
+        """Return the ``total``/``pendiente``/``ok``/``error`` counters."""
+        return {
+            "total": sum(self.counts.values()),
+            "pendiente": sum(self.counts[s] for s in PENDING_STATUSES),
+            "ok": self.counts["O"],
+            "error": self.counts["E"],
+        }
+
+    def frame(self):
+        """Return the buffered rows as a DataFrame, oldest first."""
+        return pd.DataFrame(list(self.rows.values()), columns=COLUMNS)
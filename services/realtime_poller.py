@@ -0,0 +1,138 @@
+"""Process-wide pollers shared by every viewer of the real-time page."""
+
+import datetime
+import os
+import threading
+import time
+
+import streamlit as st
+
+from services.realtime_feed import RealtimeFeed
+
+POLL_SECONDS = float(os.getenv("DASHBOARD_RT_POLL_SECONDS", "5"))
+# A viewer that has not rerun the page for this long is considered gone.
+LEASE_SECONDS = float(os.getenv("DASHBOARD_RT_LEASE_SECONDS", "30"))
+
+
+class SharedPoller:
+    """Background thread refreshing one :class:`RealtimeFeed`.
+
+    Viewers hold leases on it through :class:`PollerRegistry`; the thread
+    stops on its own once no lease is left.
+    """
+
+    def __init__(self, registry, key, params, connect, ne_id, ne_group, interval):
+        self.registry = registry
+        self.key = key
+        self.params = params
+        self.connect = connect
+        self.interval = interval
+        self.feed = RealtimeFeed(datetime.datetime.now(), ne_id, ne_group)
+        self.leases = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.last_refresh = None
+        self.error = None
+        self.thread = threading.Thread(
+            target=self._run, name=f"rt-poller-{ne_id}-{ne_group}", daemon=True
+        )
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                # Only this thread changes the feed, so it can be read
+                # without the lock; viewers wait for the swap, not the query.
+                with self.connect(self.params) as conn:
+                    changes = self.feed.fetch(conn)
+                with self.lock:
+                    self.feed.apply(*changes)
+                self.last_refresh = datetime.datetime.now()
+                self.error = None
+            except Exception as e:  # the next cycle retries
+                self.error = str(e)
+            if self.registry.reap(self):
+                break
+            self.stopped.wait(self.interval)
+
+    def snapshot(self):
+        """Return ``(frame, kpis)`` for the current window."""
+        with self.lock:
+            return self.feed.frame(), self.feed.kpis()
+
+
+class PollerRegistry:
+    """One :class:`SharedPoller` per ``(connection, ne_id, ne_group)``.
+
+    Each browser session leases the poller it is watching; the database
+    load is thus one query per distinct subscription and interval, however
+    many viewers there are.
+    """
+
+    def __init__(self, interval=POLL_SECONDS, lease_seconds=LEASE_SECONDS):
+        self.interval = interval
+        self.lease_seconds = lease_seconds
+        self.lock = threading.Lock()
+        self.pollers = {}
+        self.sessions = {}
+
+    def acquire(self, session_id, params, connect, ne_id=None, ne_group=None):
+        """Lease (or renew) the poller for this subscription.
+
+        ``connect(params)`` must return a context manager yielding a
+        connection, e.g. :func:`config.db_config.pooled_connection`.
+        A session watching another subscription releases it first.
+        """
+        identity = tuple(params.get(k) for k in ("host", "port", "service_name", "user"))
+        key = (identity, ne_id, ne_group)
+        with self.lock:
+            previous = self.sessions.get(session_id)
+            if previous is not None and previous != key:
+                self._release(session_id)
+            poller = self.pollers.get(key)
+            if poller is None:
+                poller = SharedPoller(
+                    self, key, params, connect, ne_id, ne_group, self.interval
+                )
+                self.pollers[key] = poller
+                poller.thread.start()
+            poller.leases[session_id] = time.monotonic()
+            self.sessions[session_id] = key
+        return poller
+
+    def release(self, session_id):
+        """Drop the session's lease right away (e.g. on "Detener")."""
+        with self.lock:
+            self._release(session_id)
+
+    def _release(self, session_id):
+        key = self.sessions.pop(session_id, None)
+        poller = self.pollers.get(key)
+        if poller is None:
+            return
+        poller.leases.pop(session_id, None)
+        if not poller.leases:
+            self._stop(poller)
+
+    def _stop(self, poller):
+        poller.stopped.set()
+        if self.pollers.get(poller.key) is poller:
+            del self.pollers[poller.key]
+
+    def reap(self, poller):
+        """Expire stale leases; return ``True`` if ``poller`` must stop."""
+        deadline = time.monotonic() - self.lease_seconds
+        with self.lock:
+            for session_id, seen in list(poller.leases.items()):
+                if seen < deadline:
+                    del poller.leases[session_id]
+                    if self.sessions.get(session_id) == poller.key:
+                        del self.sessions[session_id]
+            if not poller.leases:
+                self._stop(poller)
+            return poller.stopped.is_set()
+
+
+@st.cache_resource(show_spinner=False)
+def get_registry():
+    """Return the registry shared by every session of this process."""
+    return PollerRegistry()
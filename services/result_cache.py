@@ -0,0 +1,166 @@
+"""Process-wide cache of query results shared across Streamlit reruns."""
+
+import itertools
+import os
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import streamlit as st
+
+TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "300"))
+MAX_BYTES = int(float(os.getenv("DASHBOARD_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Frames handed out by ResultCache.fetch: id -> (weakref, version).
+_handed_out = {}
+
+
+def cache_key(identity, query, binds):
+    """Key for a result: connection identity, statement text and bind values.
+
+    The statement is whitespace-normalized and the binds sorted by name, so
+    the same filters always map to the same key.
+    """
+    text = _WHITESPACE.sub(" ", query).strip()
+    return identity, text, tuple(sorted((binds or {}).items()))
+
+
+def version_of(df):
+    """Version of the cached result that ``df`` is a hand-out of, else ``None``.
+
+    Only the very objects returned by :meth:`ResultCache.fetch` qualify.
+    Frames derived from them (sorted, filled, filtered...) are new objects
+    and get ``None`` even though pandas copies ``attrs`` over to them.
+    """
+    entry = _handed_out.get(id(df))
+    if entry is not None and entry[0]() is df:
+        return entry[1]
+    return None
+
+
+def _hand_out(df, version):
+    copy = df.copy(deep=False)
+    ident = id(copy)
+
+    def forget(ref):
+        if _handed_out.get(ident, (None,))[0] is ref:
+            del _handed_out[ident]
+
+    _handed_out[ident] = (weakref.ref(copy, forget), version)
+    return copy
+
+
+class ResultCache:
+    """LRU cache of DataFrames with a TTL and a memory budget.
+
+    Entries expire ``ttl`` seconds after being fetched (callers may ask for
+    a shorter ``max_age``, e.g. the auto-refresh interval). When the cached
+    frames add up to more than ``max_bytes`` the least recently used ones are
+    evicted; a single frame larger than the budget is not cached at all.
+    """
+
+    def __init__(self, ttl=TTL_SECONDS, max_bytes=MAX_BYTES, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._versions = itertools.count(1)
+
+    def get(self, key, max_age=None):
+        """Return the cached frame for ``key`` or ``None``."""
+        ttl = self.ttl if max_age is None else min(self.ttl, max_age)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            fetched, size, df = entry
+            if self.clock() - fetched >= ttl:
+                self._drop(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return df
+
+    def put(self, key, df):
+        """Store ``df`` and stamp it with a new ``attrs["version"]``.
+
+        The version lets per-frame memos (e.g.
+        :func:`services.error_analysis.analyze`) recognise the same result
+        in the copies :meth:`fetch` hands out on later reruns, through
+        :func:`version_of`.
+        """
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        with self.lock:
+            df.attrs["version"] = next(self._versions)
+            if key in self.entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (self.clock(), size, df)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+
+    def fetch(self, key, load, max_age=None):
+        """Return the frame for ``key``, calling ``load()`` on a miss.
+
+        A shallow copy is returned so callers can add or replace columns
+        without touching the shared entry.
+        """
+        df = self.get(key, max_age)
+        if df is None:
+            df = load()
+            self.put(key, df)
+        return _hand_out(df, df.attrs["version"])
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def _drop(self, key):
+        _, size, _ = self.entries.pop(key)
+        self.bytes -= size
+
+
+@st.cache_resource(show_spinner=False)
+def get_result_cache():
+    """Return the cache shared by every session of this process."""
+    return ResultCache()
+
+
+def cached(params, name, query, binds, load, max_age=None):
+    """Return ``load()``'s frame through the shared cache.
+
+    ``params`` are the session's connection parameters (only the target and
+    user are part of the key); ``name``, ``query`` and ``binds`` identify
+    the result.
+    """
+    identity = tuple(params.get(k) for k in ("host", "port", "service_name", "user"))
+    key = cache_key((identity, name), query, binds)
+    return get_result_cache().fetch(key, load, max_age)
+
+
+def cached_read(params, reader, query, binds, connect, max_age=None):
+    """Run ``reader(conn, query, binds)`` through the shared cache.
+
+    ``connect()`` must return a context manager yielding a connection, e.g.
+    :func:`config.db_config.session_connection`. The connection is only
+    opened on a miss.
+    """
+
+    def load():
+        with connect() as conn:
+            return reader(conn, query, binds)
+
+    return cached(params, reader.__name__, query, binds, load, max_age)
@@ -0,0 +1,9 @@
+-- Conteos agregados en Oracle para los widgets del dashboard
+SELECT {columns}, COUNT(*) AS cantidad
+FROM swp_provisioning_interfaces a
+WHERE a.pri_action_date BETWEEN :fecha_ini AND {fecha_fin}
+{ne_id}
+{action}
+{service}
+{status}
+GROUP BY {group_by}
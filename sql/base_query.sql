@@ -1,7 +1,7 @@
 -- Consulta base (adaptada del archivo original)
-SELECT a.*
+SELECT {columns}
 FROM swp_provisioning_interfaces a
-WHERE a.pri_action_date BETWEEN :fecha_ini AND :fecha_fin
-:ne_id
-:action
-:service
+WHERE a.pri_action_date BETWEEN :fecha_ini AND {fecha_fin}
+{ne_id}
+{action}
+{service}
@@ -0,0 +1,17 @@
+-- Conteos por estado, código y mensaje normalizado para ambos periodos
+SELECT a.pri_status,
+       a.pri_error_code,
+       TRIM(REGEXP_REPLACE(REGEXP_REPLACE(a.pri_message_error, '[0-9]+', ''), '[[:space:]]+', ' ')) AS pri_message_error,
+       COUNT(CASE WHEN a.pri_action_date BETWEEN :fecha_ini AND :fecha_fin THEN 1 END) AS count_actual,
+       COUNT(CASE WHEN a.pri_action_date BETWEEN :fecha_ini_cmp AND :fecha_fin_cmp THEN 1 END) AS count_cmp,
+       COUNT(CASE WHEN a.pri_action_date BETWEEN :fecha_ini AND :fecha_fin THEN 1 END)
+         - COUNT(CASE WHEN a.pri_action_date BETWEEN :fecha_ini_cmp AND :fecha_fin_cmp THEN 1 END) AS delta
+FROM swp_provisioning_interfaces a
+WHERE (a.pri_action_date BETWEEN :fecha_ini AND :fecha_fin
+       OR a.pri_action_date BETWEEN :fecha_ini_cmp AND :fecha_fin_cmp)
+{ne_id}
+{action}
+{service}
+GROUP BY a.pri_status,
+         a.pri_error_code,
+         TRIM(REGEXP_REPLACE(REGEXP_REPLACE(a.pri_message_error, '[0-9]+', ''), '[[:space:]]+', ' '))
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from ml.feature_engineering import build_features
+from services.data_service import compactar, reporte_memoria
+
+
+def _frame(n=10000):
+    return pd.DataFrame(
+        {
+            "pri_id": range(n),
+            "pri_status": ["O", "E", "K", "O"] * (n // 4),
+            "pri_error_code": [None, 1001.0, None, None] * (n // 4),
+            "pri_message_error": [None, "Timeout en HLR 12 ms", None, None] * (n // 4),
+            "pri_action_date": pd.date_range("2025-04-29", periods=n, freq="s"),
+        }
+    )
+
+
+def test_compactar_uses_categories_and_reports_sizes():
+    df = compactar(_frame())
+    assert df["pri_status"].dtype == "category"
+    assert df["pri_message_error"].dtype != "category"
+    assert df["pri_id"].dtype == "int64"
+
+    report = reporte_memoria({"transacciones_df": df}).iloc[0]
+    assert report["filas"] == 10000 and report["columnas"] == 5
+    assert report["mb_despues"] < report["mb_antes"]
+
+
+def test_features_unchanged_by_compaction():
+    raw = _frame(400)
+    pd.testing.assert_frame_equal(
+        build_features(raw), build_features(compactar(raw)), check_dtype=False
+    )
@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from services import error_analysis
+from services.data_service import compactar
+from services.error_analysis import ErrorAnalysis, analyze
+from services.result_cache import ResultCache
+
+
+def _rows():
+    return pd.DataFrame(
+        {
+            "pri_status": ["E", "E", "E", "O", "E", "E"],
+            "pri_error_code": [1001.0, 1001.0, 1001.0, None, 2002.0, None],
+            "pri_message_error": [
+                "Timeout 12 en HLR",
+                "Timeout 7 en HLR",
+                "Abonado 5 inexistente",
+                None,
+                "Sin saldo",
+                None,
+            ],
+        }
+    )
+
+
+def test_tables_from_rows():
+    analysis = ErrorAnalysis.from_rows(_rows())
+    assert analysis.total == 5
+    assert analysis.code_counts.to_dict("records") == [
+        {"pri_error_code_str": "1001", "pri_message_error_norm": "Timeout en HLR", "count": 3},
+        {"pri_error_code_str": "2002", "pri_message_error_norm": "Sin saldo", "count": 1},
+        {"pri_error_code_str": "nan", "pri_message_error_norm": "", "count": 1},
+    ]
+    assert analysis.message_counts.iloc[0].to_dict() == {
+        "pri_message_error": "Timeout en HLR",
+        "count": 2,
+    }
+    assert analysis.by_code_message["cantidad"].sum() == 5
+
+
+def test_category_frames_give_the_same_tables():
+    raw = ErrorAnalysis.from_rows(_rows())
+    compact = ErrorAnalysis.from_rows(compactar(_rows()))
+    pd.testing.assert_frame_equal(raw.code_counts, compact.code_counts)
+    pd.testing.assert_frame_equal(raw.message_counts, compact.message_counts)
+
+
+def test_tables_from_counts_skip_zero_rows():
+    agg = pd.DataFrame(
+        {
+            "pri_status": ["E", "E", "O"],
+            "pri_error_code": [1001, 2002, None],
+            "pri_message_error": ["Timeout en HLR", "Sin saldo", None],
+            "count_actual": [4, 0, 9],
+            "count_cmp": [1, 3, 9],
+        }
+    )
+    actual = ErrorAnalysis.from_counts(agg, "count_actual")
+    assert actual.code_counts["pri_error_code_str"].tolist() == ["1001"]
+    cmp = ErrorAnalysis.from_counts(agg, "count_cmp")
+    assert cmp.code_counts["count"].tolist() == [3, 1]
+    assert ErrorAnalysis.from_counts(None).code_counts.empty
+
+
+def test_analyze_memoizes_by_identity_and_version():
+    error_analysis._memo.clear()
+    df = _rows()
+    assert analyze(df) is analyze(df)
+    assert analyze(df) is not analyze(df.copy())
+
+    cache = ResultCache()
+    first = analyze(cache.fetch("key", _rows))
+    rerun = cache.fetch("key", _rows)
+    assert analyze(rerun) is first  # a later rerun of the same result
+    # Derived frames inherit attrs but not the memo.
+    derived = [
+        rerun[rerun["pri_status"] == "E"],
+        rerun.sort_values("pri_status"),
+        rerun.fillna({"pri_message_error": "Sin saldo"}),
+        rerun.replace({"pri_status": {"E": "O"}}),
+    ]
+    assert all(d.attrs == rerun.attrs for d in derived)
+    assert all(analyze(d) is not first for d in derived)
+    assert analyze(derived[3]).total == 0
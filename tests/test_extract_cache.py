@@ -0,0 +1,103 @@
+import datetime
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from services.extract_cache import HAS_PARQUET, ExtractCache, hours, runs
+
+pytestmark = pytest.mark.skipif(not HAS_PARQUET, reason="pyarrow not installed")
+
+T0 = datetime.datetime(2025, 4, 29, 0, 0)
+H = datetime.timedelta(hours=1)
+
+
+def _source():
+    """One row every 10 minutes over two days."""
+    fechas = pd.date_range(T0, T0 + 48 * H, freq="10min", inclusive="left")
+    return pd.DataFrame(
+        {"pri_id": range(len(fechas)), "pri_action_date": fechas, "pri_status": "O"}
+    )
+
+
+class FakeDB:
+    def __init__(self):
+        self.rows = _source()
+        self.calls = []
+
+    def fetch(self, start, end):
+        self.calls.append((start, end))
+        fechas = self.rows["pri_action_date"]
+        return self.rows[(fechas >= start) & (fechas <= end)].reset_index(drop=True)
+
+
+def test_hours_and_runs():
+    assert hours(T0 + datetime.timedelta(minutes=30), T0 + 2 * H) == [T0, T0 + H, T0 + 2 * H]
+    assert runs([T0, T0 + H, T0 + 5 * H]) == [(T0, T0 + 2 * H), (T0 + 5 * H, T0 + 6 * H)]
+
+
+def test_shifted_window_fetches_only_new_hours(tmp_path):
+    db = FakeDB()
+    now = T0 + 30 * H + datetime.timedelta(minutes=20)
+    cache = ExtractCache(tmp_path, grace=datetime.timedelta(minutes=5), clock=lambda: now)
+
+    ini, fin = T0 + 2 * H, T0 + 26 * H
+    df = cache.load("scope", ini, fin, db.fetch)
+    expected = db.rows[(db.rows.pri_action_date >= ini) & (db.rows.pri_action_date <= fin)]
+    assert df["pri_id"].tolist() == expected["pri_id"].tolist()
+    assert db.calls == [(ini, T0 + 27 * H)]
+
+    db.calls.clear()
+    df = cache.load("scope", ini + H, fin + H, db.fetch)
+    assert db.calls == [(T0 + 27 * H, T0 + 28 * H)]
+    assert df["pri_action_date"].min() == ini + H
+    assert df["pri_action_date"].max() == fin + H
+    assert len(df) == 24 * 6 + 1
+
+    db.calls.clear()
+    cache.load("other", ini, fin, db.fetch)
+    assert len(db.calls) == 1  # scopes never share partitions
+
+
+def test_open_hour_is_always_refetched(tmp_path):
+    db = FakeDB()
+    now = T0 + 10 * H + datetime.timedelta(minutes=2)
+    cache = ExtractCache(tmp_path, grace=datetime.timedelta(minutes=5), clock=lambda: now)
+    cache.load("scope", T0 + 8 * H, now, db.fetch)
+    db.calls.clear()
+    cache.load("scope", T0 + 8 * H, now, db.fetch)
+    # 09:00 is still within the grace period and 10:00 is open
+    assert db.calls == [(T0 + 9 * H, T0 + 11 * H)]
+    assert not (cache.folder("scope") / "2025042909.parquet").exists()
+    assert (cache.folder("scope") / "2025042908.parquet").exists()
+
+
+def test_hours_with_pending_rows_are_not_frozen(tmp_path):
+    db = FakeDB()
+    db.rows.loc[db.rows["pri_action_date"] == T0 + 3 * H, "pri_status"] = "K"
+    now = T0 + 30 * H
+    cache = ExtractCache(tmp_path, grace=datetime.timedelta(minutes=5), clock=lambda: now)
+    cache.load("scope", T0 + 2 * H, T0 + 5 * H, db.fetch)
+    assert not (cache.folder("scope") / "2025042903.parquet").exists()
+
+    db.rows["pri_status"] = "O"  # the pending row settled
+    db.calls.clear()
+    df = cache.load("scope", T0 + 2 * H, T0 + 5 * H, db.fetch)
+    assert db.calls == [(T0 + 3 * H, T0 + 4 * H)]
+    assert set(df["pri_status"]) == {"O"}
+    assert (cache.folder("scope") / "2025042903.parquet").exists()
+
+
+def test_concurrent_stores_do_not_collide(tmp_path):
+    db = FakeDB()
+    now = T0 + 30 * H
+    cache = ExtractCache(tmp_path, clock=lambda: now)
+    ini, fin = T0 + 2 * H, T0 + 6 * H
+    with ThreadPoolExecutor(4) as pool:
+        frames = list(pool.map(lambda _: cache.load("scope", ini, fin, db.fetch), range(8)))
+    assert all(len(df) == len(frames[0]) for df in frames)
+    assert not list(cache.folder("scope").glob("*.tmp"))
@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils.helpers import normalize_error_message, normalize_error_messages
+
+
+def test_batch_matches_row_by_row():
+    messages = pd.Series(
+        ["Timeout 123 en  HLR 4", None, "Timeout 9 en HLR 77", "OK", np.nan, 42],
+        index=[10, 11, 12, 13, 14, 15],
+        name="pri_message_error",
+    )
+    result = normalize_error_messages(messages)
+    assert result.index.tolist() == messages.index.tolist()
+    assert result.name == "pri_message_error"
+    assert result.tolist()[:4:2] == ["Timeout en HLR", "Timeout en HLR"]
+    assert result[13] == "OK" and result[15] == 42
+    assert result[[11, 14]].isna().all()
+    expected = messages.dropna().apply(normalize_error_message)
+    assert result.dropna().tolist() == expected.tolist()
+
+
+def test_batch_accepts_categories():
+    messages = pd.Series(["a 1", "a 2", None, "b"] * 3, dtype="category")
+    result = normalize_error_messages(messages)
+    assert result.dtype == object
+    assert result.fillna("").tolist() == ["a", "a", "", "b"] * 3
@@ -0,0 +1,100 @@
+import datetime
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from data.query_builder import (
+    build_aggregate_query,
+    build_comparison_query,
+    build_page_query,
+    build_query,
+    in_list_binds,
+)
+
+
+def test_dates_are_bound_not_inlined():
+    ini = datetime.datetime(2025, 4, 29, 0, 15, 31)
+    fin = datetime.datetime(2025, 4, 30, 0, 0, 0)
+    sql, binds = build_query(ini, fin)
+    assert "BETWEEN :fecha_ini AND :fecha_fin" in sql
+    assert "TO_DATE" not in sql and "2025" not in sql
+    assert binds == {"fecha_ini": ini, "fecha_fin": fin}
+
+
+def test_missing_end_uses_sysdate():
+    sql, binds = build_query(datetime.datetime(2025, 4, 29))
+    assert "AND SYSDATE" in sql
+    assert "fecha_fin" not in binds
+
+
+def test_filters_keep_statement_text_stable():
+    ini = datetime.datetime(2025, 4, 29)
+    sql_a, binds_a = build_query(ini, None, "NE1", ["ALTA", "BAJA", "MOD"], ["VOZ"])
+    sql_b, binds_b = build_query(ini, None, "NE2", ["X", "Y", "Z", "W"], ["DATOS"])
+    assert sql_a == sql_b
+    assert "AND a.pri_ne_id = :ne_id" in sql_a
+    assert binds_a["ne_id"] == "NE1"
+    assert binds_a["action_3"] == "MOD"  # padded with the last value
+    assert binds_b["service_0"] == "DATOS"
+
+
+def test_in_list_binds_buckets_sizes():
+    clause, binds = in_list_binds("col", "v", ["a", "b", "c", "d", "e"])
+    assert clause.count(":v_") == 8
+    assert list(binds.values())[-1] == "e"
+
+
+def test_in_list_binds_split_above_oracle_limit():
+    clause, binds = in_list_binds("col", "v", list(range(1500)))
+    assert len(binds) == 2048
+    assert clause.startswith("AND (col IN (") and clause.count(" OR col IN (") == 2
+    assert all(part.count(":v_") <= 1000 for part in clause.split(" OR "))
+
+
+def test_comparison_counts_both_periods_in_one_statement():
+    ini, fin = datetime.datetime(2025, 4, 29), datetime.datetime(2025, 4, 30)
+    ini_cmp, fin_cmp = datetime.datetime(2025, 4, 22), datetime.datetime(2025, 4, 23)
+    sql, binds = build_comparison_query(ini, fin, ini_cmp, fin_cmp, "NE1", ["ALTA"])
+    assert "BETWEEN :fecha_ini AND :fecha_fin\n       OR a.pri_action_date BETWEEN :fecha_ini_cmp" in sql
+    assert "AS count_actual" in sql and "AS count_cmp" in sql and "AS delta" in sql
+    assert "GROUP BY a.pri_status" in sql
+    assert "AND a.pri_ne_id = :ne_id" in sql
+    assert binds["fecha_ini_cmp"] == ini_cmp and binds["fecha_fin_cmp"] == fin_cmp
+    assert binds["action_0"] == "ALTA"
+
+
+def test_aggregate_query_groups_in_the_database():
+    ini = datetime.datetime(2025, 4, 29)
+    sql, binds = build_aggregate_query("hour", ini, None, "NE1")
+    assert "COUNT(*) AS cantidad" in sql
+    assert "TRUNC(a.pri_action_date, 'HH24') AS pri_action_date" in sql
+    assert sql.rstrip().endswith("GROUP BY TRUNC(a.pri_action_date, 'HH24')")
+    assert "AND SYSDATE" in sql and "a.*" not in sql
+    assert binds == {"fecha_ini": ini, "ne_id": "NE1"}
+
+    sql, binds = build_aggregate_query("error", ini)
+    assert "AND a.pri_status = :status" in sql and binds["status"] == "E"
+    assert "REGEXP_REPLACE" in sql
+
+
+def test_page_query_binds_page_bounds():
+    ini = datetime.datetime(2025, 4, 29)
+    sql_1, binds_1 = build_page_query(ini, None, status="E", page=1, page_size=100)
+    sql_3, binds_3 = build_page_query(ini, None, status="E", page=3, page_size=100)
+    assert sql_1 == sql_3
+    assert "ORDER BY a.pri_action_date DESC, a.pri_id DESC" in sql_1
+    assert (binds_1["first_row"], binds_1["last_row"]) == (0, 100)
+    assert (binds_3["first_row"], binds_3["last_row"]) == (200, 300)
+    assert binds_3["status"] == "E" and "error_code" not in binds_3
+
+
+def test_projection_goes_into_the_select_list():
+    ini = datetime.datetime(2025, 4, 29)
+    sql, _ = build_query(ini, columns=["pri_id", "pri_status"])
+    assert "SELECT a.pri_id, a.pri_status\n" in sql
+    assert "SELECT a.*\n" in build_query(ini)[0]
+    with pytest.raises(ValueError):
+        build_query(ini, columns=["pri_id; DROP TABLE x"])
@@ -0,0 +1,87 @@
+import datetime
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from services import realtime_feed
+from services.realtime_feed import RealtimeFeed
+
+T0 = datetime.datetime(2025, 5, 1, 10, 0, 0)
+
+
+def _rows(*rows):
+    return pd.DataFrame(
+        [
+            {
+                "pri_id": pri_id,
+                "pri_ne_id": "NE1",
+                "pri_ne_group": "G",
+                "pri_status": status,
+                "pri_error_code": None,
+                "pri_action_date": pd.Timestamp(T0 + datetime.timedelta(seconds=s)),
+            }
+            for pri_id, status, s in rows
+        ]
+    )
+
+
+def test_refresh_fetches_past_watermark_and_updates_counters(monkeypatch):
+    batches = [
+        _rows((1, "O", 0), (2, "K", 1), (3, "E", 1)),
+        _rows((4, "O", 2)),
+    ]
+    calls = []
+
+    def fake_realtime(conn, start_time, ne_id, ne_group, after=None):
+        calls.append(after)
+        return batches.pop(0) if batches else _rows()
+
+    def fake_estados(conn, pri_ids):
+        assert list(pri_ids) == [2]
+        return pd.DataFrame(
+            {"pri_id": [2], "pri_status": ["E"], "pri_error_code": [42]}
+        )
+
+    monkeypatch.setattr(realtime_feed, "get_realtime_transacciones", fake_realtime)
+    monkeypatch.setattr(realtime_feed, "get_estados", fake_estados)
+
+    feed = RealtimeFeed(T0, max_rows=3)
+    assert feed.refresh(None) == 3
+    assert feed.kpis() == {"total": 3, "pendiente": 1, "ok": 1, "error": 1}
+    assert feed.watermark == (T0 + datetime.timedelta(seconds=1), 3)
+
+    assert feed.refresh(None) == 1
+    assert calls == [None, (T0 + datetime.timedelta(seconds=1), 3)]
+    assert feed.kpis() == {"total": 4, "pendiente": 0, "ok": 2, "error": 2}
+    frame = feed.frame()
+    assert frame["pri_id"].tolist() == [2, 3, 4]  # ring buffer keeps the last 3
+    assert frame.loc[0, "pri_status"] == "E" and frame.loc[0, "pri_error_code"] == 42
+    assert not feed.pending
+
+    assert feed.refresh(None) == 0
+
+
+def test_pending_is_capped_and_forgets_deleted_rows(monkeypatch):
+    batches = [_rows((1, "K", 0), (2, "K", 1), (3, "T", 2))]
+
+    def fake_realtime(conn, start_time, ne_id, ne_group, after=None):
+        return batches.pop(0) if batches else _rows()
+
+    def fake_estados(conn, pri_ids):
+        assert list(pri_ids) == [2, 3]  # the oldest pending row was dropped
+        # Row 3 was deleted meanwhile; row 2 is still pending.
+        return pd.DataFrame(
+            {"pri_id": [2], "pri_status": ["K"], "pri_error_code": [None]}
+        )
+
+    monkeypatch.setattr(realtime_feed, "get_realtime_transacciones", fake_realtime)
+    monkeypatch.setattr(realtime_feed, "get_estados", fake_estados)
+
+    feed = RealtimeFeed(T0, max_pending=2)
+    feed.refresh(None)
+    assert list(feed.pending) == [2, 3]
+    feed.refresh(None)
+    assert feed.pending == {2: "K"}
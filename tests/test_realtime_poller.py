@@ -0,0 +1,85 @@
+import contextlib
+import sys
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from services import realtime_poller
+from services.realtime_poller import PollerRegistry
+
+PARAMS = {"host": "db", "port": 1521, "service_name": "ORCL", "user": "u"}
+
+
+def _fake_feed(monkeypatch):
+    refreshes = []
+
+    def fake_fetch(self, conn):
+        refreshes.append((threading.current_thread().name, self.ne_group))
+        return ()
+
+    monkeypatch.setattr(realtime_poller.RealtimeFeed, "fetch", fake_fetch)
+    monkeypatch.setattr(realtime_poller.RealtimeFeed, "apply", lambda self: 0)
+    return refreshes
+
+
+@contextlib.contextmanager
+def _connect(params):
+    yield object()
+
+
+def test_viewers_of_a_subscription_share_one_poller(monkeypatch):
+    _fake_feed(monkeypatch)
+    registry = PollerRegistry(interval=0.01, lease_seconds=60)
+    a = registry.acquire("s1", PARAMS, _connect, "NE1", "G1")
+    b = registry.acquire("s2", PARAMS, _connect, "NE1", "G1")
+    c = registry.acquire("s3", PARAMS, _connect, "NE1", "G2")
+    assert a is b and a is not c
+    assert len(registry.pollers) == 2
+
+    registry.release("s1")
+    assert not a.stopped.is_set()
+    # s2 switches subscription: its old poller loses its last viewer.
+    assert registry.acquire("s2", PARAMS, _connect, "NE1", "G2") is c
+    assert a.stopped.is_set()
+    a.thread.join(1)
+    assert not a.thread.is_alive()
+    assert list(registry.pollers) == [c.key]
+
+    registry.release("s2")
+    registry.release("s3")
+    c.thread.join(1)
+    assert not registry.pollers and not c.thread.is_alive()
+
+
+def test_poller_stops_when_leases_expire(monkeypatch):
+    refreshes = _fake_feed(monkeypatch)
+    registry = PollerRegistry(interval=0.01, lease_seconds=0.05)
+    poller = registry.acquire("s1", PARAMS, _connect, None, "G1")
+    poller.thread.join(2)
+    assert not poller.thread.is_alive()
+    assert refreshes and all(group == "G1" for _, group in refreshes)
+    assert not registry.pollers and not registry.sessions
+
+
+def test_snapshot_does_not_wait_for_the_query(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_fetch(self, conn):
+        started.set()
+        release.wait(5)
+        return ()
+
+    monkeypatch.setattr(realtime_poller.RealtimeFeed, "fetch", slow_fetch)
+    monkeypatch.setattr(realtime_poller.RealtimeFeed, "apply", lambda self: 0)
+    registry = PollerRegistry(interval=0.01, lease_seconds=60)
+    poller = registry.acquire("s1", PARAMS, _connect, None, "G1")
+    assert started.wait(1)
+    acquired = poller.lock.acquire(timeout=0.5)
+    assert acquired
+    poller.lock.release()
+    frame, kpis = poller.snapshot()
+    assert frame.empty and kpis["total"] == 0
+    release.set()
+    registry.release("s1")
+    poller.thread.join(1)
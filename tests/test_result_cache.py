@@ -0,0 +1,68 @@
+import datetime
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from services.result_cache import ResultCache, cache_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _frame(n):
+    return pd.DataFrame({"pri_id": range(n)})
+
+
+def test_key_ignores_whitespace_and_bind_order():
+    ini = datetime.datetime(2025, 4, 29)
+    a = cache_key("db", "SELECT *\n  FROM t WHERE x = :a", {"a": 1, "fecha_ini": ini})
+    b = cache_key("db", "SELECT * FROM t  WHERE x = :a ", {"fecha_ini": ini, "a": 1})
+    assert a == b
+    assert a != cache_key("db", "SELECT * FROM t WHERE x = :a", {"a": 2, "fecha_ini": ini})
+    assert a != cache_key("other", "SELECT * FROM t WHERE x = :a", {"a": 1, "fecha_ini": ini})
+
+
+def test_fetch_reuses_until_ttl():
+    clock = FakeClock()
+    cache = ResultCache(ttl=60, max_bytes=10**9, clock=clock)
+    calls = []
+
+    def load():
+        calls.append(1)
+        return _frame(3)
+
+    cache.fetch("k", load)
+    clock.now = 59
+    df = cache.fetch("k", load)
+    assert len(calls) == 1 and len(df) == 3
+    df["extra"] = 1  # callers get their own column set
+    assert "extra" not in cache.fetch("k", load).columns
+    assert cache.fetch("k", load, max_age=30) is not None and len(calls) == 2
+    clock.now = 200
+    cache.fetch("k", load)
+    assert len(calls) == 3
+    assert cache.hits == 2 and cache.misses == 3
+
+
+def test_lru_eviction_respects_memory_budget():
+    frame = _frame(1000)
+    size = int(frame.memory_usage(index=True, deep=True).sum())
+    cache = ResultCache(ttl=60, max_bytes=2 * size, clock=FakeClock())
+    cache.put("a", frame)
+    cache.put("b", _frame(1000))
+    assert cache.get("a") is not None  # "b" is now the least recently used
+    cache.put("c", _frame(1000))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.bytes == 2 * size
+
+    cache.put("huge", _frame(10000))
+    assert cache.get("huge") is None and len(cache.entries) == 2
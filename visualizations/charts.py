@@ -6,16 +6,23 @@ import pandas as pd
 # always exposes the expected functions even in older Python environments.
 __all__ = [
     "kpi_cards",
+    "kpi_cards_from_counts",
     "error_comparison_bar_chart",
+    "error_delta_bar_chart",
     "realtime_operations_chart",
 ]
 
 
 def kpi_cards(df: pd.DataFrame) -> None:
-    total = len(df)
-    pendiente = len(df[df["pri_status"].isin(["K", "T", "PENDING"])])
-    ok = len(df[df["pri_status"] == "O"])
-    error = len(df[df["pri_status"] == "E"])
+    kpi_cards_from_counts(df["pri_status"].value_counts())
+
+
+def kpi_cards_from_counts(counts: pd.Series) -> None:
+    """Same cards as :func:`kpi_cards` from transactions per ``pri_status``."""
+    total = int(counts.sum())
+    pendiente = sum(int(counts.get(s, 0)) for s in ("K", "T", "PENDING"))
+    ok = int(counts.get("O", 0))
+    error = int(counts.get("E", 0))
 
     if total == 0:
         st.warning("No data available")
@@ -55,8 +62,13 @@ def error_comparison_bar_chart(
     resumen_total["diferencia"] = (
         resumen_total["cantidad_actual"] - resumen_total["cantidad_cmp"]
     )
+    return error_delta_bar_chart(resumen_total)
+
+
+def error_delta_bar_chart(resumen: pd.DataFrame) -> px.bar:
+    """Plot ``diferencia`` per ``pri_error_code`` / ``pri_message_error``."""
     return px.bar(
-        resumen_total,
+        resumen,
         x="pri_error_code",
         y="diferencia",
         color="pri_message_error",
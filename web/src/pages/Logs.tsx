@@ -1,15 +1,90 @@
-import { useEffect, useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
+
+const MAX_LINES = 500
+const LEVELS = ['DEBUG', 'INFO', 'WARN', 'ERROR']
+
+type Frame =
+  | { type: 'lines'; file: string; offset: number; lines: string[] }
+  | { type: 'subscribed' }
+  | { type: 'error'; detail: string }
 
 export default function Logs() {
   const [lines, setLines] = useState<string[]>([])
+  const [include, setInclude] = useState('')
+  const [levels, setLevels] = useState<string[]>([])
+  const [error, setError] = useState<string | null>(null)
+  const wsRef = useRef<WebSocket | null>(null)
+  const offsetRef = useRef<{ file: string; offset: number } | null>(null)
+  const filtersRef = useRef({ include, levels })
+  filtersRef.current = { include, levels }
+
   useEffect(() => {
-    const ws = new WebSocket((location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + '/api/logs/stream')
-    ws.onmessage = e => setLines(l => [...l.slice(-100), e.data])
-    return () => ws.close()
+    let closed = false
+    let retry: ReturnType<typeof setTimeout>
+    const connect = () => {
+      // Browsers cannot set an Authorization header on a websocket.
+      const params = new URLSearchParams({ token: localStorage.getItem('token') ?? '' })
+      // Resume after the last frame instead of replaying the file again.
+      if (offsetRef.current !== null) {
+        params.set('offset', String(offsetRef.current.offset))
+        params.set('file', offsetRef.current.file)
+      }
+      if (filtersRef.current.include) params.set('include', filtersRef.current.include)
+      if (filtersRef.current.levels.length) params.set('levels', filtersRef.current.levels.join(','))
+      const ws = new WebSocket(
+        (location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + '/api/logs/stream?' + params,
+      )
+      ws.onmessage = e => {
+        const frame: Frame = JSON.parse(e.data)
+        if (frame.type === 'lines') {
+          offsetRef.current = { file: frame.file, offset: frame.offset }
+          setLines(l => [...l, ...frame.lines].slice(-MAX_LINES))
+        } else if (frame.type === 'error') {
+          setError(frame.detail)
+        } else {
+          setError(null)
+        }
+      }
+      ws.onclose = () => {
+        if (!closed) retry = setTimeout(connect, 2000)
+      }
+      wsRef.current = ws
+    }
+    connect()
+    return () => {
+      closed = true
+      clearTimeout(retry)
+      wsRef.current?.close()
+    }
   }, [])
+
+  useEffect(() => {
+    const ws = wsRef.current
+    if (ws?.readyState === WebSocket.OPEN) {
+      ws.send(JSON.stringify({ type: 'subscribe', include, levels }))
+    }
+  }, [include, levels])
+
+  const toggleLevel = (level: string) =>
+    setLevels(ls => (ls.includes(level) ? ls.filter(l => l !== level) : [...ls, level]))
+
   return (
     <div>
       <h1 className="text-xl mb-4">Logs</h1>
+      <div className="mb-2 space-x-2">
+        <input
+          placeholder="text"
+          value={include}
+          onChange={e => setInclude(e.target.value)}
+          className="border px-1"
+        />
+        {LEVELS.map(level => (
+          <label key={level}>
+            <input type="checkbox" checked={levels.includes(level)} onChange={() => toggleLevel(level)} /> {level}
+          </label>
+        ))}
+        {error && <span className="text-red-600">{error}</span>}
+      </div>
       <pre className="bg-black text-green-400 p-2 h-96 overflow-auto">
         {lines.map((l, i) => (
           <div key={i}>{l}</div>